@@ -12,6 +12,8 @@ import subprocess
 SCORE_THREAD_NAME = "🏋🏻 ScoreThread 🏋"
 PREDICTION_SENDER_THREAD_NAME = "🛰 PredictionsTransmitter 🛰"
 PROPERTIES_THREAD_NAME = "🏠 PropertiesThread 🏠"
+SYNAPSE_BUILDER_THREAD_NAME = "📦 SynapseBuilder 📦"
+OUTBOX_DRAINER_THREAD_NAME = "📮 WebsiteOutboxDrainer 📮"
 
 
 def main(validator):
@@ -20,10 +22,18 @@ def main(validator):
     step = 1  # Initialize step
     current_thread = threading.current_thread().name
 
+    # Move legacy per-miner predictions tables into the predictions table before anything reads it,
+    # so scoring and weight setting never see a miner whose table hasn't been copied yet
+    validator.predictions_table_migrator.migrate()
+
     # Start the properties thread
     properties_thread = threading.Thread(target=validator.market_manager.ingest_properties, name=PROPERTIES_THREAD_NAME)
     properties_thread.start()
 
+    # Start the synapse builder thread
+    synapse_builder_thread = threading.Thread(target=validator.synapse_manager.run_synapse_builder, name=SYNAPSE_BUILDER_THREAD_NAME)
+    synapse_builder_thread.start()
+
     # Start the scoring thread
     scoring_thread = threading.Thread(target=validator.scorer.run_score_thread, name=SCORE_THREAD_NAME)
     scoring_thread.start()
@@ -32,6 +42,10 @@ def main(validator):
     prediction_sender_thread = threading.Thread(target=validator.prediction_sender.run, name=PREDICTION_SENDER_THREAD_NAME)
     prediction_sender_thread.start()
 
+    # Start the website outbox drainer thread
+    outbox_drainer_thread = threading.Thread(target=validator.website_outbox.run_drainer, name=OUTBOX_DRAINER_THREAD_NAME)
+    outbox_drainer_thread.start()
+
     while True:
         validator.should_step = True
         try:
@@ -54,6 +68,12 @@ def main(validator):
             if step % 75 == 0:  # Check if threads are alive, restart if not
                 _check_restart_threads(validator)
 
+            if step % 25 == 0:  # Export database lock wait times, synapse build times, website feed and outbox depth
+                validator.database_manager.log_lock_metrics()
+                validator.synapse_manager.log_metrics()
+                validator.prediction_sender.log_metrics()
+                validator.website_outbox.log_metrics()
+
             if step >= 1000:  # Reset the step
                 step = 1
                 validator.should_step = False
@@ -91,12 +111,24 @@ def _check_restart_threads(validator):
         properties_thread = threading.Thread(target=validator.market_manager.ingest_properties, name=PROPERTIES_THREAD_NAME)
         properties_thread.start()
 
+    synapse_builder_thread_is_alive = validator.is_thread_running(SYNAPSE_BUILDER_THREAD_NAME)
+    if not synapse_builder_thread_is_alive:
+        bt.logging.info(f"| {current_thread} | ☢️ SynapseBuilder was found not running, restarting it...")
+        synapse_builder_thread = threading.Thread(target=validator.synapse_manager.run_synapse_builder, name=SYNAPSE_BUILDER_THREAD_NAME)
+        synapse_builder_thread.start()
+
     prediction_sender_thread_is_alive = validator.is_thread_running(PREDICTION_SENDER_THREAD_NAME)
     if not prediction_sender_thread_is_alive:
         bt.logging.info(f"| {current_thread} | ☢️ PredictionSender was found not running, restarting it...")
         prediction_thread = threading.Thread(target=validator.prediction_sender.run, name=PREDICTION_SENDER_THREAD_NAME)
         prediction_thread.start()
 
+    outbox_drainer_thread_is_alive = validator.is_thread_running(OUTBOX_DRAINER_THREAD_NAME)
+    if not outbox_drainer_thread_is_alive:
+        bt.logging.info(f"| {current_thread} | ☢️ WebsiteOutboxDrainer was found not running, restarting it...")
+        outbox_drainer_thread = threading.Thread(target=validator.website_outbox.run_drainer, name=OUTBOX_DRAINER_THREAD_NAME)
+        outbox_drainer_thread.start()
+
 def get_and_send_version():
     current_thread = threading.current_thread().name
     config_file_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'setup.cfg')
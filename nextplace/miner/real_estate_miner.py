@@ -1,7 +1,7 @@
 import bittensor as bt
 from template.base.miner import BaseMinerNeuron
 from typing import Tuple
-from nextplace.protocol import RealEstateSynapse
+from nextplace.protocol import RealEstateSynapse, RESPONSE_FIELDS, WIRE_FORMAT_VERSION
 from nextplace.miner.ml.model import Model
 from nextplace.miner.ml.model_loader import ModelArgs
 
@@ -19,8 +19,11 @@ class RealEstateMiner(BaseMinerNeuron):
 
     # OVERRIDE | Required
     def forward(self, synapse: RealEstateSynapse) -> RealEstateSynapse:
+        synapse.decode_columns()  # No-op for the legacy format
         self.model.run_inference(synapse)
         self._set_force_update_prediction_flag(synapse)
+        synapse.encode_columns(RESPONSE_FIELDS)  # Only send back what the validator reads
+        synapse.supported_wire_format_version = WIRE_FORMAT_VERSION  # Let the validator know we understand the columnar format
         return synapse
 
     def _set_force_update_prediction_flag(self, synapse: RealEstateSynapse):
@@ -1,7 +1,12 @@
 import bittensor as bt
-from typing import Optional, List
+from operator import attrgetter
+from typing import Any, Dict, NamedTuple, Optional, List
 from pydantic import BaseModel, Field
 
+LEGACY_WIRE_FORMAT_VERSION = 0  # One JSON object per property
+COLUMNAR_WIRE_FORMAT_VERSION = 1  # One JSON array per field, shared by all properties
+WIRE_FORMAT_VERSION = COLUMNAR_WIRE_FORMAT_VERSION  # Newest format this code understands
+
 
 class RealEstatePrediction(BaseModel):
     """Real Estate Prediction data class"""
@@ -34,13 +39,148 @@ class RealEstatePrediction(BaseModel):
 class RealEstatePredictions(BaseModel):
     predictions: List[RealEstatePrediction] = Field(None, description="List of predictions")
 
+class PredictionRecord(NamedTuple):
+    """The fields of a miner's prediction that the validator reads"""
+    nextplace_id: Optional[str]
+    market: Optional[str]
+    force_update_past_predictions: Optional[bool]
+    predicted_sale_price: Optional[float]
+    predicted_sale_date: Optional[str]
+
+
+PROPERTY_FIELDS = list(RealEstatePrediction.model_fields)
+RESPONSE_FIELDS = list(PredictionRecord._fields)
+_get_response_fields = attrgetter(*RESPONSE_FIELDS)
+
+
+def encode_property_columns(predictions: List[RealEstatePrediction], fields: List[str] = None) -> Dict[str, Any]:
+    """
+    Encode predictions as parallel arrays, one per field. Fields that are None for every prediction are left out
+    Args:
+        predictions: the predictions to encode
+        fields: the fields to keep, defaults to all of them
+
+    Returns:
+        The columnar payload
+    """
+    columns = {}
+    for field in fields or PROPERTY_FIELDS:
+        values = [getattr(prediction, field) for prediction in predictions]
+        if any(value is not None for value in values):
+            columns[field] = values
+    return {'count': len(predictions), 'columns': columns}
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def decode_prediction_records(payload: Dict[str, Any]) -> List[PredictionRecord]:
+    """
+    Read only the response fields out of a columnar payload, without building a model per prediction.
+    Values of the wrong type are read as None, which the validator skips
+    Args:
+        payload: the columnar payload
+
+    Returns:
+        One record per prediction
+    """
+    count = payload['count']
+    columns = payload['columns']
+    nones = [None] * count
+    nextplace_ids, markets, force_updates, prices, dates = (columns.get(field) or nones for field in RESPONSE_FIELDS)
+    if any(len(values) != count for values in (nextplace_ids, markets, force_updates, prices, dates)):
+        raise ValueError("Columnar payload has columns of different lengths")
+    return [
+        PredictionRecord(_optional_str(nextplace_id), _optional_str(market), force_update is True, _optional_float(price), _optional_str(date))
+        for nextplace_id, market, force_update, price, date in zip(nextplace_ids, markets, force_updates, prices, dates)
+    ]
+
+
+def decode_property_columns(payload: Dict[str, Any]) -> List[RealEstatePrediction]:
+    """
+    Decode a columnar payload back into predictions. Unknown fields are ignored
+    Args:
+        payload: the columnar payload
+
+    Returns:
+        The predictions
+    """
+    count = payload['count']
+    columns = {field: values for field, values in payload['columns'].items() if field in RealEstatePrediction.model_fields}
+    if any(len(values) != count for values in columns.values()):
+        raise ValueError("Columnar payload has columns of different lengths")
+    if len(columns) == 0:
+        return [RealEstatePrediction() for _ in range(count)]
+    fields = list(columns)
+    return [RealEstatePrediction(**dict(zip(fields, row))) for row in zip(*columns.values())]
+
+
 class RealEstateSynapse(bt.Synapse):
     """Real Estate Synapse class"""
     real_estate_predictions: RealEstatePredictions
+    wire_format_version: int = Field(LEGACY_WIRE_FORMAT_VERSION, description="Format of the properties in this synapse")
+    property_columns: Optional[Dict[str, Any]] = Field(None, description="Properties in the columnar format")
+    supported_wire_format_version: int = Field(LEGACY_WIRE_FORMAT_VERSION, description="Newest format the responding miner understands")
 
     @classmethod
-    def create(cls, real_estate_predictions: RealEstatePredictions = None):
-        return cls(real_estate_predictions=real_estate_predictions)
+    def create(cls, real_estate_predictions: RealEstatePredictions = None, wire_format_version: int = LEGACY_WIRE_FORMAT_VERSION):
+        synapse = cls(real_estate_predictions=real_estate_predictions, wire_format_version=wire_format_version)
+        synapse.encode_columns()
+        return synapse
 
-    def deserialize(self):
+    def is_columnar(self) -> bool:
+        return self.wire_format_version >= COLUMNAR_WIRE_FORMAT_VERSION
+
+    def get_predictions(self) -> RealEstatePredictions:
+        """
+        Get the predictions, whatever format they were sent in
+        Returns:
+            The predictions
+        """
+        if self.is_columnar() and self.property_columns is not None:
+            return RealEstatePredictions(predictions=decode_property_columns(self.property_columns))
         return self.real_estate_predictions
+
+    def get_prediction_records(self) -> List[PredictionRecord]:
+        """
+        Get the response fields of every prediction as lightweight records
+        Returns:
+            One record per prediction
+        """
+        if self.is_columnar() and self.property_columns is not None:
+            return decode_prediction_records(self.property_columns)
+        predictions = self.real_estate_predictions.predictions if self.real_estate_predictions is not None else None
+        return list(map(PredictionRecord._make, map(_get_response_fields, predictions or [])))
+
+    def decode_columns(self) -> None:
+        """
+        Move columnar properties into `real_estate_predictions`, so they can be updated in place
+        Returns:
+            None
+        """
+        if self.is_columnar() and self.property_columns is not None:
+            self.real_estate_predictions = self.get_predictions()
+            self.property_columns = None
+
+    def encode_columns(self, fields: List[str] = None) -> None:
+        """
+        Move `real_estate_predictions` into the columnar format, if this synapse uses it
+        Args:
+            fields: the fields to keep, defaults to all of them
+
+        Returns:
+            None
+        """
+        if self.is_columnar() and self.real_estate_predictions is not None:
+            self.property_columns = encode_property_columns(self.real_estate_predictions.predictions or [], fields)
+            self.real_estate_predictions = RealEstatePredictions(predictions=[])
+
+    def deserialize(self):
+        return self.get_predictions()
@@ -1,10 +1,12 @@
 import json
 import threading
+from typing import Iterator
 
 import requests
 import bittensor as bt
 from datetime import datetime, timezone
 from nextplace.validator.api.api_base import ApiBase
+from nextplace.validator.api.token_bucket import DEFAULT_REQUESTS_PER_SECOND, TokenBucket
 from nextplace.validator.data_containers.home import Home
 from nextplace.validator.database.database_manager import DatabaseManager
 from nextplace.validator.utils.contants import ISO8601
@@ -16,8 +18,9 @@ Helper class to get currently listed homes (properties) on the market
 
 class PropertiesAPI(ApiBase):
 
-    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]]):
+    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]], token_bucket: TokenBucket or None = None):
         super(PropertiesAPI, self).__init__(database_manager, markets)
+        self.token_bucket = token_bucket if token_bucket is not None else TokenBucket(DEFAULT_REQUESTS_PER_SECOND)  # Share one to rate limit with other callers
 
     def process_region_market(self, market: dict[str, str]) -> None:
         """
@@ -28,6 +31,18 @@ class PropertiesAPI(ApiBase):
         Returns:
             None
         """
+        for homes in self.fetch_region_market_pages(market):
+            self.ingest_page(homes, market['name'])
+
+    def fetch_region_market_pages(self, market: dict[str, str]) -> Iterator[list]:
+        """
+        Fetch a specific region's housing market data, 1 page at a time
+        Args:
+            market: the current market
+
+        Returns:
+            Generator of pages of homes
+        """
         current_thread = threading.current_thread().name
 
         # Choose the appropriate API endpoint based on market ID
@@ -48,6 +63,7 @@ class PropertiesAPI(ApiBase):
                 "limit": self.max_results_per_page,
                 "page": page
             }
+            self.token_bucket.acquire_blocking()  # Prefetch workers and the sold homes fetcher share the quota
             response = requests.get(url_for_sale, headers=headers, params=querystring)
 
             # Only proceed with status code is 200
@@ -63,15 +79,15 @@ class PropertiesAPI(ApiBase):
             if not homes:
                 break
 
-            self._ingest_properties(homes, market['name'])
+            yield homes
 
             if len(homes) < self.max_results_per_page:  # Last page
                 break
 
-            bt.logging.info(f"| {current_thread} | Ingested {len(homes)} homes on page {page} in {market['name']}")
+            bt.logging.info(f"| {current_thread} | Fetched {len(homes)} homes on page {page} in {market['name']}")
             page += 1
 
-    def _ingest_properties(self, homes: list, market: str) -> None:
+    def ingest_page(self, homes: list, market: str) -> None:
         """
         Ingest all valid results into the `properties` table
         Args:
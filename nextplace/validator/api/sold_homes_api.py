@@ -1,8 +1,10 @@
+import asyncio
 import threading
 from datetime import datetime, timezone
+import aiohttp
 import bittensor as bt
-import requests
 from nextplace.validator.api.api_base import ApiBase
+from nextplace.validator.api.token_bucket import DEFAULT_REQUESTS_PER_SECOND, TokenBucket
 from nextplace.validator.database.database_manager import DatabaseManager
 import pytz
 
@@ -10,11 +12,31 @@ import pytz
 Helper class to get recently sold homes
 """
 
+US_SOLD_URL = "https://redfin-com-data.p.rapidapi.com/properties/search-sold"
+CANADA_SOLD_URL = "https://redfin-canada.p.rapidapi.com/properties/search-sold"
+DEFAULT_MAX_CONCURRENCY = 8  # Markets fetched at the same time
+MAX_RATE_LIMITED_RETRIES = 3
+REQUEST_TIMEOUT = 60  # Seconds
+
 
 class SoldHomesAPI(ApiBase):
 
-    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]]):
+    def __init__(
+            self,
+            database_manager: DatabaseManager,
+            markets: list[dict[str, str]],
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+            requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+            us_url: str = US_SOLD_URL,
+            canada_url: str = CANADA_SOLD_URL,
+            token_bucket: TokenBucket or None = None
+    ):
         super(SoldHomesAPI, self).__init__(database_manager, markets)
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.token_bucket = token_bucket if token_bucket is not None else TokenBucket(requests_per_second)  # Share one to rate limit with other callers
+        self.us_url = us_url
+        self.canada_url = canada_url
 
     def get_sold_properties(self) -> None:
         """
@@ -23,39 +45,61 @@ class SoldHomesAPI(ApiBase):
             None
         """
         current_thread = threading.current_thread().name
-        num_markets = len(self.markets)
         bt.logging.info(f"| {current_thread} | 🕵🏻 Looking for recently sold homes'")
-        for idx, market in enumerate(self.markets):
-            bt.logging.info(f"| {current_thread} | 🔍 Getting sold homes in {market['name']}")
-            self._process_region_sold_homes(market)
-            percent_done = round(((idx + 1) / num_markets) * 100, 2)
-            bt.logging.info(f"| {current_thread} | {percent_done}% of markets processed")
+        asyncio.run(self._get_sold_properties_async(current_thread))
 
-    def _process_region_sold_homes(self, market: dict) -> None:
+    async def _get_sold_properties_async(self, current_thread: str) -> None:
         """
-        Iteratively hit API for sold homes in market, store valid homes in memory, ingest
+        Fetch every market concurrently. Pages are ingested as they arrive
         Args:
+            current_thread: name of the calling thread, for logging
+
+        Returns:
+            None
+        """
+        num_markets = len(self.markets)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        markets_done = 0
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+
+            async def process_market(market: dict) -> None:
+                nonlocal markets_done
+                async with semaphore:
+                    bt.logging.info(f"| {current_thread} | 🔍 Getting sold homes in {market['name']}")
+                    await self._process_region_sold_homes(session, self.token_bucket, market, current_thread)
+                markets_done += 1
+                percent_done = round((markets_done / num_markets) * 100, 2)
+                bt.logging.info(f"| {current_thread} | {percent_done}% of markets processed")
+
+            await asyncio.gather(*(process_market(market) for market in self.markets))
+
+    async def _process_region_sold_homes(self, session: aiohttp.ClientSession, token_bucket: TokenBucket, market: dict, current_thread: str) -> None:
+        """
+        Iteratively hit API for sold homes in market, ingest each page of valid homes
+        Args:
+            session: the shared HTTP session
+            token_bucket: the shared rate limiter
             market: current market
-            oldest_prediction: timestamp of our oldest unscored prediction
+            current_thread: name of the calling thread, for logging
 
         Returns:
             None
         """
-        current_thread = threading.current_thread().name
         region_id = market['id']
-        
+
         # Choose the appropriate API endpoint and headers based on market ID
         if region_id.startswith('33'):
-            url_sold = "https://redfin-canada.p.rapidapi.com/properties/search-sold"  # Canadian URL for sold houses
+            url_sold = self.canada_url  # Canadian URL for sold houses
             headers = self.canada_headers  # Use Canadian API key
         else:
-            url_sold = "https://redfin-com-data.p.rapidapi.com/properties/search-sold"  # US URL for sold houses
+            url_sold = self.us_url  # US URL for sold houses
             headers = self.headers  # Use US API key
-            
-        page = 1  # Page number for api results
 
+        page = 1  # Page number for api results
+        loop = asyncio.get_running_loop()
         invalid_results = {'date': 0, 'price': 0, 'timezone': 0}
-        valid_results = []
         # Iteratively call the API until we have no more results to read
         while True:
 
@@ -67,32 +111,60 @@ class SoldHomesAPI(ApiBase):
                 "page": page
             }
 
-            response = requests.get(url_sold, headers=headers, params=querystring)  # Get API response
-
-            # Only proceed with status code is 200
-            if response.status_code != 200:
-                current_thread = threading.current_thread().name
-                bt.logging.error(f"| {current_thread} | ❗Error querying sold properties: {response.status_code}")
-                bt.logging.error(response.text)
+            homes = await self._fetch_page(session, token_bucket, url_sold, headers, querystring, current_thread)
+            if not homes:  # No more results, or the request failed
                 break
 
-            data = response.json()  # Get response body
-            homes = data.get('data', [])  # Extract data
-
-            if not homes:  # No more results
-                break
-
-            # Iterate all homes
+            # Iterate all homes, ingest this page off the event loop
+            valid_results = []
             for home in homes:
                 self._process_home(home, valid_results, invalid_results)
+            if len(valid_results) > 0:
+                await loop.run_in_executor(None, self._ingest_valid_homes, valid_results)
 
             if len(homes) < self.max_results_per_page:  # Last page
                 break
 
             page += 1  # Increment page
 
-        bt.logging.info(f"| {current_thread} | 📣 Found {invalid_results['date']} homes with invalid dates, {invalid_results['price']} homes with invalid prices, {invalid_results['timezone']} homes with invalid timezones")
-        self._ingest_valid_homes(valid_results)
+        bt.logging.info(f"| {current_thread} | 📣 Found {invalid_results['date']} homes with invalid dates, {invalid_results['price']} homes with invalid prices, {invalid_results['timezone']} homes with invalid timezones in {market['name']}")
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, token_bucket: TokenBucket, url: str, headers: dict, params: dict, current_thread: str) -> list or None:
+        """
+        Get one page of sold homes. Rate limited responses are retried after waiting for the bucket again
+        Args:
+            session: the shared HTTP session
+            token_bucket: the shared rate limiter
+            url: API endpoint
+            headers: API headers
+            params: query string
+            current_thread: name of the calling thread, for logging
+
+        Returns:
+            The homes on this page, or None if the request failed
+        """
+        headers = {key: value for key, value in headers.items() if value is not None}  # Unset API keys, like requests does
+        for attempt in range(MAX_RATE_LIMITED_RETRIES + 1):
+            await token_bucket.acquire()
+            try:
+                async with session.get(url, headers=headers, params=params) as response:
+                    if response.status == 429 and attempt < MAX_RATE_LIMITED_RETRIES:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+
+                    # Only proceed with status code is 200
+                    if response.status != 200:
+                        bt.logging.error(f"| {current_thread} | ❗Error querying sold properties: {response.status}")
+                        bt.logging.error(await response.text())
+                        return None
+
+                    data = await response.json(content_type=None)  # Get response body
+                    return data.get('data', [])  # Extract data
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                bt.logging.error(f"| {current_thread} | ❗Error querying sold properties: {e}")
+                return None
+        return None
 
     def _process_home(self, home: any, result_tuples: list[tuple], invalid_results: dict[str, int]) -> None:
         home_data = home['homeData']
@@ -134,10 +206,17 @@ class SoldHomesAPI(ApiBase):
         Returns:
             None
         """
+        # Sales we haven't seen before are pending until the scoring thread scores them
+        pending_query_str = """
+            INSERT OR IGNORE INTO pending_sales (nextplace_id)
+            SELECT ? WHERE NOT EXISTS (SELECT 1 FROM sales WHERE nextplace_id = ?)
+        """
+        query_str = """
+            INSERT OR IGNORE INTO sales (nextplace_id, property_id, sale_price, sale_date)
+            VALUES (?, ?, ?, ?)
+        """
         with self.database_manager.lock:  # Acquire lock
-            query_str = """
-                INSERT OR IGNORE INTO sales (nextplace_id, property_id, sale_price, sale_date)
-                VALUES (?, ?, ?, ?)
-            """
-            self.database_manager.query_and_commit_many(query_str, result_tuples)
+            with self.database_manager.transaction() as cursor:
+                cursor.executemany(pending_query_str, [(x[0], x[0]) for x in result_tuples])
+                cursor.executemany(query_str, result_tuples)
             
\ No newline at end of file
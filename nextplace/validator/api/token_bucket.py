@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+"""
+Helper class limits the request rate of concurrent coroutines and threads sharing one API quota
+"""
+
+DEFAULT_REQUESTS_PER_SECOND = 5.0  # Shared by every RapidAPI caller, keeps us inside the quota
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate: tokens added per second
+            capacity: max tokens held, which is the largest burst allowed. Defaults to `rate`, at least 1
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()  # Not tied to an event loop, so threads and event loops can share the bucket
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available, then take it. For coroutines
+        Returns:
+            None
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> None:
+        """
+        Wait until a token is available, then take it. For threads
+        Returns:
+            None
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _reserve(self) -> float:
+        """
+        Take the next token, going into debt if there is none. Callers are served in the order they reserve
+        Returns:
+            Seconds to wait until the reserved token has been added
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
@@ -0,0 +1,164 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+import bittensor as bt
+
+"""
+Helper class keeps long-lived SQLite connections, one per thread
+"""
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_HEALTH_CHECK_INTERVAL = 60  # Seconds between health checks on an idle connection
+
+
+@dataclass
+class PooledConnection:
+    thread: threading.Thread
+    connection: sqlite3.Connection
+    last_checked: float
+    depth: int = 0  # Number of nested checkouts by the owning thread
+
+
+class ConnectionPool:
+
+    def __init__(self, db_path: str, max_size: int = DEFAULT_POOL_SIZE, health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL, pragmas: list[str] = None):
+        self.db_path = db_path
+        self.pragmas = pragmas or []  # Statements run on every new connection
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self._connections: dict[int, PooledConnection] = {}  # Thread ident -> pooled connection
+        self._pool_lock = threading.Lock()  # Guards the connections map, not the connections themselves
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check out the calling thread's connection. Falls back to a transient connection if the pool is full or closed
+        Returns:
+            A database connection
+        """
+        pooled = self._acquire()
+        if pooled is None:  # Pool is full, disabled or closed
+            db_connection = self._connect()
+            try:
+                yield db_connection
+            finally:
+                db_connection.close()
+            return
+
+        try:
+            yield pooled.connection
+        finally:
+            pooled.depth -= 1
+            # Never leave a half-finished transaction open on a long-lived connection
+            if pooled.depth == 0 and pooled.connection.in_transaction:
+                pooled.connection.rollback()
+
+    def size(self) -> int:
+        """
+        Get the number of pooled connections
+        Returns:
+            Number of open pooled connections
+        """
+        with self._pool_lock:
+            return len(self._connections)
+
+    def close_all(self) -> None:
+        """
+        Close every pooled connection and stop handing out new ones
+        Returns:
+            None
+        """
+        with self._pool_lock:
+            self._closed = True
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for pooled in connections:
+            self._close_quietly(pooled.connection)
+
+    def _acquire(self) -> PooledConnection or None:
+        """
+        Get or create the pooled connection owned by the calling thread
+        Returns:
+            The pooled connection, or None if the caller should use a transient connection
+        """
+        current_thread = threading.current_thread()
+        ident = threading.get_ident()
+
+        with self._pool_lock:
+            if self._closed or self.max_size <= 0:
+                return None
+
+            pooled = self._connections.get(ident)
+            if pooled is not None and pooled.thread is not current_thread:  # Thread ident was reused by a new thread
+                self._close_quietly(pooled.connection)
+                del self._connections[ident]
+                pooled = None
+
+            if pooled is None:
+                if len(self._connections) >= self.max_size:
+                    self._reap_dead_threads()
+                if len(self._connections) >= self.max_size:
+                    return None
+                pooled = PooledConnection(thread=current_thread, connection=self._connect(), last_checked=time.monotonic())
+                self._connections[ident] = pooled
+
+        # Only the owning thread touches its connection from here on
+        if pooled.depth == 0 and time.monotonic() - pooled.last_checked > self.health_check_interval:
+            if not self._is_healthy(pooled.connection):
+                bt.logging.info(f"| {current_thread.name} | 🩺 Replacing unhealthy database connection")
+                self._close_quietly(pooled.connection)
+                pooled.connection = self._connect()
+            pooled.last_checked = time.monotonic()
+
+        pooled.depth += 1
+        return pooled
+
+    def _reap_dead_threads(self) -> None:
+        """
+        Close connections owned by threads that have exited. Caller must hold the pool lock
+        Returns:
+            None
+        """
+        for ident, pooled in list(self._connections.items()):
+            if not pooled.thread.is_alive():
+                self._close_quietly(pooled.connection)
+                del self._connections[ident]
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection. Connections are handed to a single thread at a time,
+        but may be closed from another thread during shutdown or reaping
+        Returns:
+            A database connection
+        """
+        db_connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.pragmas:
+            db_connection.execute(pragma)
+        return db_connection
+
+    @staticmethod
+    def _is_healthy(db_connection: sqlite3.Connection) -> bool:
+        """
+        Check that a connection can still run a statement
+        Args:
+            db_connection: the connection to check
+
+        Returns:
+            True if the connection is usable, else False
+        """
+        try:
+            db_connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(db_connection: sqlite3.Connection) -> None:
+        try:
+            db_connection.close()
+        except sqlite3.Error:
+            pass
@@ -1,7 +1,13 @@
+import atexit
 import sqlite3
-from typing import Tuple
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
 import os
-from threading import RLock
+import bittensor as bt
+from nextplace.validator.database.connection_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from nextplace.validator.database.locks import InstrumentedLock, ReadWriteLock
 
 """
 Helper class manager connections to the SQLite database
@@ -10,16 +16,31 @@ Helper class manager connections to the SQLite database
 
 class DatabaseManager:
 
-    def __init__(self):
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, wal_mode: bool = False):
         data_dir = "data"
         db_version = 1
         os.makedirs(data_dir, exist_ok=True)  # Ensure data directory exists
         self.db_path = f'{data_dir}/validator_v{db_version}.db'  # Set db path
         db_dir = os.path.dirname(self.db_path)
-        self.lock = RLock()  # Reentrant lock for thread safety
         if not os.path.exists(db_dir):
             os.makedirs(db_dir)  # Create db dir
 
+        self.wal_mode = wal_mode
+        self.lock = InstrumentedLock()  # Reentrant lock for thread safety. Serializes writers
+        if wal_mode:
+            # WAL readers see a consistent snapshot while a write is in progress, so they only share a lock
+            self.read_write_lock = ReadWriteLock()
+            self.read_lock = self.read_write_lock.reader
+            pragmas = ["PRAGMA synchronous=NORMAL"]
+        else:
+            # Rollback-journal readers conflict with writers, keep the single lock
+            self.read_write_lock = None
+            self.read_lock = self.lock
+            pragmas = []
+        self._set_journal_mode()
+        self.connection_pool = ConnectionPool(self.db_path, pool_size, pragmas=pragmas)  # Long-lived per-thread connections
+        atexit.register(self.close)
+
     def query(self, query: str) -> list[tuple]:
         """
         Get all results of a query from the database
@@ -30,14 +51,14 @@ class DatabaseManager:
             All rows matching the query
         """
         rows = []
-        cursor, db_connection = self.get_cursor()
-        try:
-            cursor.execute(query)
-            rows = cursor.fetchall()
-        finally:
-            cursor.close()
-            db_connection.close()
-            return rows
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+                return rows
 
     def query_with_values(self, query: str, values: tuple) -> list[tuple]:
         """
@@ -50,14 +71,14 @@ class DatabaseManager:
             All rows matching the query
         """
         rows = []
-        cursor, db_connection = self.get_cursor()
-        try:
-            cursor.execute(query, values)
-            rows = cursor.fetchall()
-        finally:
-            cursor.close()
-            db_connection.close()
-            return rows
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                cursor.execute(query, values)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+                return rows
 
     def query_and_commit(self, query: str) -> None:
         """
@@ -68,13 +89,13 @@ class DatabaseManager:
         Returns:
             None
         """
-        cursor, db_connection = self.get_cursor()
-        try:
-            cursor.execute(query)
-            db_connection.commit()
-        finally:
-            cursor.close()
-            db_connection.close()
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                cursor.execute(query)
+                db_connection.commit()
+            finally:
+                cursor.close()
 
     def query_and_commit_with_values(self, query: str, values: tuple) -> None:
         """
@@ -86,13 +107,13 @@ class DatabaseManager:
         Returns:
             None
         """
-        cursor, db_connection = self.get_cursor()
-        try:
-            cursor.execute(query, values)
-            db_connection.commit()
-        finally:
-            cursor.close()
-            db_connection.close()
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                cursor.execute(query, values)
+                db_connection.commit()
+            finally:
+                cursor.close()
 
     def query_and_commit_many(self, query: str, values: list[tuple]) -> None:
         """
@@ -104,14 +125,115 @@ class DatabaseManager:
         Returns:
             None
         """
-        cursor, db_connection = self.get_cursor()
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                cursor.executemany(query, values)
+                db_connection.commit()
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Hold the database exclusively: no other writers, and in WAL mode no readers either
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.read_write_lock is None:
+                yield
+            else:
+                with self.read_write_lock.writer:
+                    yield
+
+    def convert_to_incremental_vacuum(self) -> None:
+        """
+        Switch an existing database to incremental auto-vacuum, so pages freed by deletes can be returned to the
+        filesystem. Rebuilds the whole database file once, holding it exclusively. Does nothing if already converted
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        with self.exclusive():
+            with self.connection_pool.connection() as db_connection:
+                if db_connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # 2 is INCREMENTAL
+                    return
+                bt.logging.info(f"| {current_thread} | 🧹 Converting the database to incremental auto-vacuum, this rebuilds the file once")
+                start = time.perf_counter()
+                db_connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                db_connection.execute("VACUUM")
+                bt.logging.info(f"| {current_thread} | 🧹 Converted the database in {time.perf_counter() - start:.2f}s")
+
+    def get_lock_metrics(self) -> dict[str, dict[str, float]]:
+        """
+        Get wait time metrics for the database locks
+        Returns:
+            Map of lock name -> metrics
+        """
+        metrics = {'write': self.lock.metrics.snapshot()}
+        if self.read_write_lock is not None:
+            metrics['read'] = self.read_write_lock.read_metrics.snapshot()
+            metrics['exclusive'] = self.read_write_lock.write_metrics.snapshot()
+        return metrics
+
+    def log_lock_metrics(self) -> None:
+        """
+        Log wait time metrics for the database locks
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        for name, metrics in self.get_lock_metrics().items():
+            bt.logging.info(f"| {current_thread} | 🔐 Database {name} lock: {metrics}")
+
+    def _set_journal_mode(self) -> None:
+        """
+        Switch the database to WAL journaling, or back to the default rollback journal. Runs before any other connection exists.
+        New databases are also created with incremental auto-vacuum
+        Returns:
+            None
+        """
+        journal_mode = "WAL" if self.wal_mode else "DELETE"
+        db_connection = sqlite3.connect(self.db_path)
         try:
-            cursor.executemany(query, values)
-            db_connection.commit()
+            db_connection.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new database, see `convert_to_incremental_vacuum`
+            db_connection.execute(f"PRAGMA journal_mode={journal_mode}")
+        except sqlite3.OperationalError as e:
+            # Leaving WAL needs the only connection to the database, keep the current journal mode if it's busy
+            current_thread = threading.current_thread().name
+            bt.logging.warning(f"| {current_thread} | ❗ Failed to set journal mode to {journal_mode}: {e}")
         finally:
-            cursor.close()
             db_connection.close()
 
+    def close(self) -> None:
+        """
+        Close all pooled database connections
+        Returns:
+            None
+        """
+        self.connection_pool.close_all()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Run several statements in a single transaction. Commits if the block succeeds, otherwise rolls back
+        Returns:
+            A cursor on the calling thread's connection
+        """
+        with self.connection_pool.connection() as db_connection:
+            cursor = db_connection.cursor()
+            try:
+                if not db_connection.in_transaction:
+                    cursor.execute("BEGIN")
+                yield cursor
+                db_connection.commit()
+            except BaseException:
+                db_connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
     def get_cursor(self) -> Tuple[sqlite3.Cursor, sqlite3.Connection]:
         """
         Get a cursor and connection reference from the database
@@ -124,7 +246,7 @@ class DatabaseManager:
 
     def get_db_connection(self) -> sqlite3.Connection:
         """
-        Get a reference to the database
+        Get a new, unpooled reference to the database. The caller is responsible for closing it
         Returns:
             A database connection
         """
@@ -138,6 +260,19 @@ class DatabaseManager:
         """
         self.query_and_commit('DELETE FROM sales')
 
+    def delete_sales_before(self, min_date: str) -> None:
+        """
+        Delete sales older than the cutoff, along with any pending sales that point at them. Caller must hold the lock
+        Args:
+            min_date: ISO8601 cutoff
+
+        Returns:
+            None
+        """
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM sales WHERE sale_date < ?", (min_date,))
+            cursor.execute("DELETE FROM pending_sales WHERE nextplace_id NOT IN (SELECT nextplace_id FROM sales)")
+
     def delete_all_properties(self) -> None:
         """
         Delete all rows from the sales table
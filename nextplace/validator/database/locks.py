@@ -0,0 +1,192 @@
+import threading
+import time
+from dataclasses import dataclass
+
+"""
+Instrumented locks used to coordinate access to the SQLite database
+"""
+
+
+@dataclass
+class LockMetrics:
+    acquisitions: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record(self, wait_seconds: float, acquired: bool) -> None:
+        if not acquired:
+            self.timeouts += 1
+            return
+        self.acquisitions += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        average = self.total_wait_seconds / self.acquisitions if self.acquisitions > 0 else 0.0
+        return {
+            'acquisitions': self.acquisitions,
+            'timeouts': self.timeouts,
+            'total_wait_seconds': round(self.total_wait_seconds, 6),
+            'avg_wait_seconds': round(average, 6),
+            'max_wait_seconds': round(self.max_wait_seconds, 6),
+        }
+
+
+class InstrumentedLock:
+    """
+    Reentrant lock that records how long callers wait to acquire it
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._metrics_lock = threading.Lock()
+        self.metrics = LockMetrics()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        with self._metrics_lock:
+            self.metrics.record(time.perf_counter() - start, acquired)
+        return acquired
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class ReadWriteLock:
+    """
+    Readers share the lock, an exclusive holder waits for active readers and blocks new ones.
+    Readers are reentrant per thread, and the exclusive holder may also read.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: int or None = None  # Ident of the thread holding the lock exclusively
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+        self.read_metrics = LockMetrics()
+        self.write_metrics = LockMetrics()
+        self.reader = _ReaderSide(self)
+        self.writer = _WriterSide(self)
+
+    def _read_depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def acquire_read(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        ident = threading.get_ident()
+        with self._condition:
+            # Reentrant reads and reads by the exclusive holder never wait, otherwise let waiting writers go first
+            if self._read_depth() == 0 and self._writer != ident:
+                acquired = self._condition.wait_for(
+                    lambda: self._writer is None and self._waiting_writers == 0,
+                    timeout=self._wait_timeout(blocking, timeout)
+                )
+                if not acquired:
+                    self.read_metrics.record(time.perf_counter() - start, False)
+                    return False
+            self._readers += 1
+            self._local.depth = self._read_depth() + 1
+            self.read_metrics.record(time.perf_counter() - start, True)
+            return True
+
+    def release_read(self) -> None:
+        with self._condition:
+            self._readers -= 1
+            self._local.depth = self._read_depth() - 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer == ident:  # Reentrant
+                self._writer_depth += 1
+                self.write_metrics.record(0.0, True)
+                return True
+            self._waiting_writers += 1
+            try:
+                acquired = self._condition.wait_for(
+                    lambda: self._writer is None and self._readers == 0,
+                    timeout=self._wait_timeout(blocking, timeout)
+                )
+            finally:
+                self._waiting_writers -= 1
+            if not acquired:
+                self._condition.notify_all()  # Readers may have been held back by this waiter
+                self.write_metrics.record(time.perf_counter() - start, False)
+                return False
+            self._writer = ident
+            self._writer_depth = 1
+            self.write_metrics.record(time.perf_counter() - start, True)
+            return True
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @staticmethod
+    def _wait_timeout(blocking: bool, timeout: float) -> float or None:
+        if not blocking:
+            return 0
+        return None if timeout is None or timeout < 0 else timeout
+
+
+class _ReaderSide:
+    """
+    Lock-like view of the shared side of a ReadWriteLock
+    """
+
+    def __init__(self, rw_lock: ReadWriteLock):
+        self._rw_lock = rw_lock
+        self.metrics = rw_lock.read_metrics
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._rw_lock.acquire_read(blocking, timeout)
+
+    def release(self) -> None:
+        self._rw_lock.release_read()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class _WriterSide:
+    """
+    Lock-like view of the exclusive side of a ReadWriteLock
+    """
+
+    def __init__(self, rw_lock: ReadWriteLock):
+        self._rw_lock = rw_lock
+        self.metrics = rw_lock.write_metrics
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._rw_lock.acquire_write(blocking, timeout)
+
+    def release(self) -> None:
+        self._rw_lock.release_write()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,92 @@
+import sqlite3
+
+"""
+Helpers keep `miner_market_activity` in step with `predictions`: the latest prediction timestamp for each
+(miner, market) pair. Weight setting counts a miner's distinct markets from it instead of scanning `predictions`
+"""
+
+MARKET_ACTIVITY_WINDOW = '-5 days'  # A market counts toward a miner's coverage for 5 days after its latest prediction there
+
+# Upsert the latest timestamp of the matching predictions. Rows skipped by INSERT OR IGNORE keep their old
+# timestamp in `predictions`, so they don't count as new activity
+UPSERT_MARKET_ACTIVITY = '''
+    INSERT INTO miner_market_activity (miner_hotkey, market, last_prediction_timestamp)
+    SELECT miner_hotkey, market, MAX(prediction_timestamp)
+    FROM predictions
+    WHERE {condition} AND market IS NOT NULL
+    GROUP BY miner_hotkey, market
+    ON CONFLICT (miner_hotkey, market) DO UPDATE
+    SET last_prediction_timestamp = MAX(last_prediction_timestamp, excluded.last_prediction_timestamp)
+'''
+
+
+def record_activity_at_timestamp(cursor: sqlite3.Cursor, timestamp: str) -> None:
+    """
+    Record the activity of predictions written with `timestamp`. Uses the prediction_timestamp index
+    Args:
+        cursor: a cursor inside the transaction that wrote the predictions
+        timestamp: the prediction_timestamp of the written rows
+
+    Returns:
+        None
+    """
+    cursor.execute(UPSERT_MARKET_ACTIVITY.format(condition="prediction_timestamp = ?"), (timestamp,))
+
+
+def record_activity_since(cursor: sqlite3.Cursor, window: str = MARKET_ACTIVITY_WINDOW) -> None:
+    """
+    Record the activity of every prediction inside the window. Used to seed the table
+    Args:
+        cursor: a database cursor
+        window: SQLite datetime modifier for the start of the window
+
+    Returns:
+        None
+    """
+    cursor.execute(UPSERT_MARKET_ACTIVITY.format(condition="prediction_timestamp >= datetime('now', ?)"), (window,))
+
+
+def record_activity_for_hotkeys(cursor: sqlite3.Cursor, hotkeys_query: str, values: tuple = ()) -> None:
+    """
+    Record the activity of every prediction from a set of miners
+    Args:
+        cursor: a database cursor
+        hotkeys_query: a SELECT (or VALUES) returning the miner hotkeys
+        values: parameters bound to `hotkeys_query`
+
+    Returns:
+        None
+    """
+    cursor.execute(UPSERT_MARKET_ACTIVITY.format(condition=f"miner_hotkey IN ({hotkeys_query})"), values)
+
+
+def refresh_activity_for_hotkeys(cursor: sqlite3.Cursor, hotkeys: list[str]) -> None:
+    """
+    Recalculate the activity of a set of miners after some of their predictions were deleted, in one pass
+    over their remaining predictions
+    Args:
+        cursor: a cursor inside the transaction that deleted the predictions
+        hotkeys: the miners whose predictions were deleted
+
+    Returns:
+        None
+    """
+    if len(hotkeys) == 0:
+        return
+    values = tuple(hotkeys)
+    hotkeys_query = "VALUES " + ", ".join("(?)" for _ in values)
+    cursor.execute(f"DELETE FROM miner_market_activity WHERE miner_hotkey IN ({hotkeys_query})", values)
+    record_activity_for_hotkeys(cursor, hotkeys_query, values)
+
+
+def prune_activity(cursor: sqlite3.Cursor, window: str = MARKET_ACTIVITY_WINDOW) -> None:
+    """
+    Delete activity older than the window
+    Args:
+        cursor: a database cursor
+        window: SQLite datetime modifier for the start of the window
+
+    Returns:
+        None
+    """
+    cursor.execute("DELETE FROM miner_market_activity WHERE last_prediction_timestamp < datetime('now', ?)", (window,))
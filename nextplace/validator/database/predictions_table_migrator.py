@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+import bittensor as bt
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.miner_market_activity import record_activity_for_hotkeys
+
+"""
+Helper class moves rows from the legacy per-miner `predictions_<hotkey>` tables into the `predictions` table
+"""
+
+
+class PredictionsTableMigrator:
+
+    def __init__(self, database_manager: DatabaseManager):
+        self.database_manager = database_manager
+
+    def migrate(self) -> None:
+        """
+        RUN AT STARTUP, before the scoring thread and weight setting read `predictions`
+        Migrate every legacy table, one table per transaction
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        legacy_tables = self.get_legacy_tables()
+        if len(legacy_tables) == 0:
+            return
+
+        bt.logging.info(f"| {current_thread} | 🚚 Migrating {len(legacy_tables)} per-miner predictions tables into 'predictions'")
+        for idx, table_name in enumerate(legacy_tables):
+            try:
+                with self.database_manager.lock:
+                    migrated = self._migrate_table(table_name)
+                bt.logging.info(f"| {current_thread} | 🚚 Migrated {migrated} predictions from '{table_name}' ({idx + 1}/{len(legacy_tables)})")
+            except sqlite3.OperationalError as e:
+                bt.logging.warning(f"| {current_thread} | ❗ Failed to migrate '{table_name}': {e}")
+        bt.logging.info(f"| {current_thread} | 🚚 Finished migrating predictions tables")
+
+    def get_legacy_tables(self) -> list[str]:
+        """
+        Find the per-miner predictions tables that still exist
+        Returns:
+            List of legacy table names
+        """
+        query = """
+            SELECT name
+            FROM sqlite_master
+            WHERE type='table' AND name LIKE 'predictions\\_%' ESCAPE '\\'
+        """
+        with self.database_manager.read_lock:
+            results = self.database_manager.query(query)
+        return [row[0] for row in results]
+
+    def _migrate_table(self, table_name: str) -> int:
+        """
+        Copy a legacy table into `predictions` and drop it in the same transaction.
+        Rows already in `predictions` were ingested after the upgrade, so they win.
+        Sales the batch scorer already consumed are marked pending again, so the copied rows still get scored.
+        The miner's market activity is refreshed from the merged rows
+        Args:
+            table_name: the legacy table
+
+        Returns:
+            Number of rows copied
+        """
+        with self.database_manager.transaction() as cursor:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO predictions
+                (nextplace_id, miner_hotkey, predicted_sale_price, predicted_sale_date, prediction_timestamp, market)
+                SELECT nextplace_id, miner_hotkey, predicted_sale_price, predicted_sale_date, prediction_timestamp, market
+                FROM "{table_name}"
+            """)
+            migrated = cursor.rowcount
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO pending_sales (nextplace_id)
+                SELECT DISTINCT legacy.nextplace_id
+                FROM "{table_name}" AS legacy
+                JOIN sales ON sales.nextplace_id = legacy.nextplace_id
+            """)
+            record_activity_for_hotkeys(cursor, f'SELECT DISTINCT miner_hotkey FROM "{table_name}"')
+            cursor.execute(f'DROP TABLE "{table_name}"')
+        return migrated
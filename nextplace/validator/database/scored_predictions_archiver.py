@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+import bittensor as bt
+import numpy as np
+from nextplace.validator.database.database_manager import DatabaseManager
+
+"""
+Helper class moves expired scored predictions out of the database into compressed archive files, one directory
+per prediction date, then hands the freed pages back to the filesystem a few at a time
+"""
+
+ARCHIVE_DIRECTORY = 'data/archive/scored_predictions'
+RETENTION_DAYS = 21  # Scored predictions older than this leave the database
+ARCHIVE_CHUNK_SIZE = 10000  # Rows per transaction, bounds how long the lock is held
+INCREMENTAL_VACUUM_PAGES = 2000  # Pages returned to the filesystem after each chunk
+UNKNOWN_DATE_PARTITION = 'unknown'  # For timestamps SQLite can't parse
+
+# Column order of the archive files, and of the rows `read_archive` returns
+ARCHIVE_COLUMNS = (
+    'nextplace_id', 'market', 'miner_hotkey', 'predicted_sale_price', 'predicted_sale_date',
+    'prediction_timestamp', 'sale_price', 'sale_date', 'score_timestamp',
+)
+REAL_COLUMNS = {'predicted_sale_price', 'sale_price'}
+
+# Compared as julianday() so differently formatted timestamps expire together. Uses the expression index
+EXPIRED_ROWS_QUERY = f"""
+    SELECT rowid, COALESCE(date(prediction_timestamp), '{UNKNOWN_DATE_PARTITION}'), {', '.join(ARCHIVE_COLUMNS)}
+    FROM scored_predictions
+    WHERE julianday(prediction_timestamp) < julianday(?) OR julianday(prediction_timestamp) IS NULL
+    ORDER BY rowid
+    LIMIT ?
+"""
+
+
+class ScoredPredictionsArchiver:
+
+    def __init__(self, database_manager: DatabaseManager, directory: str = ARCHIVE_DIRECTORY, retention_days: int = RETENTION_DAYS, chunk_size: int = ARCHIVE_CHUNK_SIZE):
+        self.database_manager = database_manager
+        self.directory = directory
+        self.retention_days = retention_days
+        self.chunk_size = chunk_size
+
+    def archive_expired(self) -> int:
+        """
+        Archive and delete every scored prediction older than the retention window, one chunk per transaction.
+        Archive files are named after the rows they hold, so a chunk that is archived again after a crash
+        overwrites its own file instead of duplicating rows
+        Returns:
+            Number of rows archived
+        """
+        current_thread = threading.current_thread().name
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+        bt.logging.info(f"| {current_thread} | 🗄️ Archiving scored predictions older than {cutoff}")
+
+        start = time.perf_counter()
+        archived = 0
+        vacuumed_pages = 0
+        while True:
+            with self.database_manager.read_lock:
+                rows = self.database_manager.query_with_values(EXPIRED_ROWS_QUERY, (cutoff, self.chunk_size))
+            if len(rows) == 0:
+                break
+
+            rows_by_date: dict[str, list[tuple]] = {}
+            for row in rows:
+                rows_by_date.setdefault(row[1], []).append(row)
+            for partition, partition_rows in rows_by_date.items():
+                self._write_archive_file(partition, partition_rows)
+
+            # Files are on disk, now the rows can go
+            with self.database_manager.lock:
+                with self.database_manager.transaction() as cursor:
+                    cursor.executemany("DELETE FROM scored_predictions WHERE rowid = ?", [(row[0],) for row in rows])
+                vacuumed_pages += self._incremental_vacuum()
+            archived += len(rows)
+            if len(rows) < self.chunk_size:
+                break
+
+        elapsed = time.perf_counter() - start
+        bt.logging.info(f"| {current_thread} | 🗄️ Archived {archived} scored predictions in {elapsed:.2f}s, returned {vacuumed_pages} pages to the filesystem")
+        return archived
+
+    def _write_archive_file(self, partition: str, rows: list[tuple]) -> str:
+        """
+        Write rows to a compressed NPZ file in the partition's directory. Written to a temporary file, then renamed
+        Args:
+            partition: prediction date of the rows, YYYY-MM-DD
+            rows: rows of `EXPIRED_ROWS_QUERY`
+
+        Returns:
+            Path of the archive file
+        """
+        partition_directory = os.path.join(self.directory, partition)
+        os.makedirs(partition_directory, exist_ok=True)
+        # Rowids can be reused once the table empties, the checksum of the primary keys tells those chunks apart
+        keys_checksum = zlib.crc32('\n'.join(f"{row[2]}|{row[4]}" for row in rows).encode())
+        path = os.path.join(partition_directory, f"{rows[0][0]}-{rows[-1][0]}-{keys_checksum:08x}.npz")
+
+        arrays = {}
+        for idx, column in enumerate(ARCHIVE_COLUMNS):
+            values = [row[idx + 2] for row in rows]
+            is_null = np.array([value is None for value in values])
+            if column in REAL_COLUMNS:
+                arrays[column] = np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+            else:
+                arrays[column] = np.array(['' if value is None else str(value) for value in values], dtype=str)
+            if is_null.any():
+                arrays[f"{column}_is_null"] = is_null
+
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as archive_file:
+            np.savez_compressed(archive_file, **arrays)
+        os.replace(temporary_path, path)
+        return path
+
+    def _incremental_vacuum(self) -> int:
+        """
+        Return up to INCREMENTAL_VACUUM_PAGES free pages to the filesystem. Caller must hold the lock.
+        Databases created without incremental auto-vacuum keep their free pages for reuse instead
+        Returns:
+            Number of pages returned
+        """
+        with self.database_manager.connection_pool.connection() as db_connection:
+            if db_connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 is INCREMENTAL
+                return 0
+            free_pages = db_connection.execute("PRAGMA freelist_count").fetchone()[0]
+            # execute() steps the pragma once, which frees one page. executescript() runs it to completion
+            db_connection.executescript(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})")
+            return free_pages - db_connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def read_archive(directory: str = ARCHIVE_DIRECTORY, start_date: str or None = None, end_date: str or None = None) -> Iterator[tuple]:
+    """
+    Read archived scored predictions back, in `ARCHIVE_COLUMNS` order, for offline replay
+    Args:
+        directory: the archive directory
+        start_date: first prediction date to read, YYYY-MM-DD, inclusive
+        end_date: last prediction date to read, YYYY-MM-DD, inclusive
+
+    Returns:
+        Iterator over archived rows
+    """
+    if not os.path.isdir(directory):
+        return
+    for partition in sorted(os.listdir(directory)):
+        if (start_date is not None and partition < start_date) or (end_date is not None and partition > end_date):
+            continue
+        partition_directory = os.path.join(directory, partition)
+        names = [name for name in os.listdir(partition_directory) if name.endswith('.npz')]
+        for name in sorted(names, key=lambda file_name: int(file_name.split('-')[0])):  # Rowid order
+            with np.load(os.path.join(partition_directory, name)) as archive:
+                columns = []
+                for column in ARCHIVE_COLUMNS:
+                    values = archive[column].tolist()
+                    if f"{column}_is_null" in archive:
+                        values = [None if is_null else value for value, is_null in zip(values, archive[f"{column}_is_null"].tolist())]
+                    columns.append(values)
+            yield from zip(*columns)
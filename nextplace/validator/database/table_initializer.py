@@ -1,4 +1,5 @@
 from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.miner_market_activity import record_activity_since
 
 """
 Helper class to setup database tables, indices
@@ -17,9 +18,14 @@ class TableInitializer:
         """
         cursor, db_connection = self.database_manager.get_cursor()
         self._create_properties_table(cursor)
+        self._create_prebuilt_properties_table(cursor)
+        self._create_predictions_table(cursor)
         self._create_scored_predictions_table(cursor)
         self._create_sales_table(cursor)
+        self._create_pending_sales_table(cursor)
         self._create_daily_scores_table(cursor)
+        self._create_miner_market_activity_table(cursor)
+        self._create_miner_score_aggregates_table(cursor)
         db_connection.commit()
         cursor.close()
         db_connection.close()
@@ -45,6 +51,55 @@ class TableInitializer:
             CREATE INDEX IF NOT EXISTS idx_sale_date ON sales(sale_date)
         ''')
 
+    def _create_pending_sales_table(self, cursor) -> None:
+        """
+        Create the pending sales table, which holds sales that haven't been scored against predictions yet.
+        When the table is first created, every existing sale is pending
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            None
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='pending_sales'")
+        table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pending_sales (
+                nextplace_id TEXT PRIMARY KEY
+            )
+        ''')
+        if not table_exists:
+            cursor.execute('''
+                INSERT OR IGNORE INTO pending_sales (nextplace_id) SELECT nextplace_id FROM sales
+            ''')
+
+    def _create_predictions_table(self, cursor) -> None:
+        """
+        Create the predictions table, which holds unscored predictions for all miners
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            None
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS predictions (
+                nextplace_id TEXT,
+                miner_hotkey TEXT,
+                predicted_sale_price REAL,
+                predicted_sale_date TEXT,
+                prediction_timestamp TEXT,
+                market TEXT,
+                PRIMARY KEY (miner_hotkey, nextplace_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_predictions_nextplace_id ON predictions(nextplace_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_predictions_prediction_timestamp ON predictions(prediction_timestamp)
+        ''')
+
     def _create_scored_predictions_table(self, cursor) -> None:
         """
         Create the predictions table
@@ -74,6 +129,9 @@ class TableInitializer:
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_market ON scored_predictions(market)
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scored_predictions_julianday ON scored_predictions(julianday(prediction_timestamp))
+        ''')
 
     def _create_properties_table(self, cursor) -> None:
         """
@@ -109,6 +167,32 @@ class TableInitializer:
                 market TEXT
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_properties_market_query_date ON properties(market, query_date)
+        ''')
+
+    def _create_prebuilt_properties_table(self, cursor) -> None:
+        """
+        Create the prebuilt properties table, which holds the properties of synapses that are built but not sent yet.
+        Synapses built before a restart were never sent, so their properties go back into the properties table
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            None
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prebuilt_properties AS SELECT * FROM properties WHERE 0
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_prebuilt_properties_nextplace_id ON prebuilt_properties(nextplace_id)
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO properties SELECT * FROM prebuilt_properties
+        ''')
+        cursor.execute('''
+            DELETE FROM prebuilt_properties
+        ''')
 
     def _create_daily_scores_table(self, cursor) -> None:
         """
@@ -128,3 +212,65 @@ class TableInitializer:
                 PRIMARY KEY (miner_hotkey, date)
             )
         ''')
+
+    def _create_miner_market_activity_table(self, cursor) -> None:
+        """
+        Create the miner market activity table, which holds each miner's latest prediction timestamp per market.
+        When the table is first created, it is seeded from recent predictions
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            None
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='miner_market_activity'")
+        table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS miner_market_activity (
+                miner_hotkey TEXT,
+                market TEXT,
+                last_prediction_timestamp TEXT,
+                PRIMARY KEY (miner_hotkey, market)
+            )
+        ''')
+        if not table_exists:
+            record_activity_since(cursor)
+
+    def _create_miner_score_aggregates_table(self, cursor) -> None:
+        """
+        Create the miner score aggregates table, which holds each miner's score window aggregates as of a date.
+        Triggers mark a miner's row stale (NULL as_of_date) whenever its daily scores change, whoever changes them.
+        They delete, then insert, because an outer UPSERT would override an OR REPLACE inside the trigger.
+        When the table is first created, every miner with daily scores starts out stale
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            None
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='miner_score_aggregates'")
+        table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS miner_score_aggregates (
+                miner_hotkey TEXT PRIMARY KEY,
+                as_of_date DATE,
+                oldest_date DATE,
+                consistency_score_sum REAL,
+                consistency_predictions INTEGER,
+                past_score REAL,
+                past_total_weight INTEGER
+            )
+        ''')
+        for event, row in [('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')]:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS daily_scores_{event.lower()}_marks_aggregates_stale
+                AFTER {event} ON daily_scores
+                BEGIN
+                    DELETE FROM miner_score_aggregates WHERE miner_hotkey = {row}.miner_hotkey;
+                    INSERT INTO miner_score_aggregates (miner_hotkey) VALUES ({row}.miner_hotkey);
+                END
+            ''')
+        if not table_exists:
+            cursor.execute('''
+                INSERT INTO miner_score_aggregates (miner_hotkey) SELECT DISTINCT miner_hotkey FROM daily_scores
+            ''')
@@ -1,22 +1,29 @@
+import queue
 import bittensor as bt
 from nextplace.validator.api.properties_api import PropertiesAPI
+from nextplace.validator.api.token_bucket import TokenBucket
 from nextplace.validator.database.database_manager import DatabaseManager
 import threading
-from time import sleep
 
+from nextplace.validator.market.market_prefetcher import MarketPrefetcher, DEFAULT_PREFETCH_MARKETS
 from nextplace.validator.utils.contants import SYNAPSE_TIMEOUT, NUMBER_OF_PROPERTIES_PER_SYNAPSE
 
 """
 Helper class manages the real estate market
 """
 
+MIN_SYNAPSES_IN_TABLE = 5  # Start prefetching below this many synapses' worth of properties
+MAX_SYNAPSES_IN_TABLE = 10  # Stop starting new markets above this many
+PAGE_POLL_INTERVAL = 5  # Seconds to wait for a page before re-checking the table size
+
 
 class MarketManager:
 
-    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]]):
+    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]], prefetch_markets: int = DEFAULT_PREFETCH_MARKETS, token_bucket: TokenBucket or None = None):
         self.database_manager = database_manager
         self.markets = markets
-        self.properties_api = PropertiesAPI(database_manager, markets)
+        self.prefetch_markets = prefetch_markets
+        self.properties_api = PropertiesAPI(database_manager, markets, token_bucket=token_bucket)
 
     def _find_initial_market_index(self) -> int:
         """
@@ -55,32 +62,46 @@ class MarketManager:
     def ingest_properties(self) -> None:
         """
         RUN IN THREAD
-        Populate the properties table with properties
+        Populate the properties table with properties. Worker threads fetch the next markets while this thread
+        ingests pages as they arrive
         Returns:
             None
         """
         current_thread = threading.current_thread().name  # Get thread name
         market_index = self._find_initial_market_index()
-        
-        # Keep at least (x) synapses worth of properties in the table at all times
-        number_of_synapses = 5
-        min_properties_table_size = NUMBER_OF_PROPERTIES_PER_SYNAPSE * number_of_synapses
-        
-        while True:
-            
-            # Get size of properties table
-            with self.database_manager.lock:
-                size_of_properties_table = self.database_manager.get_size_of_table('properties')
-
-            bt.logging.info(f"| {current_thread} | {size_of_properties_table} items in property table")
-                
-            # If size is less than our min, get more properties
-            if size_of_properties_table < min_properties_table_size:
-                current_market = self.markets[market_index]  # Extract market object
-                self.properties_api.process_region_market(current_market)  # Populate database with this market
-                bt.logging.info(f"| {current_thread} | ✅ Finished ingesting properties in {current_market['name']}")
-                market_index = market_index + 1 if market_index < len(self.markets) - 1 else 0  # Wrap index around
-                
-            # If we're still good on size, just sleep until another synapse goes out
-            else:
-                sleep(SYNAPSE_TIMEOUT)
+
+        # Keep at least (x) synapses worth of properties in the table at all times, stop prefetching at (y)
+        min_properties_table_size = NUMBER_OF_PROPERTIES_PER_SYNAPSE * MIN_SYNAPSES_IN_TABLE
+        max_properties_table_size = NUMBER_OF_PROPERTIES_PER_SYNAPSE * MAX_SYNAPSES_IN_TABLE
+
+        prefetcher = MarketPrefetcher(self.properties_api, self.markets, market_index, number_of_workers=self.prefetch_markets)
+        prefetcher.start()
+        try:
+            while True:
+
+                # Get size of properties table
+                with self.database_manager.read_lock:
+                    size_of_properties_table = self.database_manager.get_size_of_table('properties')
+
+                # Backpressure: workers only start new markets while the table is low
+                if size_of_properties_table < min_properties_table_size and not prefetcher.demand.is_set():
+                    bt.logging.info(f"| {current_thread} | {size_of_properties_table} items in property table, prefetching markets")
+                    prefetcher.demand.set()
+                elif size_of_properties_table >= max_properties_table_size and prefetcher.demand.is_set():
+                    bt.logging.info(f"| {current_thread} | {size_of_properties_table} items in property table, pausing prefetch")
+                    prefetcher.demand.clear()
+
+                # Ingest the next page, or wait until another synapse goes out
+                timeout = PAGE_POLL_INTERVAL if prefetcher.demand.is_set() else SYNAPSE_TIMEOUT
+                try:
+                    market_name, homes = prefetcher.pages.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                if homes is None:  # Worker finished this market
+                    bt.logging.info(f"| {current_thread} | ✅ Finished ingesting properties in {market_name}")
+                    continue
+                self.properties_api.ingest_page(homes, market_name)  # Populate database with this page
+
+        finally:
+            prefetcher.stop()
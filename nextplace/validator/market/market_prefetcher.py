@@ -0,0 +1,102 @@
+import queue
+import threading
+import bittensor as bt
+from nextplace.validator.api.properties_api import PropertiesAPI
+
+"""
+Helper class fetches the next markets' properties on worker threads, ahead of ingestion
+"""
+
+DEFAULT_PREFETCH_MARKETS = 3  # Markets fetched at the same time
+DEFAULT_MAX_QUEUED_PAGES = 8  # Bounds memory to this many pages of API results
+QUEUE_POLL_INTERVAL = 1  # Seconds between checks of the stop flag while blocked
+
+
+class MarketPrefetcher:
+
+    def __init__(
+            self,
+            properties_api: PropertiesAPI,
+            markets: list[dict[str, str]],
+            start_index: int,
+            number_of_workers: int = DEFAULT_PREFETCH_MARKETS,
+            max_queued_pages: int = DEFAULT_MAX_QUEUED_PAGES
+    ):
+        self.properties_api = properties_api
+        self.markets = markets
+        self.number_of_workers = number_of_workers
+        self.pages: queue.Queue = queue.Queue(maxsize=max_queued_pages)  # (market name, homes), homes is None when a market is done
+        self.demand = threading.Event()  # Set while the properties table needs more properties
+        self._market_index = start_index
+        self._market_index_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """
+        Start the fetch workers
+        Returns:
+            None
+        """
+        for idx in range(self.number_of_workers):
+            worker = threading.Thread(target=self._run_worker, name=f"🏠 PropertiesPrefetch {idx} 🏠", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """
+        Stop the fetch workers. Workers finish their current request, then exit
+        Returns:
+            None
+        """
+        self._stopped.set()
+
+    def _next_market(self) -> dict[str, str]:
+        """
+        Claim the next market, wrapping around at the end of the list
+        Returns:
+            The market to fetch
+        """
+        with self._market_index_lock:
+            market = self.markets[self._market_index]
+            self._market_index = self._market_index + 1 if self._market_index < len(self.markets) - 1 else 0
+            return market
+
+    def _run_worker(self) -> None:
+        """
+        RUN IN THREAD
+        While there is demand, fetch a whole market and queue its pages
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        while not self._stopped.is_set():
+            if not self.demand.wait(timeout=QUEUE_POLL_INTERVAL):
+                continue
+            market = self._next_market()
+            bt.logging.info(f"| {current_thread} | 🔍 Prefetching properties in {market['name']}")
+            try:
+                for homes in self.properties_api.fetch_region_market_pages(market):
+                    if not self._put((market['name'], homes)):
+                        return
+            except Exception as e:
+                bt.logging.error(f"| {current_thread} | ❗Error prefetching properties in {market['name']}: {e}")
+            if not self._put((market['name'], None)):
+                return
+
+    def _put(self, item: tuple) -> bool:
+        """
+        Block until there is room in the queue
+        Args:
+            item: the item to queue
+
+        Returns:
+            True if the item was queued, False if the prefetcher was stopped
+        """
+        while not self._stopped.is_set():
+            try:
+                self.pages.put(item, timeout=QUEUE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -1,8 +1,7 @@
 import threading
 import bittensor as bt
 from nextplace.validator.database.database_manager import DatabaseManager
-from nextplace.validator.utils.contants import build_miner_predictions_table_name, \
-    get_miner_hotkeys_from_predictions_tables
+from nextplace.validator.utils.contants import get_miner_hotkeys_from_predictions
 
 
 class MinerManager:
@@ -21,14 +20,14 @@ class MinerManager:
 
         # Build sets
         metagraph_hotkeys = set(self.metagraph.hotkeys)  # Get hotkeys in metagraph
-        hotkeys_with_pred_tables = set(get_miner_hotkeys_from_predictions_tables(self.database_manager))
+        hotkeys_with_predictions = set(get_miner_hotkeys_from_predictions(self.database_manager))
 
         bt.logging.info(
-            f"| {current_thread} | Managing active miners. Found {len(hotkeys_with_pred_tables)} tracked miners and {len(metagraph_hotkeys)} metagraph hotkeys")
+            f"| {current_thread} | Managing active miners. Found {len(hotkeys_with_predictions)} tracked miners and {len(metagraph_hotkeys)} metagraph hotkeys")
 
         # Set operation
         deregistered_hotkeys = list(
-            hotkeys_with_pred_tables.difference(metagraph_hotkeys))  # Deregistered hotkeys are stored, but not in the metagraph
+            hotkeys_with_predictions.difference(metagraph_hotkeys))  # Deregistered hotkeys are stored, but not in the metagraph
 
         # If we have recently deregistered miners
         if len(deregistered_hotkeys) > 0:
@@ -37,13 +36,12 @@ class MinerManager:
             # For all deregistered miners, clear out their predictions & scores. Remove from active_miners table
             tuples = [(x,) for x in deregistered_hotkeys]
             with self.database_manager.lock:
-                # Drop predictions tables for deregistered miners
-                for hotkey in deregistered_hotkeys:
-                    table_name = build_miner_predictions_table_name(hotkey)
-                    self.database_manager.query_and_commit(f"DROP TABLE IF EXISTS '{table_name}'")
+                # Remove predictions for deregistered miners
+                self.database_manager.query_and_commit_many("DELETE FROM predictions WHERE miner_hotkey = ?", tuples)
                 self.database_manager.query_and_commit_many("DELETE FROM miner_scores WHERE miner_hotkey = ?", tuples)
                 self.database_manager.query_and_commit_many("DELETE FROM active_miners WHERE miner_hotkey = ?", tuples)
                 self.database_manager.query_and_commit_many("DELETE FROM daily_scores WHERE miner_hotkey = ?", tuples)
                 self.database_manager.query_and_commit_many("DELETE FROM scored_predictions WHERE miner_hotkey = ?", tuples)
+                self.database_manager.query_and_commit_many("DELETE FROM miner_market_activity WHERE miner_hotkey = ?", tuples)
 
         bt.logging.info(f"| {current_thread} | Thread terminating")
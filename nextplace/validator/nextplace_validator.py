@@ -1,45 +1,58 @@
+import asyncio
 import time
 import bittensor as bt
-from nextplace.protocol import RealEstateSynapse
+from nextplace.protocol import RealEstateSynapse, COLUMNAR_WIRE_FORMAT_VERSION
+from nextplace.validator.api.token_bucket import DEFAULT_REQUESTS_PER_SECOND, TokenBucket
 from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.predictions_table_migrator import PredictionsTableMigrator
 from nextplace.validator.database.table_initializer import TableInitializer
 from nextplace.validator.market.market_manager import MarketManager
+from nextplace.validator.market.market_prefetcher import DEFAULT_PREFETCH_MARKETS
 from nextplace.validator.market.markets import real_estate_markets
 from nextplace.validator.miner_manager.miner_manager import MinerManager
-from nextplace.validator.predictions.prediction_manager import PredictionManager
+from nextplace.validator.predictions.prediction_manager import PredictionBatch, PredictionManager
 from nextplace.validator.scoring.scoring import Scorer
 from nextplace.validator.synapse.synapse_manager import SynapseManager
+from nextplace.validator.synapse.wire_format_tracker import WireFormatTracker
 from nextplace.validator.setting_weights.weights import WeightSetter
 from nextplace.validator.utils.contants import SYNAPSE_TIMEOUT
 from nextplace.validator.website_data.active_prediction_sender import ActivePredictionSender
 from nextplace.validator.website_data.miner_score_sender import MinerScoreSender
+from nextplace.validator.website_data.prediction_feed import PredictionFeed, SPILL
+from nextplace.validator.website_data.website_outbox import WebsiteOutbox
 from template.base.validator import BaseValidatorNeuron
 import threading
-import queue
 
 PROPERTIES_THREAD_NAME = "🏠 PropertiesThread 🏠"
+STREAMING_FLUSH_ROWS = 25000  # While streaming, store collected predictions once this many are waiting
 
 
 class RealEstateValidator(BaseValidatorNeuron):
     def __init__(self, config=None):
         super(RealEstateValidator, self).__init__(config=config)
-        self.predictions_queue = queue.LifoQueue()
+        self.website_outbox = WebsiteOutbox(compress=self.config.website.gzip)
+        self.prediction_feed = PredictionFeed(overflow_policy=SPILL, spill_handler=self.website_outbox.enqueue_predictions)
 
         self.subtensor = bt.subtensor(config=self.config)
         self.markets = real_estate_markets
-        self.database_manager = DatabaseManager()
+        self.database_manager = DatabaseManager(wal_mode=self.config.database.wal)
         self.table_initializer = TableInitializer(self.database_manager)
         self.table_initializer.create_tables()  # Create database tables
-        self.market_manager = MarketManager(self.database_manager, self.markets)
-        self.scorer = Scorer(self.database_manager, self.markets, self.metagraph)
+        if self.config.database.incremental_vacuum:
+            self.database_manager.convert_to_incremental_vacuum()
+        self.predictions_table_migrator = PredictionsTableMigrator(self.database_manager)
+        self.api_token_bucket = TokenBucket(self.config.api.requests_per_second)  # One RapidAPI quota for properties and sales
+        self.market_manager = MarketManager(self.database_manager, self.markets, prefetch_markets=self.config.properties.prefetch_markets, token_bucket=self.api_token_bucket)
+        self.scorer = Scorer(self.database_manager, self.markets, self.metagraph, website_outbox=self.website_outbox, token_bucket=self.api_token_bucket)
         self.synapse_manager = SynapseManager(self.database_manager)
-        self.prediction_manager = PredictionManager(self.database_manager, self.metagraph, self.predictions_queue)
+        self.wire_format_tracker = WireFormatTracker()
+        self.prediction_manager = PredictionManager(self.database_manager, self.metagraph, self.prediction_feed)
         self.netuid = self.config.netuid
         self.should_step = True
         self.current_thread = threading.current_thread().name
         self.miner_manager = MinerManager(self.database_manager, self.metagraph)
-        self.miner_score_sender = MinerScoreSender(self.database_manager)
-        self.prediction_sender = ActivePredictionSender(self.predictions_queue)
+        self.miner_score_sender = MinerScoreSender(self.database_manager, website_outbox=self.website_outbox)
+        self.prediction_sender = ActivePredictionSender(self.prediction_feed, compress=self.config.website.gzip, website_outbox=self.website_outbox)
 
         self.weight_setter = WeightSetter(
             metagraph=self.metagraph,
@@ -49,6 +62,54 @@ class RealEstateValidator(BaseValidatorNeuron):
             database_manager=self.database_manager
         )
 
+    @classmethod
+    def add_args(cls, parser):
+        super().add_args(parser)
+        parser.add_argument(
+            "--database.wal",
+            action="store_true",
+            help="Use WAL journaling so database reads run alongside writes instead of waiting on the global lock.",
+            default=False,
+        )
+        parser.add_argument(
+            "--database.incremental_vacuum",
+            action="store_true",
+            help="Convert an existing database to incremental auto-vacuum on startup, so space freed by archiving old scored predictions is returned to the filesystem.",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--api.requests_per_second",
+            type=float,
+            help="Requests per second to the Redfin RapidAPI, shared by the properties prefetch workers and the sold homes fetcher.",
+            default=DEFAULT_REQUESTS_PER_SECOND,
+        )
+        parser.add_argument(
+            "--properties.prefetch_markets",
+            type=int,
+            help="Number of markets whose properties are fetched at the same time.",
+            default=DEFAULT_PREFETCH_MARKETS,
+        )
+
+        parser.add_argument(
+            "--synapse.columnar",
+            action="store_true",
+            help="Send the compact columnar synapse to miners that support it. Other miners keep getting the legacy format.",
+            default=False,
+        )
+        parser.add_argument(
+            "--synapse.streaming",
+            action="store_true",
+            help="Process each miner's response as soon as it arrives instead of waiting for every miner to reply.",
+            default=False,
+        )
+        parser.add_argument(
+            "--website.gzip",
+            action="store_true",
+            help="Gzip prediction batches and outbox uploads sent to the Nextplace website.",
+            default=False,
+        )
+
     def sync_metagraph(self):
         """Sync the metagraph with the latest state from the network"""
         bt.logging.info(f"| {self.current_thread} | 🔗 Syncing metagraph")
@@ -57,20 +118,15 @@ class RealEstateValidator(BaseValidatorNeuron):
 
     def check_timer_set_weights(self) -> None:
         """
-        Check weight setting timer. If time to set weights, try to acquire lock and set weights
+        Check weight setting timer. If time to set weights, sync the metagraph and set weights.
+        No database lock is held here: the weight setter takes the read lock around its own reads only,
+        so the metagraph sync and the set_weights call don't hold up the database writers
         Returns:
             None
         """
         if self.weight_setter.is_time_to_set_weights():
-            if not self.database_manager.lock.acquire(blocking=True, timeout=10):
-                # If the lock is held by another thread, wait for 10 seconds, if still not available, return
-                bt.logging.info(f"| {self.current_thread} | 🍃 Another thread is holding the database_manager lock. Will check timer and set weights later. This is expected behavior 😊.")
-                return
-            try:
-                self.sync_metagraph()
-                self.weight_setter.check_timer_set_weights()
-            finally:
-                self.database_manager.lock.release()
+            self.sync_metagraph()
+            self.weight_setter.check_timer_set_weights()
 
     def is_thread_running(self, thread_name: str):
         for thread in threading.enumerate():  # Get a list of all active threads
@@ -86,8 +142,7 @@ class RealEstateValidator(BaseValidatorNeuron):
         """
         bt.logging.info(f"| {self.current_thread} | ⏩ Running forward pass")
 
-        with self.database_manager.lock:
-            synapse: RealEstateSynapse or None = self.synapse_manager.get_synapse()  # Prepare data for miners
+        synapse: RealEstateSynapse or None = self.synapse_manager.get_synapse()  # Swap in the next prebuilt synapse
 
         if synapse is None or len(synapse.real_estate_predictions.predictions) == 0:  # No data in Properties table yet
             bt.logging.info(f"| {self.current_thread} | ↻ No data in Synapse. Waiting for PropertiesThread to update the Properties table.")
@@ -97,13 +152,125 @@ class RealEstateValidator(BaseValidatorNeuron):
         # Get list of all nextplace IDs in this synapse
         synapse_ids = set([x.nextplace_id for x in synapse.real_estate_predictions.predictions])
 
+        if self.config.synapse.streaming:
+            self._stream_responses(synapse, synapse_ids)
+            self.synapse_manager.mark_sent(synapse)
+            return
+
         # Query the metagraph
-        all_responses = self.dendrite.query(
-            axons=self.metagraph.axons,
-            synapse=synapse,
-            deserialize=True,
-            timeout=SYNAPSE_TIMEOUT
-        )
+        start = time.perf_counter()
+        if self.config.synapse.columnar:
+            all_responses = self._query_with_negotiated_format(synapse)
+        else:
+            all_responses = self.dendrite.query(
+                axons=self.metagraph.axons,
+                synapse=synapse,
+                deserialize=False,
+                timeout=SYNAPSE_TIMEOUT
+            )
+        query_seconds = time.perf_counter() - start
+        self.synapse_manager.mark_sent(synapse)  # Its properties leave the database now that miners have them
+
+        # Read only the fields we need out of each response
+        start = time.perf_counter()
+        prediction_records = [response.get_prediction_records() for response in all_responses]
+        extract_seconds = time.perf_counter() - start
 
         # Handle responses
-        self.prediction_manager.process_predictions(all_responses, synapse_ids)
+        start = time.perf_counter()
+        self.prediction_manager.process_predictions(prediction_records, synapse_ids)
+        process_seconds = time.perf_counter() - start
+        number_of_records = sum(len(records) for records in prediction_records)
+        bt.logging.info(f"| {self.current_thread} | ⏱️ Queried miners in {query_seconds:.2f}s, extracted {number_of_records} predictions in {extract_seconds:.3f}s, processed them in {process_seconds:.2f}s")
+
+    def _stream_responses(self, synapse: RealEstateSynapse, synapse_ids: set[str]) -> None:
+        """
+        Query every miner, and process each response as soon as it arrives.
+        Predictions are stored on a worker thread whenever enough are waiting, and once more after the last response
+        Args:
+            synapse: the legacy synapse
+            synapse_ids: nextplace IDs in the synapse
+
+        Returns:
+            None
+        """
+        hotkeys = list(self.metagraph.hotkeys)
+        axons = self.metagraph.axons
+        uid_synapses = [synapse] * len(axons)
+        if self.config.synapse.columnar:
+            columnar_synapse = RealEstateSynapse.create(real_estate_predictions=synapse.real_estate_predictions, wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+            for uid in self.wire_format_tracker.split_uids(hotkeys)[1]:
+                uid_synapses[uid] = columnar_synapse
+
+        batch = self.prediction_manager.start_batch()
+        start = time.perf_counter()
+
+        async def query_axon(uid: int) -> tuple[int, RealEstateSynapse]:
+            response = await self.dendrite.call(target_axon=axons[uid], synapse=uid_synapses[uid].model_copy(), timeout=SYNAPSE_TIMEOUT, deserialize=False)
+            return uid, response
+
+        async def flush(rows: PredictionBatch) -> int:
+            # The SQLite write blocks, so run it on a worker thread while the loop keeps receiving responses
+            committed = await asyncio.get_running_loop().run_in_executor(None, self.prediction_manager.ingest_batch, rows)
+            if not committed:
+                batch.put_back(rows)  # Retried with the next flush
+            return committed
+
+        async def stream_all() -> tuple[int, int, float]:
+            number_of_records = 0
+            commits = 0
+            last_response_seconds = 0.0
+            pending_flush = None  # One flush at a time, so rows are committed in arrival order
+            for next_response in asyncio.as_completed([query_axon(uid) for uid in range(len(axons))]):
+                uid, response = await next_response
+                last_response_seconds = time.perf_counter() - start
+                if self.config.synapse.columnar:
+                    self.wire_format_tracker.record(hotkeys[uid], response)
+                prediction_records = response.get_prediction_records()
+                number_of_records += len(prediction_records)
+                self.prediction_manager.add_miner_predictions(batch, hotkeys[uid], prediction_records, synapse_ids)
+                if len(batch) >= STREAMING_FLUSH_ROWS and (pending_flush is None or pending_flush.done()):
+                    if pending_flush is not None:
+                        commits += pending_flush.result()
+                    pending_flush = asyncio.ensure_future(flush(batch.take()))
+            if pending_flush is not None:
+                commits += await pending_flush
+            commits += await flush(batch.take())
+            return number_of_records, commits, last_response_seconds
+
+        # Run on the dendrite's event loop, like `dendrite.query`
+        bt.logging.info(f"| {self.current_thread} | 📡 Streaming responses from {len(axons)} miners")
+        number_of_records, commits, last_response_seconds = asyncio.get_event_loop().run_until_complete(stream_all())
+        total_seconds = time.perf_counter() - start
+        bt.logging.info(f"| {self.current_thread} | ⏱️ Streamed {number_of_records} predictions in {total_seconds:.2f}s with {commits} commits. Last response arrived after {last_response_seconds:.2f}s")
+
+    def _query_with_negotiated_format(self, synapse: RealEstateSynapse) -> list[RealEstateSynapse]:
+        """
+        Send the columnar synapse to miners that advertised support for it, and the legacy synapse to everyone else
+        Args:
+            synapse: the legacy synapse
+
+        Returns:
+            Response synapses, aligned to the metagraph UIDs
+        """
+        hotkeys = self.metagraph.hotkeys
+        axons = self.metagraph.axons
+        legacy_uids, columnar_uids = self.wire_format_tracker.split_uids(hotkeys)
+        columnar_synapse = RealEstateSynapse.create(real_estate_predictions=synapse.real_estate_predictions, wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+        bt.logging.info(f"| {self.current_thread} | 🗜️ Sending {len(columnar_uids)} columnar and {len(legacy_uids)} legacy synapses")
+
+        async def query_all() -> list[list[RealEstateSynapse]]:
+            queries = []
+            for uids, uid_synapse in [(legacy_uids, synapse), (columnar_uids, columnar_synapse)]:
+                if len(uids) > 0:
+                    queries.append(self.dendrite.forward(axons=[axons[uid] for uid in uids], synapse=uid_synapse, deserialize=False, timeout=SYNAPSE_TIMEOUT))
+            return await asyncio.gather(*queries)
+
+        # Run on the dendrite's event loop, like `dendrite.query`
+        results = asyncio.get_event_loop().run_until_complete(query_all())
+        responses_by_uid = {}
+        for uids, responses in zip([uids for uids in [legacy_uids, columnar_uids] if len(uids) > 0], results):
+            for uid, response in zip(uids, responses):
+                self.wire_format_tracker.record(hotkeys[uid], response)
+                responses_by_uid[uid] = response
+        return [responses_by_uid[uid] for uid in range(len(axons))]
@@ -1,11 +1,15 @@
+import sqlite3
 import threading
+import time
+from dataclasses import dataclass, field
 from typing import List
 import bittensor as bt
 from datetime import datetime, timezone
-from nextplace.protocol import RealEstatePredictions
-from nextplace.validator.utils.contants import ISO8601, build_miner_predictions_table_name
+from nextplace.protocol import PredictionRecord
+from nextplace.validator.utils.contants import ISO8601
 from nextplace.validator.database.database_manager import DatabaseManager
-import queue
+from nextplace.validator.database.miner_market_activity import prune_activity, record_activity_at_timestamp
+from nextplace.validator.website_data.prediction_feed import PredictionFeed, WebsitePrediction
 
 """
 Helper class manages processing predictions from Miners
@@ -13,19 +17,86 @@ Helper class manages processing predictions from Miners
 
 BATCH_SIZE = 10000
 
+# Prepared once, the connection's statement cache reuses them for every row
+IGNORE_POLICY_INSERT = '''
+    INSERT OR IGNORE INTO predictions
+    (nextplace_id, miner_hotkey, predicted_sale_price, predicted_sale_date, prediction_timestamp, market)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+REPLACE_POLICY_INSERT = '''
+    INSERT OR REPLACE INTO predictions
+    (nextplace_id, miner_hotkey, predicted_sale_price, predicted_sale_date, prediction_timestamp, market)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+@dataclass
+class MinerPredictions:
+    """
+    One miner's predictions in a batch, stored together or not at all
+    """
+    ignore_policy_values: list[tuple] = field(default_factory=list)
+    replace_policy_values: list[tuple] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ignore_policy_values) + len(self.replace_policy_values)
+
+    def extend(self, other: 'MinerPredictions') -> None:
+        self.ignore_policy_values.extend(other.ignore_policy_values)
+        self.replace_policy_values.extend(other.replace_policy_values)
+
+
+@dataclass
+class PredictionBatch:
+    """
+    Predictions collected from miner responses, waiting to be stored
+    """
+    timestamp: str  # Stored with each prediction
+    prediction_date_iso: str  # Sent to the web server with each prediction
+    predicted_sale_dates_iso: dict[str, str or None] = field(default_factory=dict)  # Predicted sale date -> website format
+    predictions_by_miner: dict[str, MinerPredictions] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(miner_predictions) for miner_predictions in self.predictions_by_miner.values())
+
+    def take(self) -> 'PredictionBatch':
+        """
+        Move the collected rows into a new batch with the same timestamps, so they can be stored on another thread
+        while this batch keeps collecting
+        Returns:
+            A batch holding the rows collected so far
+        """
+        taken = PredictionBatch(self.timestamp, self.prediction_date_iso, self.predicted_sale_dates_iso, self.predictions_by_miner)
+        self.predictions_by_miner = {}
+        return taken
+
+    def put_back(self, other: 'PredictionBatch') -> None:
+        """
+        Return rows that failed to store. They go ahead of the rows collected since
+        Args:
+            other: a batch from `take`
+
+        Returns:
+            None
+        """
+        for miner_hotkey, miner_predictions in other.predictions_by_miner.items():
+            miner_predictions.extend(self.predictions_by_miner.get(miner_hotkey, MinerPredictions()))
+            self.predictions_by_miner[miner_hotkey] = miner_predictions
+        other.predictions_by_miner = {}
+
 
 class PredictionManager:
 
-    def __init__(self, database_manager: DatabaseManager, metagraph, predictions_queue: queue.LifoQueue):
+    def __init__(self, database_manager: DatabaseManager, metagraph, prediction_feed: PredictionFeed):
         self.database_manager = database_manager
         self.metagraph = metagraph
-        self.predictions_queue = predictions_queue
+        self.prediction_feed = prediction_feed
 
-    def process_predictions(self, responses: List[RealEstatePredictions], valid_synapse_ids: set[str]) -> None:
+    def process_predictions(self, responses: List[List[PredictionRecord]], valid_synapse_ids: set[str]) -> None:
         """
         Process predictions from the Miners
         Args:
-            responses (list): list of synapses from Miners
+            responses (list): prediction records from each Miner, aligned to the metagraph UIDs
             valid_synapse_ids (set): set of valid synapse ids
 
         Returns:
@@ -39,127 +110,178 @@ class PredictionManager:
             bt.logging.info(f'| {current_thread} | ❗No responses received')
             return
 
-        current_utc_datetime = datetime.now(timezone.utc)
-        timestamp = current_utc_datetime.strftime(ISO8601)
+        # Collect every miner's predictions, then store them in a single transaction
+        hotkeys = self.metagraph.hotkeys
+        batch = self.start_batch()
+        for idx, prediction_records in enumerate(responses):  # Iterate responses
+            miner_hotkey = hotkeys[idx] if idx < len(hotkeys) else None
+            self.add_miner_predictions(batch, miner_hotkey, prediction_records, valid_synapse_ids)
+        if not self.ingest_batch(batch) and len(batch) > 0:
+            self.ingest_batch(batch)  # The batch kept its rows, try once more
+
+    def start_batch(self) -> PredictionBatch:
+        """
+        Start collecting predictions for one forward pass. Every prediction in the batch shares its timestamps
+        Returns:
+            An empty batch
+        """
+        timestamp = datetime.now(timezone.utc).strftime(ISO8601)
+        prediction_date_iso = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        return PredictionBatch(timestamp=timestamp, prediction_date_iso=prediction_date_iso)
+
+    def add_miner_predictions(self, batch: PredictionBatch, miner_hotkey: str or None, prediction_records: List[PredictionRecord], valid_synapse_ids: set[str]) -> None:
+        """
+        Validate a miner's predictions, queue them for the web server and add them to the batch
+        Args:
+            batch: the batch being collected
+            miner_hotkey: the miner's hotkey
+            prediction_records: prediction records from the miner's response
+            valid_synapse_ids: set of valid synapse ids
 
-        prediction_date = datetime.utcnow()
-        prediction_date_iso = prediction_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        website_predictions: list[WebsitePrediction] = []
+        try:
+            if miner_hotkey is None:
+                bt.logging.info(f" | {current_thread} | ❗ Failed to find miner_hotkey while processing predictions")
+                return
+            miner_predictions = batch.predictions_by_miner.setdefault(miner_hotkey, MinerPredictions())
 
-        for idx, real_estate_predictions in enumerate(responses):  # Iterate responses
+            for prediction in prediction_records:  # Iterate predictions in each response
 
-            try:
-                miner_hotkey = self.metagraph.hotkeys[idx]
+                # Ignore predictions for houses not affiliated with this synapse
+                if prediction.nextplace_id not in valid_synapse_ids:
+                    bt.logging.info(f"| {current_thread} | 🐝 Found invalid nextplace_id for miner: '{miner_hotkey}'")
+                    continue
 
-                if miner_hotkey is None:
-                    bt.logging.info(f" | {current_thread} | ❗ Failed to find miner_hotkey while processing predictions")
+                # Only process valid predictions
+                if prediction is None or prediction.predicted_sale_price is None or prediction.predicted_sale_date is None:
                     continue
 
-                table_name = build_miner_predictions_table_name(miner_hotkey)
-                replace_policy_data_for_ingestion: list[tuple] = []
-                ignore_policy_data_for_ingestion: list[tuple] = []
-
-                for prediction in real_estate_predictions.predictions:  # Iterate predictions in each response
-
-                    # Ignore predictions for houses not affiliated with this synapse
-                    if prediction.nextplace_id not in valid_synapse_ids:
-                        bt.logging.info(f"| {current_thread} | 🐝 Found invalid nextplace_id for miner: '{miner_hotkey}'")
-                        continue
-
-                    # Only process valid predictions
-                    if prediction is None or prediction.predicted_sale_price is None or prediction.predicted_sale_date is None:
-                        continue
-
-                    # Format data for web server
-                    try:
-                        # Format predicted sale price
-                        predicted_sale_date_parsed = self.parse_iso_datetime(prediction.predicted_sale_date)
-                        if predicted_sale_date_parsed is not None:
-                            predicted_sale_date_iso = predicted_sale_date_parsed.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-
-                            # Build data object
-                            data_dict = {
-                                "nextplaceId": prediction.nextplace_id,
-                                "minerHotKey": miner_hotkey,
-                                "minerColdKey": "DummyColdKey",
-                                "predictionScore": -1,  # ToDo We should probably set this to `None` to indicate that it has not been scored yet, but need to update web server first
-                                "predictionDate": prediction_date_iso,
-                                "predictedSalePrice": prediction.predicted_sale_price,
-                                "predictedSaleDate": predicted_sale_date_iso,
-                            }
-                            self.predictions_queue.put(data_dict)  # Store formatted data
-                    except Exception as e:
-                        bt.logging.info(f"| {current_thread} | ❗Failed to build data for web server: {e}")
-
-                    values = (
-                        prediction.nextplace_id,
-                        miner_hotkey,
-                        prediction.predicted_sale_price,
-                        prediction.predicted_sale_date,
-                        timestamp,
-                        prediction.market,
-                    )
-
-                    # Parse force update flag
-                    if prediction.force_update_past_predictions:
-                        replace_policy_data_for_ingestion.append(values)
-                    else:
-                        ignore_policy_data_for_ingestion.append(values)
-
-                # Store predictions in the database
-                self._create_table_if_not_exists(table_name)
-                if len(ignore_policy_data_for_ingestion) > 0:
-                    self._handle_ingestion('IGNORE', ignore_policy_data_for_ingestion, table_name)
-                if len(replace_policy_data_for_ingestion) > 0:
-                    self._handle_ingestion('REPLACE', replace_policy_data_for_ingestion, table_name)
-
-            except Exception as e:
-                bt.logging.info(f"| {current_thread} | ❗Failed to process miner's predictions: {e}")
-
-    def _create_table_if_not_exists(self, table_name: str) -> None:
-        """
-        Create the predictions table for this miner if it doesn't exist
+                # Format data for web server
+                try:
+                    # Format predicted sale date. Miners predict few distinct dates, so format each one once
+                    predicted_sale_date_iso = batch.predicted_sale_dates_iso.get(prediction.predicted_sale_date, '')
+                    if predicted_sale_date_iso == '':
+                        predicted_sale_date_iso = self._format_predicted_sale_date(prediction.predicted_sale_date)
+                        batch.predicted_sale_dates_iso[prediction.predicted_sale_date] = predicted_sale_date_iso
+                    if predicted_sale_date_iso is not None:
+
+                        website_predictions.append(WebsitePrediction(
+                            prediction.nextplace_id,
+                            miner_hotkey,
+                            prediction.predicted_sale_price,
+                            predicted_sale_date_iso,
+                            batch.prediction_date_iso,
+                        ))
+                except Exception as e:
+                    bt.logging.info(f"| {current_thread} | ❗Failed to build data for web server: {e}")
+
+                values = (
+                    prediction.nextplace_id,
+                    miner_hotkey,
+                    prediction.predicted_sale_price,
+                    prediction.predicted_sale_date,
+                    batch.timestamp,
+                    prediction.market,
+                )
+
+                # Parse force update flag
+                if prediction.force_update_past_predictions:
+                    miner_predictions.replace_policy_values.append(values)
+                else:
+                    miner_predictions.ignore_policy_values.append(values)
+
+        except Exception as e:
+            bt.logging.info(f"| {current_thread} | ❗Failed to process miner's predictions: {e}")
+        finally:
+            if len(website_predictions) > 0:
+                self.prediction_feed.put_many(website_predictions)  # One lock round trip per miner
+
+    def ingest_batch(self, batch: PredictionBatch) -> bool:
+        """
+        Store the batch's predictions in one transaction, then empty the batch.
+        Each miner's rows go in under a savepoint, so a miner whose rows fail is rolled back on its own and
+        the other miners are still stored. If the transaction itself fails, the rows are put back in the batch
+        for the next call. Miner market activity is updated in the same transaction
         Args:
-            table_name: miner's table name
+            batch: the batch to store
 
         Returns:
-            None
+            True if a transaction was committed
         """
-        create_str = f"""
-                    CREATE TABLE IF NOT EXISTS {table_name} (
-                        nextplace_id TEXT,
-                        miner_hotkey TEXT,
-                        predicted_sale_price REAL,
-                        predicted_sale_date TEXT,
-                        prediction_timestamp TEXT,
-                        market TEXT,
-                        PRIMARY KEY (nextplace_id, miner_hotkey)
-                    )
-                """
-        idx_str = f"CREATE INDEX IF NOT EXISTS idx_prediction_timestamp ON {table_name}(prediction_timestamp)"
-        idx_str_market = f"CREATE INDEX IF NOT EXISTS idx_market ON {table_name}(market)"
-        with self.database_manager.lock:
-            self.database_manager.query_and_commit(create_str)
-            self.database_manager.query_and_commit(idx_str)
-            self.database_manager.query_and_commit(idx_str_market)
-
-    def _handle_ingestion(self, conflict_policy: str, values: list[tuple], table_name: str) -> None:
-        """
-        Ingest predictions for a miner
+        current_thread = threading.current_thread().name
+        rows = batch.take()
+        number_of_rows = len(rows)
+        if number_of_rows == 0:
+            bt.logging.info(f"| {current_thread} | 💾 No predictions to store")
+            return False
+
+        start = time.perf_counter()
+        failed_rows = 0
+        try:
+            with self.database_manager.lock:
+                with self.database_manager.transaction() as cursor:
+                    for miner_hotkey, miner_predictions in rows.predictions_by_miner.items():
+                        failed_rows += self._insert_miner_predictions(cursor, miner_hotkey, miner_predictions)
+                    record_activity_at_timestamp(cursor, batch.timestamp)
+                    prune_activity(cursor)
+        except Exception as e:
+            bt.logging.error(f"| {current_thread} | ❗Failed to store {number_of_rows} predictions, keeping them for the next attempt: {e}")
+            batch.put_back(rows)
+            return False
+        elapsed = time.perf_counter() - start
+        number_of_rows -= failed_rows
+        rows_per_second = number_of_rows / elapsed if elapsed > 0 else float('inf')
+        bt.logging.info(f"| {current_thread} | 💾 Stored {number_of_rows} predictions with 1 commit in {elapsed:.2f}s ({rows_per_second:,.0f} rows/s)")
+        return True
+
+    @staticmethod
+    def _insert_miner_predictions(cursor: sqlite3.Cursor, miner_hotkey: str, miner_predictions: MinerPredictions) -> int:
+        """
+        Insert one miner's predictions under a savepoint. IGNORE rows go before REPLACE rows, like the miner's
+        response would be applied row by row, since rows are keyed by miner.
+        Operational errors, like "database is locked", fail the whole transaction instead
         Args:
-            conflict_policy: to ignore new predictions or replace existing predictions
-            values: prediction data
-            table_name: the miner's prediction table
+            cursor: a cursor inside the batch transaction
+            miner_hotkey: the miner's hotkey
+            miner_predictions: the miner's rows
 
         Returns:
-            None
+            Number of rows that were rolled back
         """
-        query_str = f"""
-            INSERT OR {conflict_policy} INTO {table_name} 
-            (nextplace_id, miner_hotkey, predicted_sale_price, predicted_sale_date, prediction_timestamp, market)
-            VALUES (?, ?, ?, ?, ?, ?)
+        cursor.execute("SAVEPOINT miner_predictions")
+        try:
+            if len(miner_predictions.ignore_policy_values) > 0:
+                cursor.executemany(IGNORE_POLICY_INSERT, miner_predictions.ignore_policy_values)
+            if len(miner_predictions.replace_policy_values) > 0:
+                cursor.executemany(REPLACE_POLICY_INSERT, miner_predictions.replace_policy_values)
+        except sqlite3.OperationalError:
+            raise
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT miner_predictions")
+            cursor.execute("RELEASE SAVEPOINT miner_predictions")
+            current_thread = threading.current_thread().name
+            bt.logging.warning(f"| {current_thread} | ❗Failed to store {len(miner_predictions)} predictions for miner '{miner_hotkey}': {e}")
+            return len(miner_predictions)
+        cursor.execute("RELEASE SAVEPOINT miner_predictions")
+        return 0
+
+    def _format_predicted_sale_date(self, predicted_sale_date: str) -> str or None:
+        """
+        Format a predicted sale date for the web server
+        Args:
+            predicted_sale_date: the date the miner sent
+
+        Returns:
+            The formatted date, or None if it can't be parsed
         """
-        with self.database_manager.lock:
-            self.database_manager.query_and_commit_many(query_str, values)
+        predicted_sale_date_parsed = self.parse_iso_datetime(predicted_sale_date)
+        if predicted_sale_date_parsed is None:
+            return None
+        return predicted_sale_date_parsed.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
 
     def parse_iso_datetime(self, datetime_str: str) -> datetime or None:
         """
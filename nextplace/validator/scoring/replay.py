@@ -0,0 +1,259 @@
+import argparse
+import csv
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Iterator
+import numpy as np
+from nextplace.validator.database.scored_predictions_archiver import ARCHIVE_COLUMNS, ARCHIVE_DIRECTORY, read_archive
+from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+from nextplace.validator.setting_weights.tiered_weights import MIDDLE_TIER_FRACTION, TIER_SHARES, TOP_TIER_FRACTION, calculate_weight_vector
+
+"""
+Offline scoring replay. Loads daily scores, or rebuilds them from archived scored predictions, then scores every
+miner and calculates weights for each day of the history, the way TimeGatedScorer and WeightSetter would have.
+Hyperparameters can be overridden to see how scores and weights would have moved.
+
+    python -m nextplace.validator.scoring.replay --database data/validator_v1.db --output weights.csv
+
+The market coverage penalty is not replayed, the unscored predictions it counts aren't kept
+"""
+
+DATABASE_PATH = 'data/validator_v1.db'
+REDUCTION_HOTKEY = 'reduction'  # Stands in for the dilution reduction UID in the output
+TOP_MINERS_TO_PRINT = 10
+
+
+@dataclass
+class ReplayParameters:
+    consistency_window_duration: int = 5  # TimeGatedScorer defaults
+    min_consistency_window_percent: float = 51.0
+    score_date_cutoff: int = 21
+    top_tier_fraction: float = TOP_TIER_FRACTION  # WeightSetter defaults
+    middle_tier_fraction: float = MIDDLE_TIER_FRACTION
+    tier_shares: tuple[float, float, float] = TIER_SHARES
+
+
+@dataclass
+class ReplayResult:
+    dates: list[date]
+    hotkeys: list[str]
+    scores: np.ndarray  # Days x miners
+    weights: np.ndarray  # Days x miners
+    reduction_weights: np.ndarray  # Weight left for the dilution reduction UID, per day
+    active: np.ndarray  # Days x miners, True where the miner had daily scores in the score window
+
+    def write_csv(self, path: str) -> None:
+        """
+        Write the weight trajectories as one row per active miner per day, plus the reduction weight
+        Args:
+            path: the CSV file to write
+
+        Returns:
+            None
+        """
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['date', 'miner_hotkey', 'score', 'weight'])
+            for day_idx, day in enumerate(self.dates):
+                day_str = day.strftime("%Y-%m-%d")
+                for miner_idx in np.flatnonzero(self.active[day_idx]).tolist():
+                    writer.writerow([day_str, self.hotkeys[miner_idx], repr(float(self.scores[day_idx, miner_idx])), repr(float(self.weights[day_idx, miner_idx]))])
+                writer.writerow([day_str, REDUCTION_HOTKEY, '', repr(float(self.reduction_weights[day_idx]))])
+
+
+class ScoringReplay:
+
+    def __init__(self, daily_scores: Iterable[tuple]):
+        """
+        Args:
+            daily_scores: (miner_hotkey, date, score, total_predictions) rows, like the daily_scores table
+        """
+        rows = list(daily_scores)
+        miner_hotkeys, dates, scores, total_predictions = zip(*rows) if len(rows) > 0 else ((), (), (), ())
+        hotkeys, miner_idx = np.unique(np.array(miner_hotkeys, dtype=str), return_inverse=True)
+        days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+
+        # Day order, so each day's score window is a slice. Each miner's rows stay in date order,
+        # so its sums accumulate in the same order as scoring from DAILY_SCORES_WINDOW_QUERY
+        order = np.lexsort((miner_idx, days))
+        self.hotkeys: list[str] = hotkeys.tolist()
+        self.miner_idx = miner_idx[order]
+        self.days = days[order]
+        self.daily_scores = np.array(scores, dtype=np.float64)[order]
+        self.total_predictions = np.array(total_predictions, dtype=np.int64)[order]
+        self.first_days = np.full(len(self.hotkeys), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(self.first_days, self.miner_idx, self.days)
+
+    def run(self, parameters: ReplayParameters = None, start_date: date = None, end_date: date = None) -> ReplayResult:
+        """
+        Score every miner and calculate weights for each day from `start_date` to `end_date`, using only
+        the daily scores recorded up to that day
+        Args:
+            parameters: hyperparameters to replay with
+            start_date: first day to replay, defaults to the first day with daily scores
+            end_date: last day to replay, defaults to the last day with daily scores
+
+        Returns:
+            Scores and weights per day
+        """
+        parameters = parameters or ReplayParameters()
+        time_gated_scorer = TimeGatedScorer(None)
+        time_gated_scorer.consistency_window_duration = parameters.consistency_window_duration
+        time_gated_scorer.min_consistency_window_percent = parameters.min_consistency_window_percent
+        time_gated_scorer.score_date_cutoff = parameters.score_date_cutoff
+
+        number_of_miners = len(self.hotkeys)
+        if len(self.days) == 0 and (start_date is None or end_date is None):
+            return ReplayResult([], self.hotkeys, np.zeros((0, 0)), np.zeros((0, 0)), np.zeros(0), np.zeros((0, 0), dtype=bool))
+        first_day = np.datetime64(start_date, 'D').astype(np.int64) if start_date is not None else int(self.days[0])
+        last_day = np.datetime64(end_date, 'D').astype(np.int64) if end_date is not None else int(self.days[-1])
+        replay_days = np.arange(first_day, last_day + 1, dtype=np.int64)
+
+        scores = np.zeros((len(replay_days), number_of_miners))
+        weights = np.zeros((len(replay_days), number_of_miners))
+        reduction_weights = np.zeros(len(replay_days))
+        active = np.zeros((len(replay_days), number_of_miners), dtype=bool)
+        window_starts = np.searchsorted(self.days, replay_days - parameters.score_date_cutoff, side='left')
+        window_ends = np.searchsorted(self.days, replay_days, side='right')
+
+        for day_idx, (today_day, window_start, window_end) in enumerate(zip(replay_days.tolist(), window_starts.tolist(), window_ends.tolist())):
+            window = slice(window_start, window_end)
+            miner_idx = self.miner_idx[window]
+            active[day_idx, miner_idx] = True
+            difference = today_day - self.first_days
+            window_sums = time_gated_scorer.aggregate_arrays(
+                miner_idx, number_of_miners, today_day - self.days[window], self.daily_scores[window], self.total_predictions[window], difference
+            )
+            scores[day_idx] = np.where(active[day_idx], time_gated_scorer.combine_aggregates(difference, *window_sums), 0.0)
+
+            # The reduction UID sits after the miners
+            day_weights = calculate_weight_vector(
+                np.append(scores[day_idx], 0.0), np.flatnonzero(active[day_idx]), number_of_miners,
+                parameters.top_tier_fraction, parameters.middle_tier_fraction, parameters.tier_shares
+            )
+            weights[day_idx] = day_weights[:number_of_miners]
+            reduction_weights[day_idx] = day_weights[number_of_miners]
+
+        dates = replay_days.astype('datetime64[D]').tolist()
+        return ReplayResult(dates, self.hotkeys, scores, weights, reduction_weights, active)
+
+
+def load_daily_scores(database_path: str = DATABASE_PATH) -> list[tuple]:
+    """
+    Read the daily_scores table, without writing to the database
+    Args:
+        database_path: path of a validator database
+
+    Returns:
+        (miner_hotkey, date, score, total_predictions) rows
+    """
+    db_connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    try:
+        return db_connection.execute("SELECT miner_hotkey, date, score, total_predictions FROM daily_scores").fetchall()
+    finally:
+        db_connection.close()
+
+
+def load_scored_predictions(database_path: str or None = DATABASE_PATH, archive_directory: str or None = ARCHIVE_DIRECTORY) -> Iterator[tuple]:
+    """
+    Read archived scored predictions, then the ones still in the database, without writing to it
+    Args:
+        database_path: path of a validator database, or None to only read the archive
+        archive_directory: the archive directory, or None to only read the database
+
+    Returns:
+        Iterator over rows in `ARCHIVE_COLUMNS` order
+    """
+    seen = set()  # A chunk can be archived and still in the database if the validator stopped in between
+    if archive_directory is not None:
+        for row in read_archive(archive_directory):
+            seen.add((row[0], row[2]))
+            yield row
+    if database_path is not None:
+        db_connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            for row in db_connection.execute(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM scored_predictions"):
+                if (row[0], row[2]) not in seen:
+                    yield row
+        finally:
+            db_connection.close()
+
+
+def daily_scores_from_scored_predictions(scored_predictions: Iterable[tuple]) -> list[tuple]:
+    """
+    Rebuild daily scores from scored predictions: each miner's mean score on the day its predictions were scored
+    Args:
+        scored_predictions: rows in `ARCHIVE_COLUMNS` order
+
+    Returns:
+        (miner_hotkey, date, score, total_predictions) rows
+    """
+    rows = [row for row in scored_predictions if row[8] is not None]
+    if len(rows) == 0:
+        return []
+    scores, valid = ScoringCalculator.calculate_scores([(row[2], row[3], row[4], row[6], row[7]) for row in rows])
+    keys = [(row[2], row[8][:10]) for row, is_valid in zip(rows, valid.tolist()) if is_valid]  # score_timestamp date
+    if len(keys) == 0:
+        return []
+
+    unique_keys, key_idx = np.unique(np.array([f"{hotkey}\t{score_date}" for hotkey, score_date in keys]), return_inverse=True)
+    score_sums = np.zeros(len(unique_keys))
+    np.add.at(score_sums, key_idx, scores[valid])
+    counts = np.bincount(key_idx, minlength=len(unique_keys))
+    return [
+        (*key.split('\t'), score_sum / count, count)
+        for key, score_sum, count in zip(unique_keys.tolist(), score_sums.tolist(), counts.tolist())
+    ]
+
+
+def main(args: list[str] or None = None) -> ReplayResult:
+    defaults = ReplayParameters()
+    parser = argparse.ArgumentParser(description="Replay miner scoring and weight setting over recorded history.")
+    parser.add_argument("--database", default=DATABASE_PATH, help="Validator database to read, opened read only.")
+    parser.add_argument("--source", choices=["daily_scores", "scored_predictions"], default="daily_scores", help="Replay the recorded daily scores, or rebuild them from scored predictions.")
+    parser.add_argument("--archive", default=ARCHIVE_DIRECTORY, help="Scored predictions archive, read with --source scored_predictions.")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="First day to replay, YYYY-MM-DD.")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="Last day to replay, YYYY-MM-DD.")
+    parser.add_argument("--consistency-window-duration", type=int, default=defaults.consistency_window_duration)
+    parser.add_argument("--min-consistency-window-percent", type=float, default=defaults.min_consistency_window_percent)
+    parser.add_argument("--score-date-cutoff", type=int, default=defaults.score_date_cutoff)
+    parser.add_argument("--top-tier-fraction", type=float, default=defaults.top_tier_fraction)
+    parser.add_argument("--middle-tier-fraction", type=float, default=defaults.middle_tier_fraction)
+    parser.add_argument("--tier-shares", type=float, nargs=3, default=list(defaults.tier_shares), metavar=("TOP", "MIDDLE", "BOTTOM"))
+    parser.add_argument("--output", default=None, help="CSV file for the weight trajectories.")
+    config = parser.parse_args(args)
+
+    start = time.perf_counter()
+    if config.source == "daily_scores":
+        daily_scores = load_daily_scores(config.database)
+    else:
+        daily_scores = daily_scores_from_scored_predictions(load_scored_predictions(config.database, config.archive))
+    loaded = time.perf_counter()
+
+    parameters = ReplayParameters(
+        consistency_window_duration=config.consistency_window_duration,
+        min_consistency_window_percent=config.min_consistency_window_percent,
+        score_date_cutoff=config.score_date_cutoff,
+        top_tier_fraction=config.top_tier_fraction,
+        middle_tier_fraction=config.middle_tier_fraction,
+        tier_shares=tuple(config.tier_shares),
+    )
+    result = ScoringReplay(daily_scores).run(parameters, config.start_date, config.end_date)
+    replayed = time.perf_counter()
+    print(f"Replayed {len(result.dates)} days for {len(result.hotkeys)} miners from {len(daily_scores)} daily scores. Loaded in {loaded - start:.2f}s, replayed in {replayed - loaded:.2f}s")
+
+    if len(result.dates) > 0:
+        print(f"Weights on {result.dates[-1]}, reduction {result.reduction_weights[-1]:.6f}:")
+        for miner_idx in np.argsort(-result.weights[-1], kind='stable')[:TOP_MINERS_TO_PRINT].tolist():
+            print(f"  {result.hotkeys[miner_idx]}: weight {result.weights[-1, miner_idx]:.6f}, score {result.scores[-1, miner_idx]:.4f}")
+    if config.output is not None:
+        result.write_csv(config.output)
+        print(f"Wrote weight trajectories to {config.output}")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -5,25 +5,34 @@ import bittensor as bt
 import threading
 from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
 from nextplace.validator.api.sold_homes_api import SoldHomesAPI
+from nextplace.validator.api.token_bucket import TokenBucket
 from nextplace.validator.database.database_manager import DatabaseManager
-from nextplace.validator.utils.contants import ISO8601, build_miner_predictions_table_name, \
-    get_miner_hotkeys_from_predictions_tables
+from nextplace.validator.database.miner_market_activity import refresh_activity_for_hotkeys
+from nextplace.validator.database.scored_predictions_archiver import ScoredPredictionsArchiver
+from nextplace.validator.utils.contants import ISO8601, get_miner_hotkeys_from_predictions
 from nextplace.validator.website_data.website_communicator import WebsiteCommunicator
+from nextplace.validator.website_data.website_outbox import WebsiteOutbox
 import requests
 
 """
 Helper class manages scoring Miner predictions
 """
 
+BATCH_SCORING_INTERVAL = 600  # Seconds between batch scoring passes
+WEBSITE_BATCH_SIZE = 5000  # Max scored predictions per request to the website
+
 
 class Scorer:
 
-    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]], metagraph):
+    def __init__(self, database_manager: DatabaseManager, markets: list[dict[str, str]], metagraph, batch_scoring: bool = True, website_outbox: WebsiteOutbox or None = None, token_bucket: TokenBucket or None = None):
         self.metagraph = metagraph
+        self.website_outbox = website_outbox
+        self.batch_scoring = batch_scoring
         self.database_manager = database_manager
         self.markets = markets
-        self.sold_homes_api = SoldHomesAPI(database_manager, markets)
+        self.sold_homes_api = SoldHomesAPI(database_manager, markets, token_bucket=token_bucket)
         self.scoring_calculator = ScoringCalculator(database_manager, self.sold_homes_api)
+        self.scored_predictions_archiver = ScoredPredictionsArchiver(database_manager)
         self.sales_timer = datetime.now(timezone.utc)
 
     def run_score_thread(self) -> None:
@@ -36,7 +45,7 @@ class Scorer:
         bt.logging.info(f"| {thread_name} | 🏁 Beginning scoring thread")
 
         # If no sales, get them
-        with self.database_manager.lock:
+        with self.database_manager.read_lock:
             number_of_sales = self.database_manager.get_size_of_table('sales')
         if number_of_sales == 0:
             self.sold_homes_api.get_sold_properties()  # Get recently sold homes
@@ -50,75 +59,141 @@ class Scorer:
             if now - self.sales_timer > timedelta(hours=12):
                 bt.logging.info(f"| {thread_name} | 🏷️ Time to refresh recently sold homes")
                 self.sales_timer = now
-                self.database_manager.delete_all_sales()  # Clear out sales table
+                self._clear_out_old_sales()  # Sales we already have stay scored, only new ones become pending
                 self.sold_homes_api.get_sold_properties()  # Get recently sold homes
 
-            miners = get_miner_hotkeys_from_predictions_tables(self.database_manager)
-            bt.logging.info(f"| {thread_name} | 🚀 Beginning metagraph hotkey iteration with {len(miners)} miners")
+            if self.batch_scoring:
+                try:
+                    self.score_all_predictions()  # Score all miners in one pass
+                    self._check_miners_without_scores()
+                except sqlite3.OperationalError as e:
+                    bt.logging.info(f"| {thread_name} | 🏖️ SQLITE operational error: {e}")
+                sleep(BATCH_SCORING_INTERVAL)
 
-            for hotkey in miners:  # Iterate metagraph hotkeys
+            else:
+                miners = get_miner_hotkeys_from_predictions(self.database_manager)
+                bt.logging.info(f"| {thread_name} | 🚀 Beginning metagraph hotkey iteration with {len(miners)} miners")
 
-                table_name = build_miner_predictions_table_name(hotkey)  # Get name of this miner's predictions table
+                for hotkey in miners:  # Iterate metagraph hotkeys
 
-                # Check if predictions table exists for this hotkey. If not, continue
-                with self.database_manager.lock:
-                    table_exists = self.database_manager.table_exists(table_name)
-                if not table_exists:
-                    continue
+                    bt.logging.info(f"| {thread_name} | ⛏️ Scoring miner with hotkey '{hotkey}'")
 
-                bt.logging.info(f"| {thread_name} | ⛏️ Scoring miner with hotkey '{hotkey}'")
+                    try:
+                        self.score_predictions(hotkey)  # Score predictions
+                    except sqlite3.OperationalError as e:
+                        bt.logging.info(f"| {thread_name} | 🏖️ SQLITE operational error: {e}")
 
-                try:
-                    self.score_predictions(table_name, hotkey)  # Score predictions
-                    self._clear_out_old_predictions(table_name)  # Remove old predictions from miner's table
-                except sqlite3.OperationalError as e:
-                    bt.logging.info(f"| {thread_name} | 🏖️ SQLITE operational error: {e}. Note that this is may be caused by miner deregistration while trying to score the deregistered miner, in which case it is not a bug.")
-
-                sleep(120)  # Sleep thread for 2 minutes
+                    sleep(120)  # Sleep thread for 2 minutes
 
-            with self.database_manager.lock:
-                self._clear_out_old_predictions('scored_predictions')  # Clear out old scored predictions
+            self._clear_out_old_predictions('predictions')  # Remove old predictions for all miners
+            self.scored_predictions_archiver.archive_expired()  # Move old scored predictions to the archive
 
-    def score_predictions(self, table_name: str, miner_hotkey: str) -> None:
+    def score_predictions(self, miner_hotkey: str) -> None:
         """
         Query to get scorable predictions that haven't been scored yet
         Returns:
             list of query results
         """
         current_thread = threading.current_thread().name
-        scorable_predictions = self._get_scorable_predictions(table_name)
+        scorable_predictions = self._get_scorable_predictions(miner_hotkey)
         if len(scorable_predictions) > 0:
             bt.logging.info(f"| {current_thread} | 🏅 Found {len(scorable_predictions)} predictions to score")
             scoring_data = [(x[1], x[2], x[3], x[6], x[7]) for x in scorable_predictions]
             self.scoring_calculator.process_scorable_predictions(scoring_data, miner_hotkey)  # Score predictions for this home
             self._send_data_to_website(scorable_predictions)  # Send data to website
             self._move_predictions_to_scored(scorable_predictions)  # Move scored predictions to scored_predictions table
-            self._remove_scored_predictions_from_miner_predictions_table(table_name, scorable_predictions)  # Drop scored predictions from miner predictions table
+            self._remove_scored_predictions(scorable_predictions)  # Drop scored predictions from predictions table
 
         # Check if they have any scored predictions. If not, check if *any* validator has scored predictions for them.
         else:
             bt.logging.info(f"| {current_thread} | 0️⃣ Found no new predictions to score")
-            with self.database_manager.lock:
-                query = "SELECT COUNT(*) FROM daily_scores WHERE miner_hotkey = ?"
-                values = (miner_hotkey, )
-                query_result = self.database_manager.query_with_values(query, values)
-            if query_result is None or len(query_result) == 0:
-                bt.logging.debug(f"| {current_thread} | ❗ Error querying for {miner_hotkey}'s scored predictions")
-                return
-            number_of_days_with_scores = query_result[0][0]
-            if number_of_days_with_scores == 0:  # This miner has no scored predictions in our db (their scores is 0)
-                bt.logging.info(f"| {current_thread} | 🔊 Found no scored predictions. Checking if another validator has any scored predictions.")
-                avg_score_from_other_valis = self._get_miner_score_data_from_webserver(miner_hotkey)
-                if avg_score_from_other_valis > 0:  # Other validators have scores for this miner
-                    # Insert consensus score from other valis into our db for ONE SINGLE score
-                    today = datetime.now(timezone.utc).date()  # Get today's date
-                    query_str = f"""
-                        INSERT INTO daily_scores (miner_hotkey, date, score, total_predictions)
-                        VALUES (?, ?, ?, ?)
-                    """
-                    values = (miner_hotkey, today, avg_score_from_other_valis, 1)
-                    with self.database_manager.lock:
-                        self.database_manager.query_and_commit_with_values(query_str, values)
+            self._check_score_consensus(miner_hotkey)
+
+    def score_all_predictions(self) -> None:
+        """
+        Score every miner's predictions for the sales that landed since the last pass. Scores, scored_predictions,
+        the predictions table and the pending sales are updated in a single transaction
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        query_str = """
+            SELECT predictions.nextplace_id, predictions.miner_hotkey, predictions.predicted_sale_price, predictions.predicted_sale_date, predictions.prediction_timestamp, predictions.market, sales.sale_price, sales.sale_date
+            FROM pending_sales
+            JOIN sales ON sales.nextplace_id = pending_sales.nextplace_id
+            JOIN predictions ON predictions.nextplace_id = sales.nextplace_id
+            AND DATE(predictions.prediction_timestamp) < DATE(sales.sale_date)
+        """
+        with self.database_manager.lock:
+            with self.database_manager.transaction() as cursor:
+                cursor.execute(query_str)
+                scorable_predictions = cursor.fetchall()
+
+                # Predictions are timestamped at ingestion, so later predictions can't be scored against these sales.
+                # Legacy rows copied in by PredictionsTableMigrator mark their sales pending again
+                cursor.execute("DELETE FROM pending_sales")
+                bt.logging.info(f"| {current_thread} | 🧾 Consumed {cursor.rowcount} pending sales")
+                if len(scorable_predictions) == 0:
+                    bt.logging.info(f"| {current_thread} | 0️⃣ Found no new predictions to score")
+                    return
+
+                scoring_data = [(x[1], x[2], x[3], x[6], x[7]) for x in scorable_predictions]
+                new_scores_by_miner = self.scoring_calculator.process_scorable_predictions_for_all_miners(cursor, scoring_data)
+                self._move_predictions_to_scored(scorable_predictions, cursor)
+                self._remove_scored_predictions(scorable_predictions, cursor)
+
+        number_of_miners = len(set(x[1] for x in scorable_predictions))
+        bt.logging.info(f"| {current_thread} | 🎯 Scored {len(scorable_predictions)} predictions for {number_of_miners} miners, {len(new_scores_by_miner)} with valid scores")
+        for start in range(0, len(scorable_predictions), WEBSITE_BATCH_SIZE):
+            self._send_data_to_website(scorable_predictions[start:start + WEBSITE_BATCH_SIZE])  # Send data to website
+
+    def _check_miners_without_scores(self) -> None:
+        """
+        Look for miners with predictions but no daily scores, and check if another validator has scored them
+        Returns:
+            None
+        """
+        query = """
+            SELECT DISTINCT miner_hotkey
+            FROM predictions
+            WHERE miner_hotkey NOT IN (SELECT miner_hotkey FROM daily_scores)
+        """
+        with self.database_manager.read_lock:
+            results = self.database_manager.query(query)
+        for row in results:
+            self._check_score_consensus(row[0])
+
+    def _check_score_consensus(self, miner_hotkey: str) -> None:
+        """
+        If the miner has no scored predictions in our db, seed its score from other validators
+        Args:
+            miner_hotkey: the miner's hotkey
+
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        with self.database_manager.read_lock:
+            query = "SELECT COUNT(*) FROM daily_scores WHERE miner_hotkey = ?"
+            values = (miner_hotkey, )
+            query_result = self.database_manager.query_with_values(query, values)
+        if query_result is None or len(query_result) == 0:
+            bt.logging.debug(f"| {current_thread} | ❗ Error querying for {miner_hotkey}'s scored predictions")
+            return
+        number_of_days_with_scores = query_result[0][0]
+        if number_of_days_with_scores == 0:  # This miner has no scored predictions in our db (their scores is 0)
+            bt.logging.info(f"| {current_thread} | 🔊 Found no scored predictions. Checking if another validator has any scored predictions.")
+            avg_score_from_other_valis = self._get_miner_score_data_from_webserver(miner_hotkey)
+            if avg_score_from_other_valis > 0:  # Other validators have scores for this miner
+                # Insert consensus score from other valis into our db for ONE SINGLE score
+                today = datetime.now(timezone.utc).date()  # Get today's date
+                query_str = """
+                    INSERT INTO daily_scores (miner_hotkey, date, score, total_predictions)
+                    VALUES (?, ?, ?, ?)
+                """
+                values = (miner_hotkey, today, avg_score_from_other_valis, 1)
+                with self.database_manager.lock:
+                    self.database_manager.query_and_commit_with_values(query_str, values)
 
     def _get_miner_score_data_from_webserver(self, miner_hotkey: str) -> int:
         current_thread = threading.current_thread().name
@@ -145,24 +220,26 @@ class Scorer:
             bt.logging.info(f"| {current_thread} | ❗ Response:", response.text)
             return 0
 
-    def _get_scorable_predictions(self, table_name: str) -> list[tuple]:
+    def _get_scorable_predictions(self, miner_hotkey: str) -> list[tuple]:
         """
         Retrieve scorable predictions for current miner
         Args:
-            table_name: name of miner's predictions table
+            miner_hotkey: the miner's hotkey
 
         Returns:
             List of scorable predictions
         """
-        query_str = f"""
-            SELECT {table_name}.nextplace_id, {table_name}.miner_hotkey, {table_name}.predicted_sale_price, {table_name}.predicted_sale_date, {table_name}.prediction_timestamp, {table_name}.market, sales.sale_price, sales.sale_date
-            FROM {table_name}
-            JOIN sales ON {table_name}.nextplace_id = sales.nextplace_id
-            AND DATE({table_name}.prediction_timestamp) < DATE(sales.sale_date)
+        query_str = """
+            SELECT predictions.nextplace_id, predictions.miner_hotkey, predictions.predicted_sale_price, predictions.predicted_sale_date, predictions.prediction_timestamp, predictions.market, sales.sale_price, sales.sale_date
+            FROM predictions
+            JOIN sales ON predictions.nextplace_id = sales.nextplace_id
+            AND DATE(predictions.prediction_timestamp) < DATE(sales.sale_date)
+            WHERE predictions.miner_hotkey = ?
         """
+        values = (miner_hotkey, )
 
-        with self.database_manager.lock:  # Acquire lock
-            scorable_predictions = self.database_manager.query(query_str)  # Get scorable predictions for this home
+        with self.database_manager.read_lock:  # Acquire lock
+            scorable_predictions = self.database_manager.query_with_values(query_str, values)  # Get scorable predictions for this miner
         return scorable_predictions
 
     def _send_data_to_website(self, scored_predictions: list[tuple]) -> None:
@@ -178,12 +255,13 @@ class Scorer:
         bt.logging.info(f"| {thread_name} | 🎢 Attempting to send {len(scored_predictions)} scored predictions to NextPlace website")
 
         formatted_predictions = [(x[0], x[1], None, x[4], x[2], x[3], x[6], x[7]) for x in scored_predictions]
+        scores, valid = self.scoring_calculator.calculate_scores([(x[1], x[2], x[3], x[6], x[7]) for x in scored_predictions])
         data_to_send = []
 
-        for prediction in formatted_predictions:
+        for idx, prediction in enumerate(formatted_predictions):
 
             nextplace_id, miner_hotkey, miner_coldkey, prediction_date, predicted_sale_price, predicted_sale_date, sale_price, sale_date = prediction
-            score = self.scoring_calculator.calculate_score(sale_price, predicted_sale_price, sale_date, predicted_sale_date, miner_hotkey)
+            score = float(scores[idx]) if valid[idx] else None
             prediction_date_parsed = self.parse_iso_datetime(prediction_date) if isinstance(prediction_date, str) else prediction_date
             predicted_sale_date_parsed = self.parse_iso_datetime(predicted_sale_date) if isinstance(predicted_sale_date, str) else predicted_sale_date
 
@@ -209,14 +287,18 @@ class Scorer:
             bt.logging.info(f"| {thread_name} | Ø No valid predictions to send to Nextplace site after parsing.")
             return
 
+        if self.website_outbox is not None:  # Don't hold up scoring on the website
+            self.website_outbox.enqueue("Predictions", data_to_send, batchable=True)
+            return
         website_communicator = WebsiteCommunicator("Predictions")
         website_communicator.send_data(data=data_to_send)
 
-    def _move_predictions_to_scored(self, scored_predictions: list[tuple]) -> None:
+    def _move_predictions_to_scored(self, scored_predictions: list[tuple], cursor=None) -> None:
         """
         Move scorable predictions to scored predictions_table
         Args:
             scorable_predictions: list of all scorable predictions from database
+            cursor: optional cursor inside an open transaction
 
         Returns:
             None
@@ -228,26 +310,35 @@ class Scorer:
         """
         now = datetime.now(timezone.utc).strftime(ISO8601)
         values = [(x[0], x[1], x[2], x[3], x[4], x[5], x[6], x[7], now) for x in scored_predictions]
+        if cursor is not None:
+            cursor.executemany(query_str, values)
+            return
         with self.database_manager.lock:  # Acquire lock
             self.database_manager.query_and_commit_many(query_str, values)  # Execute query
 
-    def _remove_scored_predictions_from_miner_predictions_table(self, table_name: str, scored_predictions: list[tuple]) -> None:
+    def _remove_scored_predictions(self, scored_predictions: list[tuple], cursor=None) -> None:
         """
-        Remove all scored predictions from miner's predictions table
+        Remove all scored predictions from the predictions table
         Args:
-            table_name: name of the miner table
             scorable_predictions: list of scored predictions
+            cursor: optional cursor inside an open transaction
 
         Returns:
             None
         """
-        row_ids = [x[0] for x in scored_predictions]
-        formatted_ids = ','.join(f"'{str(nextplace_id)}'" for nextplace_id in row_ids)
-        query_str = f"""
-            DELETE FROM {table_name} WHERE nextplace_id in ({formatted_ids})
+        query_str = """
+            DELETE FROM predictions WHERE miner_hotkey = ? AND nextplace_id = ?
         """
+        values = [(x[1], x[0]) for x in scored_predictions]
+        hotkeys = sorted({x[1] for x in scored_predictions})  # Their market activity may have come from these rows
+        if cursor is not None:
+            cursor.executemany(query_str, values)
+            refresh_activity_for_hotkeys(cursor, hotkeys)
+            return
         with self.database_manager.lock:  # Acquire lock
-            self.database_manager.query_and_commit(query_str)  # Execute query
+            with self.database_manager.transaction() as cursor:
+                cursor.executemany(query_str, values)
+                refresh_activity_for_hotkeys(cursor, hotkeys)
 
     def _cleanup(self, table_name: str) -> None:
         """
@@ -257,6 +348,19 @@ class Scorer:
         self.database_manager.delete_all_sales()
         self._clear_out_old_predictions(table_name)
 
+    def _clear_out_old_sales(self) -> None:
+        """
+        Remove sales older than the window the sold homes API returns
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        max_days = 21
+        min_date = (datetime.now(timezone.utc) - timedelta(days=max_days)).strftime(ISO8601)
+        bt.logging.info(f"| {current_thread} | ✘ Deleting sales older than {min_date}")
+        with self.database_manager.lock:
+            self.database_manager.delete_sales_before(min_date)
+
     def _clear_out_old_predictions(self, table_name: str) -> None:
         """
         Remove predictions that were scored more than 5 days ago
@@ -1,9 +1,16 @@
 import threading
+from operator import itemgetter
 from typing import Dict, List, Tuple
 from datetime import datetime, timezone
 import bittensor as bt
+import numpy as np
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
 from nextplace.validator.utils.contants import ISO8601
 
+PREDICTED_DATE_TEMPLATE = "0000-00-00"  # '0' marks a digit
+SALE_DATE_TEMPLATE = "0000-00-00T00:00:00Z"
+UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
 
 class ScoringCalculator:
 
@@ -24,9 +31,61 @@ class ScoringCalculator:
         self._add_to_daily_scores(new_scores, miner_hotkey)
         bt.logging.info(f"| {current_thread} | 🎯 Scored {len(scorable_predictions)} predictions for hotkey '{miner_hotkey}'")
 
+    def process_scorable_predictions_for_all_miners(self, cursor, scorable_predictions: list) -> dict[str, dict[str, float]]:
+        """
+        Score predictions for every miner at once and merge them into daily_scores using the caller's transaction
+        Args:
+            cursor: a cursor inside an open transaction
+            scorable_predictions: list of (miner_hotkey, predicted_price, predicted_date, actual_price, actual_date)
+
+        Returns:
+            Map of miner hotkey -> new scores for miners with at least one valid prediction
+        """
+        predictions_by_miner = {}
+        for prediction in scorable_predictions:
+            predictions_by_miner.setdefault(prediction[0], []).append(prediction)
+
+        new_scores_by_miner = {}
+        for miner_hotkey, miner_predictions in predictions_by_miner.items():
+            new_scores = self._calculate_new_scores(miner_predictions)
+            if new_scores['new_predictions'] > 0:
+                new_scores_by_miner[miner_hotkey] = new_scores
+
+        self._add_many_to_daily_scores(cursor, new_scores_by_miner)
+        return new_scores_by_miner
+
+    def _add_many_to_daily_scores(self, cursor, new_scores_by_miner: dict[str, dict[str, float]]) -> None:
+        """
+        Add new scores for many miners to the daily_scores table, merging with today's existing rows,
+        and refresh their score aggregates in the same transaction
+        Args:
+            cursor: a cursor inside an open transaction
+            new_scores_by_miner: map of miner hotkey -> new scores
+
+        Returns:
+            None
+        """
+        today = datetime.now(timezone.utc).date()
+        upsert_query = """
+            INSERT INTO daily_scores (miner_hotkey, date, score, total_predictions)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(miner_hotkey, date) DO UPDATE SET
+                score = ((score * total_predictions) + ?) / (total_predictions + ?),
+                total_predictions = total_predictions + ?
+        """
+        values = [
+            (
+                miner_hotkey, today, new_scores['total_score'] / new_scores['new_predictions'], new_scores['new_predictions'],
+                new_scores['total_score'], new_scores['new_predictions'], new_scores['new_predictions']
+            )
+            for miner_hotkey, new_scores in new_scores_by_miner.items()
+        ]
+        cursor.executemany(upsert_query, values)
+        TimeGatedScorer(self.database_manager).refresh_aggregates(cursor, today)
+
     def _add_to_daily_scores(self, new_scores: dict, miner_hotkey: str) -> None:
         """
-        Add new scores to daily_scores table.
+        Add new scores to daily_scores table, and refresh the miner's score aggregates in the same transaction
         Args:
             new_scores: dict of new scores.
             miner_hotkey: miner's hotkey.
@@ -38,47 +97,13 @@ class ScoringCalculator:
         today = datetime.now(timezone.utc).date()
         bt.logging.info(f"| {current_thread} | 📅 Updating daily_scores for {today}")
 
-        existing_daily_score_query = """
-            SELECT score, total_predictions 
-            FROM daily_scores 
-            WHERE miner_hotkey = ? AND date = ?
-        """
-        values = (miner_hotkey, today)
-
         with self.database_manager.lock:
-            results = self.database_manager.query_with_values(existing_daily_score_query, values)
-
-        if results and len(results) > 0:  # Update existing Miner score
-            result = results[0]
-            old_score = result[0]
-            old_predictions = result[1]
-            new_total_score = (old_score * old_predictions) + new_scores['total_score']
-            new_total_predictions = old_predictions + new_scores['new_predictions']
-            new_daily_score = new_total_score / new_total_predictions
-
-            update_query = """
-                UPDATE daily_scores 
-                SET score = ?, total_predictions = ? 
-                WHERE miner_hotkey = ? AND date = ?
-            """
-            update_values = (new_daily_score, new_total_predictions, miner_hotkey, today)
-
-            with self.database_manager.lock:
-                self.database_manager.query_and_commit_with_values(update_query, update_values)
-
-            bt.logging.info(f"| {current_thread} | ⭐ Updated daily score. Score: {new_daily_score}, Total Scored: {new_total_predictions}")
-
-        else:  # No scores for this Miner yet
-            score = new_scores['total_score'] / new_scores['new_predictions']
-            insert_query = """
-                INSERT INTO daily_scores (miner_hotkey, date, score, total_predictions) 
-                VALUES (?, ?, ?, ?)
-            """
-            insert_values = (miner_hotkey, today, score, new_scores['new_predictions'])
-
-            with self.database_manager.lock:
-                self.database_manager.query_and_commit_with_values(insert_query, insert_values)
-            bt.logging.info(f"| {current_thread} | ⭐ Added daily score. Score: {score}, Total Scored: {new_scores['new_predictions']}")
+            with self.database_manager.transaction() as cursor:
+                self._add_many_to_daily_scores(cursor, {miner_hotkey: new_scores})
+                cursor.execute("SELECT score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date = ?", (miner_hotkey, today))
+                daily_score, total_predictions = cursor.fetchone()
+
+        bt.logging.info(f"| {current_thread} | ⭐ Updated daily score. Score: {daily_score}, Total Scored: {total_predictions}")
 
     def _get_num_sold_homes(self) -> int:
 
@@ -89,17 +114,131 @@ class ScoringCalculator:
 
     def _calculate_new_scores(self, scorable_predictions: List[Tuple]) -> Dict[str, float]:
         new_scores = {'total_score': 0, 'new_predictions': 0}
+        if len(scorable_predictions) == 0:
+            return new_scores
 
-        for prediction in scorable_predictions:
-            miner_hotkey, predicted_price, predicted_date, actual_price, actual_date = prediction
-            score = self.calculate_score(actual_price, predicted_price, actual_date, predicted_date, miner_hotkey)
+        scores, valid = self.calculate_scores(scorable_predictions)
+        number_of_invalid = len(scorable_predictions) - int(valid.sum())
+        if number_of_invalid > 0:
+            current_thread = threading.current_thread().name
+            bt.logging.info(f"| {current_thread} | Received {number_of_invalid} predictions with invalid date formats from '{scorable_predictions[0][0]}'. Ignoring them.")
 
-            if score is not None:
-                new_scores['total_score'] += score
-                new_scores['new_predictions'] += 1
+        valid_scores = scores[valid]
+        if len(valid_scores) > 0:
+            new_scores['total_score'] = float(np.cumsum(valid_scores)[-1])  # Sequential sum, same as adding one by one
+            new_scores['new_predictions'] = len(valid_scores)
 
         return new_scores
 
+    @staticmethod
+    def calculate_scores(scorable_predictions: List[Tuple]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of `calculate_score`, gives exactly the same scores
+        Args:
+            scorable_predictions: list of (miner_hotkey, predicted_price, predicted_date, actual_price, actual_date)
+
+        Returns:
+            Array of scores (NaN where invalid) and a boolean mask of valid predictions
+        """
+        predicted_prices, predicted_dates, actual_prices, actual_dates = (
+            list(map(itemgetter(column), scorable_predictions)) for column in range(1, 5)
+        )
+
+        predicted_days, valid_predicted_dates = ScoringCalculator._parse_dates(predicted_dates, "%Y-%m-%d")
+        actual_days, valid_actual_dates = ScoringCalculator._parse_dates(actual_dates, ISO8601)
+        predicted_prices = ScoringCalculator._to_float_array(predicted_prices)
+        actual_prices = ScoringCalculator._to_float_array(actual_prices)
+        valid = valid_predicted_dates & valid_actual_dates & ~np.isnan(predicted_prices) & ~np.isnan(actual_prices) & (actual_prices != 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Score based on date accuracy (14 points max, 1 point deducted per day off)
+            date_difference = np.abs(actual_days - predicted_days)
+            date_score = (np.maximum(0, 14 - date_difference) / 14) * 100
+
+            # Calculate price accuracy
+            price_difference = np.abs(actual_prices - predicted_prices) / actual_prices
+            price_score = np.maximum(0, 100 - (price_difference * 100))
+
+            # Combine scores (86% weight to price, 14% weight to date)
+            scores = (price_score * 0.86) + (date_score * 0.14)
+
+        scores[~valid] = np.nan
+        return scores, valid
+
+    @staticmethod
+    def _to_float_array(values: list) -> np.ndarray:
+        """
+        Convert prices to a float array, NaN where a value can't be converted
+        """
+        try:
+            return np.array(values, dtype=np.float64)
+        except (ValueError, TypeError):
+            converted = np.empty(len(values), dtype=np.float64)
+            for idx, value in enumerate(values):
+                try:
+                    converted[idx] = float(value)
+                except (ValueError, TypeError):
+                    converted[idx] = np.nan
+            return converted
+
+    @staticmethod
+    def _parse_dates(values: list, date_format: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse date strings to days since the unix epoch. Zero-padded strings are parsed in bulk, anything else
+        falls back to `strptime` so the accepted formats are exactly the same as the scalar path
+        Args:
+            values: date strings, either "%Y-%m-%d" or ISO8601
+            date_format: the strptime format
+
+        Returns:
+            Array of days since the unix epoch, and a boolean mask of valid dates
+        """
+        template = PREDICTED_DATE_TEMPLATE if date_format == "%Y-%m-%d" else SALE_DATE_TEMPLATE
+        length = len(template)
+        n = len(values)
+        if set(map(type, values)) == {str}:
+            is_candidate = np.fromiter(map(len, values), dtype=np.int64, count=n) == length
+            chars = np.array(values, dtype=f'U{length}')  # Longer strings are truncated, but they aren't candidates
+        else:
+            is_candidate = np.fromiter((type(value) is str and len(value) == length for value in values), dtype=bool, count=n)
+            chars = np.array([value if candidate else '' for value, candidate in zip(values, is_candidate)], dtype=f'U{length}')
+        codes = chars.view(np.uint32).reshape(n, length)
+
+        # Every '0' in the template must be an ASCII digit, every other character must match exactly
+        is_digit_position = np.array([character == '0' for character in template])
+        expected_codes = np.array([ord(character) for character in template])
+        is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+        well_formed = is_candidate & np.where(is_digit_position, is_digit, codes == expected_codes).all(axis=1)
+
+        digits = codes.astype(np.int64) - ord('0')
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 5] * 10 + digits[:, 6]
+        day = digits[:, 8] * 10 + digits[:, 9]
+        valid = well_formed & (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+        if length == len(SALE_DATE_TEMPLATE):
+            hour = digits[:, 11] * 10 + digits[:, 12]
+            minute = digits[:, 14] * 10 + digits[:, 15]
+            second = digits[:, 17] * 10 + digits[:, 18]
+            valid &= (hour <= 23) & (minute <= 59) & (second <= 61)  # strptime allows leap seconds
+
+        # Days since the epoch for the first of the month, then check the day against the month's length
+        month_start = (np.where(valid, year, 1970) - 1970).astype('datetime64[Y]') + (np.where(valid, month, 1) - 1).astype('timedelta64[M]')
+        first_day = month_start.astype('datetime64[D]')
+        days_in_month = ((month_start + 1).astype('datetime64[D]') - first_day).astype(np.int64)
+        valid &= day <= days_in_month
+        days = first_day.astype(np.int64) + day - 1
+
+        # Anything the fast path didn't accept gets the exact scalar treatment
+        for idx in np.flatnonzero(~valid):
+            try:
+                parsed = datetime.strptime(values[idx], date_format).date()
+            except (ValueError, TypeError):
+                continue
+            days[idx] = parsed.toordinal() - UNIX_EPOCH_ORDINAL
+            valid[idx] = True
+
+        return days, valid
+
     def calculate_score(self, actual_price: str, predicted_price: str, actual_date: str, predicted_date: str, miner_hotkey: str):
         # Convert date strings to datetime objects
         actual_date = datetime.strptime(actual_date, ISO8601).date()
@@ -1,9 +1,43 @@
-import statistics
 import threading
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
 from nextplace.validator.database.database_manager import DatabaseManager
 import bittensor as bt
 
+# Each recent daily score, joined with the miner's oldest daily score, which may be older than the cutoff
+DAILY_SCORES_WINDOW_QUERY = """
+    SELECT daily_scores.miner_hotkey, daily_scores.date, daily_scores.score, daily_scores.total_predictions, oldest.date
+    FROM daily_scores
+    JOIN (
+        SELECT miner_hotkey, MIN(date) AS date
+        FROM daily_scores
+        GROUP BY miner_hotkey
+    ) AS oldest ON oldest.miner_hotkey = daily_scores.miner_hotkey
+    WHERE daily_scores.date >= ?
+    ORDER BY daily_scores.miner_hotkey, daily_scores.date
+"""
+
+# Same rows, only for the miners whose aggregates were marked stale
+STALE_DAILY_SCORES_WINDOW_QUERY = """
+    SELECT daily_scores.miner_hotkey, daily_scores.date, daily_scores.score, daily_scores.total_predictions, oldest.date
+    FROM daily_scores
+    JOIN (
+        SELECT miner_hotkey, MIN(date) AS date
+        FROM daily_scores
+        WHERE miner_hotkey IN (SELECT miner_hotkey FROM miner_score_aggregates WHERE as_of_date IS NULL)
+        GROUP BY miner_hotkey
+    ) AS oldest ON oldest.miner_hotkey = daily_scores.miner_hotkey
+    WHERE daily_scores.date >= ?
+    ORDER BY daily_scores.miner_hotkey, daily_scores.date
+"""
+
+AGGREGATES_QUERY = """
+    SELECT miner_hotkey, as_of_date, oldest_date, consistency_score_sum, consistency_predictions, past_score, past_total_weight
+    FROM miner_score_aggregates
+"""
+
+STALE_AGGREGATES_QUERY = "SELECT 1 FROM miner_score_aggregates WHERE as_of_date IS NULL OR as_of_date != ? LIMIT 1"
+
 
 class TimeGatedScorer:
     def __init__(self, database_manager: DatabaseManager):
@@ -46,6 +80,269 @@ class TimeGatedScorer:
 
         return final_score
 
+    def score_all(self, hotkeys: list[str], today: date = None) -> np.ndarray:
+        """
+        Score every miner from the materialized `miner_score_aggregates`, one row per miner
+        Args:
+            hotkeys: hotkeys to score, usually `metagraph.hotkeys`
+            today: the date to score as of, defaults to today (UTC)
+
+        Returns:
+            Array of scores aligned to `hotkeys`. Miners without recent daily scores get 0.0
+        """
+        today = today or datetime.now(timezone.utc).date()
+        self.ensure_aggregates(today)
+        with self.database_manager.read_lock:
+            results = self.database_manager.query(AGGREGATES_QUERY)
+        if not self.aggregates_are_current(results, today):  # Daily scores changed since the refresh
+            with self.database_manager.lock:  # Holds off writers, so this read is current
+                self.ensure_aggregates(today)
+                results = self.database_manager.query(AGGREGATES_QUERY)
+        return self.score_aggregates(hotkeys, results, today)
+
+    @staticmethod
+    def aggregates_are_current(rows: list[tuple], today: date) -> bool:
+        """
+        Check that rows of `AGGREGATES_QUERY` are all up to date as of `today`
+        Args:
+            rows: rows of `AGGREGATES_QUERY`
+            today: the date to score as of
+
+        Returns:
+            True if no row is stale
+        """
+        as_of_date = today.strftime("%Y-%m-%d")
+        return all(row[1] == as_of_date for row in rows)
+
+    def ensure_aggregates(self, today: date) -> None:
+        """
+        Bring `miner_score_aggregates` up to date as of `today`, if any of it is stale
+        Args:
+            today: the date to score as of
+
+        Returns:
+            None
+        """
+        values = (today.strftime("%Y-%m-%d"),)
+        with self.database_manager.read_lock:
+            stale = self.database_manager.query_with_values(STALE_AGGREGATES_QUERY, values)
+        if len(stale) == 0:
+            return
+        with self.database_manager.lock:
+            with self.database_manager.transaction() as cursor:
+                self.refresh_aggregates(cursor, today)
+
+    def refresh_aggregates(self, cursor, today: date) -> int:
+        """
+        Rebuild stale rows of `miner_score_aggregates` from daily_scores, using the caller's transaction.
+        Triggers on daily_scores mark a miner stale when its daily scores change. Once the date rolls over,
+        every day weight shifts, so the whole table is rebuilt
+        Args:
+            cursor: a cursor inside an open transaction
+            today: the date to aggregate as of
+
+        Returns:
+            Number of miners whose aggregates were written
+        """
+        as_of_date = today.strftime("%Y-%m-%d")
+        score_cutoff_date = (today - timedelta(days=int(self.score_date_cutoff))).strftime("%Y-%m-%d")
+        cursor.execute("SELECT 1 FROM miner_score_aggregates WHERE as_of_date IS NOT NULL AND as_of_date != ? LIMIT 1", (as_of_date,))
+        if cursor.fetchone() is not None:  # Date rolled over
+            cursor.execute(DAILY_SCORES_WINDOW_QUERY, (score_cutoff_date,))
+            rows = cursor.fetchall()
+            cursor.execute("DELETE FROM miner_score_aggregates")
+        else:
+            cursor.execute(STALE_DAILY_SCORES_WINDOW_QUERY, (score_cutoff_date,))
+            rows = cursor.fetchall()
+            cursor.execute("DELETE FROM miner_score_aggregates WHERE as_of_date IS NULL")
+        if len(rows) == 0:
+            return 0
+
+        miners, oldest_dates, score_sums, prediction_volume, past_scores, total_weights = self.aggregate_rows(rows, today)
+        cursor.executemany(
+            "INSERT INTO miner_score_aggregates VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(miners.tolist(), [as_of_date] * len(miners), oldest_dates, score_sums.tolist(), prediction_volume.tolist(), past_scores.tolist(), total_weights.tolist())
+        )
+        return len(miners)
+
+    def score_aggregates(self, hotkeys: list[str], rows: list[tuple], today: date) -> np.ndarray:
+        """
+        Score miners from rows of `miner_score_aggregates`
+        Args:
+            hotkeys: hotkeys to score
+            rows: rows of `AGGREGATES_QUERY`, current as of `today`
+            today: the date the aggregates are as of
+
+        Returns:
+            Array of scores aligned to `hotkeys`
+        """
+        if len(rows) == 0:
+            return np.zeros(len(hotkeys))
+
+        miners, _, oldest_dates, score_sums, prediction_volume, past_scores, total_weights = zip(*rows)
+        today_day = np.datetime64(today, 'D').astype(np.int64)
+        difference = today_day - np.array(oldest_dates, dtype='datetime64[D]').astype(np.int64)
+        scores = self.combine_aggregates(
+            difference,
+            np.array(score_sums, dtype=np.float64),
+            np.array(prediction_volume, dtype=np.int64),
+            np.array(past_scores, dtype=np.float64),
+            np.array(total_weights, dtype=np.int64),
+        )
+        final_scores = dict(zip(miners, scores.tolist()))
+        return np.array([final_scores.get(hotkey, 0.0) for hotkey in hotkeys], dtype=np.float64)
+
+    def score_rows(self, hotkeys: list[str], rows: list[tuple], today: date) -> np.ndarray:
+        """
+        Vectorized version of `score` over rows of daily scores for many miners
+        Args:
+            hotkeys: hotkeys to score
+            rows: (miner_hotkey, date, score, total_predictions, oldest_date) tuples within the score window
+            today: the date to score as of
+
+        Returns:
+            Array of scores aligned to `hotkeys`
+        """
+        if len(rows) == 0:
+            return np.zeros(len(hotkeys))
+
+        miners, oldest_dates, score_sums, prediction_volume, past_scores, total_weights = self.aggregate_rows(rows, today)
+        today_day = np.datetime64(today, 'D').astype(np.int64)
+        difference = today_day - np.array(oldest_dates, dtype='datetime64[D]').astype(np.int64)
+        scores = self.combine_aggregates(difference, score_sums, prediction_volume, past_scores, total_weights)
+        final_scores = dict(zip(miners.tolist(), scores.tolist()))
+        return np.array([final_scores.get(hotkey, 0.0) for hotkey in hotkeys], dtype=np.float64)
+
+    def aggregate_rows(self, rows: list[tuple], today: date) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aggregate each miner's daily scores over the consistency window and the rest of the score window
+        Args:
+            rows: (miner_hotkey, date, score, total_predictions, oldest_date) tuples within the score window
+            today: the date to aggregate as of
+
+        Returns:
+            Miner hotkeys, their oldest scored dates, consistency window score sums and prediction volumes,
+            and non-consistency window scores and total day weights
+        """
+        miner_hotkeys, dates, daily_scores, total_predictions, oldest_dates = zip(*rows)
+        miners, miner_idx = np.unique(np.array(miner_hotkeys), return_inverse=True)
+        daily_scores = np.array(daily_scores, dtype=np.float64)
+        total_predictions = np.array(total_predictions, dtype=np.int64)
+        oldest_by_miner = [''] * len(miners)
+        for idx, oldest_date in zip(miner_idx.tolist(), oldest_dates):
+            oldest_by_miner[idx] = oldest_date
+
+        # Day offsets from `today`, per row and per miner
+        today_day = np.datetime64(today, 'D').astype(np.int64)
+        days_ago = today_day - np.array(dates, dtype='datetime64[D]').astype(np.int64)
+        difference = today_day - np.array(oldest_by_miner, dtype='datetime64[D]').astype(np.int64)
+
+        score_sums, prediction_volume, past_scores, total_weights = self.aggregate_arrays(miner_idx, len(miners), days_ago, daily_scores, total_predictions, difference)
+        return miners, oldest_by_miner, score_sums, prediction_volume, past_scores, total_weights
+
+    def aggregate_arrays(self, miner_idx: np.ndarray, number_of_miners: int, days_ago: np.ndarray, daily_scores: np.ndarray, total_predictions: np.ndarray, difference: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Array core of `aggregate_rows`
+        Args:
+            miner_idx: miner index of each daily score
+            number_of_miners: number of miners
+            days_ago: days between each daily score and the date to aggregate as of
+            daily_scores: score of each daily score
+            total_predictions: prediction count of each daily score
+            difference: days since each miner's oldest scored date
+
+        Returns:
+            Consistency window score sums and prediction volumes, and non-consistency window scores
+            and total day weights, per miner
+        """
+        window = self.consistency_window_duration
+        cutoff = self.score_date_cutoff
+
+        # Consistency window sums, see `_get_consistency_window_score`
+        in_window = days_ago <= window
+        score_sums = np.zeros(number_of_miners)
+        prediction_volume = np.zeros(number_of_miners, dtype=np.int64)
+        np.add.at(score_sums, miner_idx[in_window], daily_scores[in_window] * total_predictions[in_window])
+        np.add.at(prediction_volume, miner_idx[in_window], total_predictions[in_window])
+
+        # Non-consistency window scores, see `_get_non_consistency_window_score`. A float sum of weighted scores
+        # would round differently from `weighted_mean`, so each miner's exact weighted mean is kept instead
+        size_of_window = np.where(difference <= window, 0, np.minimum(cutoff - window, difference - window))
+        in_past = (days_ago > window) & (days_ago <= cutoff)
+        past_idx = miner_idx[in_past]
+        day_weights = self._calculate_day_weights(size_of_window[past_idx], days_ago[in_past] - window)
+        total_weights = np.zeros(number_of_miners, dtype=np.int64)
+        np.add.at(total_weights, past_idx, day_weights)
+        past_scores = np.zeros(number_of_miners)
+        order = np.argsort(past_idx, kind='stable')
+        past_miners, starts = np.unique(past_idx[order], return_index=True)
+        miner_scores = np.split(daily_scores[in_past][order], starts[1:])
+        miner_day_weights = np.split(day_weights[order], starts[1:])
+        for miner, scores, weights in zip(past_miners.tolist(), miner_scores, miner_day_weights):
+            past_scores[miner] = self.weighted_mean(scores.tolist(), weights.tolist())
+
+        return score_sums, prediction_volume, past_scores, total_weights
+
+    def combine_aggregates(self, difference: np.ndarray, score_sums: np.ndarray, prediction_volume: np.ndarray, past_scores: np.ndarray, total_weights: np.ndarray) -> np.ndarray:
+        """
+        Final scores from each miner's window sums, see `score`
+        Args:
+            difference: days since each miner's oldest scored date
+            score_sums: consistency window score sums
+            prediction_volume: consistency window prediction volumes
+            past_scores: non-consistency window scores, each an exact weighted mean
+            total_weights: non-consistency window total day weights
+
+        Returns:
+            Array of scores
+        """
+        window = self.consistency_window_duration
+        cutoff = self.score_date_cutoff
+        max_consistency_window_percent = 100.0
+
+        # Consistency window percent, see `_get_consistency_window_percent`
+        scaled_percent = max_consistency_window_percent + ((self.min_consistency_window_percent - max_consistency_window_percent) * (difference - window)) / (cutoff - window)
+        consistency_window_percent = np.where(
+            difference <= window,
+            max_consistency_window_percent,
+            np.where(difference >= cutoff, self.min_consistency_window_percent, scaled_percent)
+        )
+
+        # Consistency window score, see `_get_consistency_window_score`
+        consistency_window_score = np.divide(score_sums, prediction_volume, out=np.zeros(len(score_sums)), where=prediction_volume > 0)
+        score_scalar = np.select(
+            [prediction_volume == 0, prediction_volume < 5, prediction_volume < 10, prediction_volume < 15, prediction_volume < 20, prediction_volume < 25],
+            [0.0, 0.7, 0.725, 0.75, 0.8, 0.9],
+            default=1.0
+        )
+
+        # Non-consistency window score, see `_get_non_consistency_window_score`
+        non_consistency_window_score = np.where(total_weights > 0, past_scores, 0.0)
+
+        # Scale each set of scores based on hyperparameters, scalar
+        non_consistency_window_percent = 100.0 - consistency_window_percent
+        calculated_scores = ((consistency_window_score * consistency_window_percent) / 100) + ((non_consistency_window_score * non_consistency_window_percent) / 100)
+        return calculated_scores * score_scalar
+
+    @staticmethod
+    def _calculate_day_weights(size_of_non_consistency_window: np.ndarray, days_back: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `calculate_day_weight`
+        Args:
+            size_of_non_consistency_window: window size for each row
+            days_back: days back for each row
+
+        Returns:
+            Integer weight for each row
+        """
+        maximum_scalar = 100
+        minimum_scalar = 5
+        step = (maximum_scalar - minimum_scalar) / np.maximum(size_of_non_consistency_window - 1, 1)
+        weights = np.trunc(maximum_scalar - ((days_back - 1) * step)).astype(np.int64)
+        weights = np.where(size_of_non_consistency_window == 1, maximum_scalar, weights)
+        out_of_range = (days_back < 1) | (days_back > size_of_non_consistency_window)
+        return np.where(out_of_range, 0, weights)
+
     def get_size_of_non_consistency_window(self, oldest_prediction_date: datetime.date) -> int:
         """
         Calculate the size of the non-consistency window
@@ -99,9 +396,9 @@ class TimeGatedScorer:
         """
 
         # Query
-        query_string = f"SELECT date FROM daily_scores WHERE miner_hotkey = ? ORDER BY date LIMIT 1"
+        query_string = "SELECT date FROM daily_scores WHERE miner_hotkey = ? ORDER BY date LIMIT 1"
         values = (miner_hotkey, )
-        with self.database_manager.lock:
+        with self.database_manager.read_lock:
             results = self.database_manager.query_with_values(query_string, values)
 
         # Handle invalid query results
@@ -122,9 +419,9 @@ class TimeGatedScorer:
         consistency_window_cutoff = self._get_consistency_window_start_date()  # Get cutoff
 
         # Query
-        query_string = f"SELECT score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date >= ?"
+        query_string = "SELECT score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date >= ?"
         values = (miner_hotkey, consistency_window_cutoff)
-        with self.database_manager.lock:
+        with self.database_manager.read_lock:
             results = self.database_manager.query_with_values(query_string, values)
 
         # Handle invalid query results
@@ -174,7 +471,6 @@ class TimeGatedScorer:
         Returns:
             the score for the non-consistency window
         """
-        current_thread = threading.current_thread().name
         past_scores = self._get_past_scores(miner_hotkey)  # Get all past score within non-consistency window
 
         # If no scored predictions in the window, return 0
@@ -182,20 +478,41 @@ class TimeGatedScorer:
             return 0.0
 
         today = datetime.now(timezone.utc).date()  # Get today's date
-        all_scores = []  # List to hold score copies for averaging
+        scores = []
+        day_weights = []
         for result in past_scores:  # Iterate query results
             date, score, total_predictions = result  # Parse row
             date = datetime.strptime(date, "%Y-%m-%d").date()  # Format date from row
             days_back = (today - date).days - self.consistency_window_duration  # Calculate how long ago this day was
-            score_scalar = self.calculate_day_weight(size_of_non_consistency_window, days_back)  # Get scalar based on day
-
-            # Add *n* copies of this score to the list, where *n* is the value of the scalar
-            for i in range(score_scalar):
-                all_scores.append(score)
+            scores.append(score)
+            day_weights.append(self.calculate_day_weight(size_of_non_consistency_window, days_back))  # Get scalar based on day
 
-        final_score = statistics.mean(all_scores)
+        final_score = self.weighted_mean(scores, day_weights)
         return final_score
 
+    @staticmethod
+    def weighted_mean(scores: list[float], day_weights: list[int]) -> float:
+        """
+        Exact weighted mean. Equal to `statistics.mean` over a list holding *n* copies of each score,
+        where *n* is the day weight, without building that list
+        Args:
+            scores: the daily scores
+            day_weights: the integer weight of each daily score
+
+        Returns:
+            The weighted mean, or 0.0 if every weight is 0
+        """
+        total_weight = sum(day_weights)
+        if total_weight == 0:
+            return 0.0
+
+        # statistics.mean sums exactly and rounds once. Float denominators are powers of 2, so the scores
+        # share the largest one exactly, and int / int division rounds once
+        ratios = [score.as_integer_ratio() for score in scores]
+        denominator = max(ratio[1] for ratio in ratios)
+        weighted_sum = sum(numerator * (denominator // ratio_denominator) * day_weight for (numerator, ratio_denominator), day_weight in zip(ratios, day_weights))
+        return weighted_sum / (denominator * total_weight)
+
     def calculate_day_weight(self, size_of_non_consistency_window: int, days_back: int) -> int:
         """
         Calculate the weight of a day based on the number of days in the non-consistency window
@@ -235,9 +552,9 @@ class TimeGatedScorer:
         consistency_window_cutoff = self._get_consistency_window_start_date()  # Calculate consistency window start
 
         # Query finds all scores between the date cutoff and the start of the consistency window
-        query_string = f"SELECT date, score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date < ? AND date >= ?"
+        query_string = "SELECT date, score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date < ? AND date >= ?"
         values = (miner_hotkey, consistency_window_cutoff, date_cutoff)
-        with self.database_manager.lock:
+        with self.database_manager.read_lock:
             results = self.database_manager.query_with_values(query_string, values)
 
         # Handle invalid query results
@@ -0,0 +1,63 @@
+import numpy as np
+
+"""
+Vectorized tiered weight calculation. Works on UID-aligned arrays and has no torch dependency,
+so it can be reused outside the validator
+"""
+
+TOP_TIER_FRACTION = 0.1  # Top 10% of miners by score
+MIDDLE_TIER_FRACTION = 0.4  # Next 40% of miners by score
+
+"""
+20% for Dilution Reduction
+2% to Bottom Tier
+8% to Middle Tier
+70% to Top Tier
+"""
+TIER_SHARES = (0.7, 0.08, 0.02)
+
+
+def calculate_weight_vector(scores: np.ndarray, miner_uids: np.ndarray, reduction_uid: int, top_tier_fraction: float = TOP_TIER_FRACTION, middle_tier_fraction: float = MIDDLE_TIER_FRACTION, tier_shares: tuple[float, float, float] = TIER_SHARES) -> np.ndarray:
+    """
+    Calculate the final weight of every UID: miners are split into tiers by score, scores are squared,
+    and each tier's share is split in proportion to them. Whatever the tiers don't use goes to `reduction_uid`.
+    Sums accumulate left to right in score order, like the list-based calculation this replaces
+    Args:
+        scores: scores aligned to the metagraph UIDs
+        miner_uids: UIDs of the miners to weight, in UID order. Other UIDs get 0 weight
+        reduction_uid: UID that receives the remaining weight
+        top_tier_fraction: fraction of miners in the top tier
+        middle_tier_fraction: fraction of miners in the middle tier, the rest are in the bottom tier
+        tier_shares: weight shared by the top, middle and bottom tiers
+
+    Returns:
+        Array of weights aligned to the metagraph UIDs
+    """
+    weights = np.zeros(len(scores), dtype=np.float64)
+    miner_uids = np.asarray(miner_uids, dtype=np.int64)
+    n_miners = len(miner_uids)
+
+    # Highest score first. A stable sort on the negated scores keeps tied miners in UID order, like `sorted(reverse=True)`
+    order = np.argsort(-scores[miner_uids], kind='stable')
+    sorted_uids = miner_uids[order]
+    squared_scores = scores[sorted_uids] ** 2
+
+    top_size = max(1, int(top_tier_fraction * n_miners))
+    middle_size = max(1, int(middle_tier_fraction * n_miners))
+    boundaries = [0, min(top_size, n_miners), min(top_size + middle_size, n_miners), n_miners]
+
+    tier_weights = np.zeros(n_miners, dtype=np.float64)
+    for start, end, share in zip(boundaries, boundaries[1:], tier_shares):
+        tier_scores = squared_scores[start:end]
+        if len(tier_scores) == 0:
+            continue
+        sum_scores = np.cumsum(tier_scores)[-1]  # Sequential sum, matches `sum()`
+        if sum_scores > 0:
+            tier_weights[start:end] = (tier_scores / sum_scores) * share
+        else:
+            tier_weights[start:end] = (tier_scores / share) * len(tier_scores)
+
+    weights[sorted_uids] = tier_weights
+    sum_of_incentives = np.cumsum(tier_weights)[-1] if n_miners > 0 else 0.0
+    weights[reduction_uid] = 1 - sum_of_incentives
+    return weights
@@ -1,11 +1,13 @@
+import numpy as np
 import torch
 import bittensor as bt
 import traceback
 import threading
 from datetime import datetime, timezone, timedelta
+from nextplace.validator.database.miner_market_activity import MARKET_ACTIVITY_WINDOW
 from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
-from nextplace.validator.utils.contants import build_miner_predictions_table_name, \
-    get_miner_hotkeys_from_predictions_tables
+from nextplace.validator.setting_weights.tiered_weights import calculate_weight_vector
+from nextplace.validator.utils.contants import get_miner_hotkeys_from_predictions
 from nextplace import __spec_version__
 
 REDUCTION_UID = 34
@@ -41,152 +43,82 @@ class WeightSetter:
         self.timer = datetime.now(timezone.utc)  # Reset the timer
         self.set_weights()  # Set weights
 
-    def calculate_miner_scores(self) -> dict[int, float]:
+    def calculate_miner_scores(self) -> tuple[np.ndarray, np.ndarray]:
         """
         Calculate scores for miners
         Returns:
-            Scores as a dict of UID: Score
+            Scores aligned to the metagraph UIDs, and the UIDs of miners with predictions
         """
         current_thread = threading.current_thread().name
         time_gated_scorer = TimeGatedScorer(self.database_manager)
 
-        miner_hotkeys = set(get_miner_hotkeys_from_predictions_tables(self.database_manager))
-        miners = {uid: hotkey for uid, hotkey in enumerate(self.metagraph.hotkeys) if hotkey in miner_hotkeys}
-        bt.logging.debug(f"| {current_thread} | 🔎 Found {len(miners)} miners")
-        scores = {uid: 0.0 for uid in miners}
-
-        try:  # database_manager lock is already acquire at this point
-
-            average_markets = self.get_average_markets_in_range()
-            bt.logging.info(f"| {current_thread} | ⏳ Iterating the metagraph and scoring miners...")
-
-            for uid, hotkey in miners.items():
-                score = time_gated_scorer.score(hotkey)
-                table_name = build_miner_predictions_table_name(hotkey)
-
-                # Handle the case where they're only targeting specific markets
-                market_query = f"SELECT COUNT(DISTINCT(market)) FROM {table_name} WHERE prediction_timestamp >= datetime('now', '-5 days')"
-                distinct_markets = self.database_manager.query(market_query)
-
-                if len(distinct_markets) > 0:
-                    distinct_markets = distinct_markets[0][0]
-                    if distinct_markets < int(average_markets * 0.5):
-                        score = score * 0.5
-                    elif distinct_markets < int(average_markets * 0.75):
-                        score = score * 0.6
-                    elif distinct_markets < int(average_markets * 0.9):
-                        score = score * 0.75
-
-                scores[uid] = score
+        hotkeys = self.metagraph.hotkeys
+        miner_hotkeys = set(get_miner_hotkeys_from_predictions(self.database_manager))
+        miner_uids = np.array([uid for uid, hotkey in enumerate(hotkeys) if hotkey in miner_hotkeys], dtype=np.int64)
+        bt.logging.debug(f"| {current_thread} | 🔎 Found {len(miner_uids)} miners")
+        scores = np.zeros(len(hotkeys), dtype=np.float64)
+
+        try:  # Each read takes database_manager.read_lock for just that read
+
+            distinct_markets_by_miner = self.get_distinct_markets_by_miner()
+            average_markets = self.get_average_markets_in_range(distinct_markets_by_miner)
+            bt.logging.info(f"| {current_thread} | ⏳ Scoring miners...")
+            # Refreshing stale aggregates writes under database_manager.lock, so this must not run inside a read lock
+            time_gated_scores = time_gated_scorer.score_all(hotkeys)
+
+            # Handle the case where they're only targeting specific markets
+            distinct_markets = np.array([distinct_markets_by_miner.get(hotkeys[uid], 0) for uid in miner_uids], dtype=np.int64)
+            market_scalar = np.select(
+                [distinct_markets < int(average_markets * 0.5), distinct_markets < int(average_markets * 0.75), distinct_markets < int(average_markets * 0.9)],
+                [0.5, 0.6, 0.75],
+                default=1.0
+            )
+            scores[miner_uids] = time_gated_scores[miner_uids] * market_scalar
 
             bt.logging.info(f"| {current_thread} | 🧾 Miner scores calculated.")
-            return scores
+            return scores, miner_uids
 
         except Exception as e:
             bt.logging.error(f" | {current_thread} |❗Error fetching miner scores: {str(e)}")
-            return {uid: 0.0 for uid in miners}
+            return np.zeros(len(hotkeys), dtype=np.float64), miner_uids
+
+    def get_distinct_markets_by_miner(self) -> dict[str, int]:
+        """
+        Count the distinct markets each miner predicted on in the last 5 days.
+        Reads the activity kept at ingestion, one row per (miner, market)
+        Returns:
+            Map of miner hotkey -> number of distinct markets
+        """
+        market_query = """
+            SELECT miner_hotkey, COUNT(*)
+            FROM miner_market_activity
+            WHERE last_prediction_timestamp >= datetime('now', ?)
+            GROUP BY miner_hotkey
+        """
+        with self.database_manager.read_lock:
+            results = self.database_manager.query_with_values(market_query, (MARKET_ACTIVITY_WINDOW,))
+        return {hotkey: distinct_markets for hotkey, distinct_markets in results}
 
-    def get_average_markets_in_range(self) -> float:
+    def get_average_markets_in_range(self, distinct_markets_by_miner: dict[str, int]) -> float:
         """
         Calculate the average number of markets across all miners
+        Args:
+            distinct_markets_by_miner: map of miner hotkey -> number of distinct markets
+
         Returns:
             The mean number of markets across all miners
         """
         current_thread = threading.current_thread().name
         bt.logging.info(f"| {current_thread} | 🧮 Calculating market cutoff...")
-        all_table_query = "SELECT name FROM sqlite_master WHERE type='table'"
-        all_tables = [x[0] for x in self.database_manager.query(all_table_query)]  # Get all tables in database
-        predictions_tables = [s for s in all_tables if s.startswith("predictions_")]
-        total = 0
-        count = 0
-        for predictions_table in predictions_tables:
-            market_query = f"SELECT COUNT(DISTINCT(market)) FROM {predictions_table} WHERE prediction_timestamp >= datetime('now', '-5 days')"
-            with self.database_manager.lock:
-                results = self.database_manager.query(market_query)
-                if len(results) > 0:
-                    value = results[0][0]
-                    if value > 0:
-                        total += results[0][0]
-                        count += 1
+        market_counts = [value for value in distinct_markets_by_miner.values() if value > 0]
+        total = sum(market_counts)
+        count = len(market_counts)
         if count == 0:
-            bt.logging.debug(f"| {current_thread} | ❗ ERROR Found no predictions tables!")
+            bt.logging.debug(f"| {current_thread} | ❗ ERROR Found no recent predictions!")
         average = total / count
         bt.logging.info(f"| {current_thread} | 🛒 Found {average} as the average number of markets predicted on in the last 5 days")
         return average
 
-    def calculate_weights(self, scores: dict[int, float]) -> list[tuple[int, float]]:
-        """
-        Calculate weights for all miners
-        Args:
-            scores: The calculated scores for all miners
-
-        Returns:
-            List of tuples (uid, weight) for all miners
-        """
-        sorted_scores = list(sorted(scores.items(), key=lambda item: item[1], reverse=True))
-
-        top_tier, middle_tier, bottom_tier = self.get_tiers(sorted_scores)
-        weights = []
-
-        """
-        20% for Dilution Reduction
-        2% to Bottom Tier
-        8% to Middle Tier
-        70% to Top Tier
-        """
-
-        for tier, weight in [(top_tier, 0.7), (middle_tier, 0.08), (bottom_tier, 0.02)]:
-            tier_scores = self.apply_quadratic_scaling(tier)
-            calculated_weights = self.calculate_tier_weights(tier_scores, weight)
-            weights.extend(calculated_weights)
-
-        return weights
-
-    def get_tiers(self, sorted_indices: list[tuple[int, float]]) -> tuple[list[tuple[int, float]], list[tuple[int, float]], list[tuple[int, float]]]:
-        """
-        Divide the (uid, score) tuples into 3 tiers
-        Args:
-            sorted_indices: Sorted list of tuples (sorted by score)
-
-        Returns:
-            Sub lists representing the tiers
-        """
-        n_miners = len(sorted_indices)
-        top_10_pct = max(1, int(0.1 * n_miners))
-        next_40_pct = max(1, int(0.4 * n_miners))
-        top_indices = sorted_indices[:top_10_pct]
-        next_indices = sorted_indices[top_10_pct:top_10_pct + next_40_pct]
-        bottom_indices = sorted_indices[top_10_pct + next_40_pct:]
-        return top_indices, next_indices, bottom_indices
-
-    def apply_quadratic_scaling(self, tier: list[tuple[int, float]]) -> list[tuple[int, float]]:
-        """
-        Square each score
-        Args:
-            tier: The current tier
-
-        Returns:
-            The update tier list
-        """
-        return [(miner[0], miner[1] ** 2) for miner in tier]
-
-    def calculate_tier_weights(self, tier: list[tuple[int, float]], total_weight: float) -> list[tuple[int, float]]:
-        """
-        Calculate weights for all miners
-        Args:
-            tier: The tier scores for this tier
-            total_weight: The weight for this tier
-
-        Returns:
-            Tensor of weights
-        """
-        tier_scores: list[float] = [x[1] for x in tier]
-        sum_scores: float = sum(tier_scores)
-        if sum_scores > 0:
-            return [(miner[0], (miner[1] / sum_scores) * total_weight) for miner in tier]
-        else:
-            return [(miner[0], (miner[1] / total_weight) * len(tier_scores)) for miner in tier]
-
     def normalize_tuples(self, data: list[tuple[int, float]]) -> list[tuple[int, float]]:
         """
         Normalize the float values in a list of tuples to the range [0, 1].
@@ -214,21 +146,8 @@ class WeightSetter:
     def set_weights(self):
         current_thread = threading.current_thread().name
 
-        scores: dict[int, float] = self.calculate_miner_scores()
-        miner_weights: list[tuple[int, float]] = self.calculate_weights(scores)
-
-        sum_of_incentives = 0
-        for miner in miner_weights:
-            sum_of_incentives += miner[1]
-        incentive_for_reduction = 1 - sum_of_incentives
-
-        # Initialize weights tensor to 0's
-        weights: torch.Tensor = torch.tensor([0.0 for _ in range(len(self.metagraph.hotkeys))])
-
-        # Update the UID indices of the tensor with the corresponding scores
-        for miner in miner_weights:
-            weights[miner[0]] = miner[1]
-        weights[REDUCTION_UID] = incentive_for_reduction
+        scores, miner_uids = self.calculate_miner_scores()
+        weights: torch.Tensor = torch.tensor(calculate_weight_vector(scores, miner_uids, REDUCTION_UID), dtype=torch.float32)
 
         list_weights = weights.tolist()
         bt.logging.info(f"| {current_thread} | ⚖️ Calculated weights: {list_weights}")
@@ -1,4 +1,9 @@
+import queue
+import sqlite3
 import threading
+import time
+from dataclasses import dataclass
+from itertools import zip_longest
 
 import bittensor as bt
 from nextplace.protocol import RealEstateSynapse, RealEstatePrediction, RealEstatePredictions
@@ -9,40 +14,173 @@ from nextplace.validator.utils.contants import NUMBER_OF_PROPERTIES_PER_SYNAPSE
 Helper class manages creating Synapse objects
 """
 
+SYNAPSE_BUFFER_SIZE = 2  # Synapses kept built and ready for the forward pass
+PREBUILT_SYNAPSE_WAIT = 1  # Seconds to wait for the builder before building inline
+EMPTY_TABLE_RETRY_INTERVAL = 5  # Seconds between build attempts while the properties table is empty
+
+
+@dataclass
+class SynapseBuildMetrics:
+    builds: int = 0
+    misses: int = 0  # Forward passes that found no prebuilt synapse
+    total_build_seconds: float = 0.0
+    max_build_seconds: float = 0.0
+    last_build_seconds: float = 0.0
+
+    def record(self, build_seconds: float) -> None:
+        self.builds += 1
+        self.total_build_seconds += build_seconds
+        self.max_build_seconds = max(self.max_build_seconds, build_seconds)
+        self.last_build_seconds = build_seconds
+
+    def snapshot(self) -> dict[str, float]:
+        average = self.total_build_seconds / self.builds if self.builds > 0 else 0.0
+        return {
+            'builds': self.builds,
+            'misses': self.misses,
+            'avg_build_seconds': round(average, 6),
+            'max_build_seconds': round(self.max_build_seconds, 6),
+            'last_build_seconds': round(self.last_build_seconds, 6),
+        }
+
 
 class SynapseManager:
 
-    def __init__(self, database_manager: DatabaseManager):
+    def __init__(self, database_manager: DatabaseManager, buffer_size: int = SYNAPSE_BUFFER_SIZE):
         self.database_manager = database_manager
+        self.synapses: queue.Queue = queue.Queue(maxsize=buffer_size)  # Prebuilt synapses, filled by the builder thread
+        self.metrics = SynapseBuildMetrics()
+        self._metrics_lock = threading.Lock()
+        self._builder_stopped = threading.Event()
+
+    def run_synapse_builder(self) -> None:
+        """
+        RUN IN THREAD
+        Keep the synapse buffer full so the forward pass never waits on the database
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        bt.logging.info(f"| {current_thread} | 🏁 Beginning synapse builder thread")
+        self._builder_stopped.clear()
+        while not self._builder_stopped.is_set():
+            try:
+                synapse = self.build_synapse()
+            except sqlite3.OperationalError as e:
+                bt.logging.info(f"| {current_thread} | 🏖️ SQLITE operational error: {e}")
+                synapse = None
+            if synapse is None:  # Properties table is empty, wait for the PropertiesThread
+                self._builder_stopped.wait(EMPTY_TABLE_RETRY_INTERVAL)
+                continue
+            if not self._put_synapse(synapse):
+                self.return_properties(synapse)  # Stopped while waiting for room, nobody will send it
+
+    def stop_synapse_builder(self) -> None:
+        """
+        Stop the builder thread. Synapses already in the buffer are kept. Their properties stay in
+        `prebuilt_properties` until sent, and go back into `properties` on restart
+        Returns:
+            None
+        """
+        self._builder_stopped.set()
+
+    def _put_synapse(self, synapse: RealEstateSynapse) -> bool:
+        """
+        Block while the buffer is full, unless the builder is stopped
+        Args:
+            synapse: the prebuilt synapse
+
+        Returns:
+            True if the synapse was buffered, False if the builder was stopped
+        """
+        while not self._builder_stopped.is_set():
+            try:
+                self.synapses.put(synapse, timeout=PREBUILT_SYNAPSE_WAIT)
+                return True
+            except queue.Full:
+                continue
+        return False
 
     def get_synapse(self) -> RealEstateSynapse or None:
         """
-        Get a property from the `properties` table, format the synapse
+        Get the next prebuilt synapse. Builds one inline if the builder hasn't kept up
+        Returns:
+            A RealEstateSynapse to send to Miners, or None
+        """
+        try:
+            return self.synapses.get(timeout=PREBUILT_SYNAPSE_WAIT)
+        except queue.Empty:
+            with self._metrics_lock:
+                self.metrics.misses += 1
+            return self.build_synapse()
+
+    def mark_sent(self, synapse: RealEstateSynapse) -> None:
+        """
+        Forget the properties of a synapse that went out to the miners
+        Args:
+            synapse: the sent synapse
+
+        Returns:
+            None
+        """
+        with self.database_manager.lock:
+            with self.database_manager.transaction() as cursor:
+                cursor.executemany("DELETE FROM prebuilt_properties WHERE nextplace_id = ?", self._synapse_ids(synapse))
+
+    def return_properties(self, synapse: RealEstateSynapse) -> None:
+        """
+        Put the properties of a synapse that won't be sent back into the `properties` table
+        Args:
+            synapse: the unsent synapse
+
+        Returns:
+            None
+        """
+        ids = self._synapse_ids(synapse)
+        with self.database_manager.lock:
+            with self.database_manager.transaction() as cursor:
+                cursor.executemany("INSERT OR IGNORE INTO properties SELECT * FROM prebuilt_properties WHERE nextplace_id = ?", ids)
+                cursor.executemany("DELETE FROM prebuilt_properties WHERE nextplace_id = ?", ids)
+
+    @staticmethod
+    def _synapse_ids(synapse: RealEstateSynapse) -> list[tuple[str]]:
+        return [(prediction.nextplace_id,) for prediction in synapse.real_estate_predictions.predictions]
+
+    def get_metrics(self) -> dict[str, float]:
+        """
+        Get synapse build time and buffer depth metrics
+        Returns:
+            Map of metric name -> value
+        """
+        with self._metrics_lock:
+            metrics = self.metrics.snapshot()
+        metrics['queue_depth'] = self.synapses.qsize()
+        return metrics
+
+    def log_metrics(self) -> None:
+        """
+        Log synapse build time and buffer depth metrics
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        bt.logging.info(f"| {current_thread} | 📦 Synapse builder: {self.get_metrics()}")
+
+    def build_synapse(self) -> RealEstateSynapse or None:
+        """
+        Take the next round of properties out of the `properties` table, format the synapse
         Returns:
             A RealEstateSynapse to send to Miners, or None
         """
 
         current_thread = threading.current_thread().name
+        start = time.perf_counter()
         try:
-            # Query to get the next round of properties
-            retrieve_query = f'''
-                SELECT * FROM properties
-                LIMIT {NUMBER_OF_PROPERTIES_PER_SYNAPSE}
-            '''
-            property_data = self.database_manager.query(retrieve_query)  # Execute query
+            property_data = self._take_properties()
 
             if len(property_data) == 0:
                 return None
 
-            nextplace_id_index = 0
-            row_ids = [row[nextplace_id_index] for row in property_data]  # Extract unique ID's
-            formatted_ids = ','.join(f"'{str(nextplace_id)}'" for nextplace_id in row_ids)
-            delete_query = f'''
-                    DELETE FROM properties
-                    WHERE nextplace_id IN ({formatted_ids})
-                '''
-            self.database_manager.query_and_commit(delete_query)  # Remove the retrieved rows from the database
-
             outgoing_data = []
 
             for property_datum in property_data:  # Iterate db responses
@@ -60,14 +198,101 @@ class SynapseManager:
             real_estate_predictions = RealEstatePredictions(predictions=outgoing_data)
             synapse = RealEstateSynapse.create(real_estate_predictions=real_estate_predictions)
             market_name_index = 20
-            market = property_data[0][market_name_index]
-            bt.logging.info(f"| {current_thread} | ✉️ Created Synapse with {len(outgoing_data)} properties in {market}")
+            number_of_markets = len(set(row[market_name_index] for row in property_data))
+            build_seconds = time.perf_counter() - start
+            with self._metrics_lock:
+                self.metrics.record(build_seconds)
+            bt.logging.info(f"| {current_thread} | ✉️ Created Synapse with {len(outgoing_data)} properties in {number_of_markets} markets in {build_seconds:.3f}s")
             return synapse
 
         except IndexError:
             bt.logging.info(f"| {current_thread} | ❗No property data available")
             return None
 
+    def _take_properties(self) -> list[tuple]:
+        """
+        Select the next round of properties, balanced across markets, and move them from the `properties` table
+        to `prebuilt_properties` in one transaction. They are deleted once the synapse is sent, see `mark_sent`
+        Returns:
+            The property rows, interleaved by market
+        """
+        hold_query = "INSERT OR REPLACE INTO prebuilt_properties SELECT * FROM properties WHERE nextplace_id = ?"
+        delete_query = "DELETE FROM properties WHERE nextplace_id = ?"
+        with self.database_manager.lock:
+            with self.database_manager.transaction() as cursor:
+                markets = self._get_markets(cursor)
+                property_data = self._select_round_robin(cursor, markets)
+                nextplace_id_index = 0
+                ids = [(row[nextplace_id_index],) for row in property_data]
+                cursor.executemany(hold_query, ids)
+                cursor.executemany(delete_query, ids)
+        return property_data
+
+    @staticmethod
+    def _get_markets(cursor) -> list[str or None]:
+        """
+        Find the markets in the `properties` table. Skips through the (market, query_date) index one market at a
+        time, so the cost grows with the number of markets rather than the number of properties.
+        Properties without a market get a bucket of their own, None, after the named markets
+        Args:
+            cursor: a database cursor
+
+        Returns:
+            The distinct markets
+        """
+        cursor.execute('''
+            WITH RECURSIVE markets(market) AS (
+                SELECT MIN(market) FROM properties
+                UNION ALL
+                SELECT (SELECT MIN(market) FROM properties WHERE market > markets.market)
+                FROM markets
+                WHERE markets.market IS NOT NULL
+            )
+            SELECT market FROM markets WHERE market IS NOT NULL
+        ''')
+        markets = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT 1 FROM properties WHERE market IS NULL LIMIT 1")
+        if cursor.fetchone() is not None:
+            markets.append(None)
+        return markets
+
+    @staticmethod
+    def _select_round_robin(cursor, markets: list[str or None]) -> list[tuple]:
+        """
+        Give each market an equal share of the synapse, oldest properties first. Shares left over by small markets
+        are handed to the markets that still have properties
+        Args:
+            cursor: a database cursor
+            markets: the markets to draw from
+
+        Returns:
+            Up to NUMBER_OF_PROPERTIES_PER_SYNAPSE property rows, interleaved by market
+        """
+        query = '''
+            SELECT * FROM properties
+            WHERE market IS ?
+            ORDER BY query_date
+            LIMIT ? OFFSET ?
+        '''
+        rows_by_market = {market: [] for market in markets}
+        open_markets = list(markets)
+        remaining = NUMBER_OF_PROPERTIES_PER_SYNAPSE
+        while remaining > 0 and len(open_markets) > 0:
+            share = -(-remaining // len(open_markets))  # Round up, the excess is trimmed below
+            still_open = []
+            for market in open_markets:
+                cursor.execute(query, (market, share, len(rows_by_market[market])))
+                rows = cursor.fetchall()
+                rows_by_market[market].extend(rows)
+                remaining -= len(rows)
+                if len(rows) == share:  # This market may have more
+                    still_open.append(market)
+            open_markets = still_open
+
+        # Interleave markets: first property of each market, then the second of each, ...
+        interleaved = [row for rows in zip_longest(*rows_by_market.values()) for row in rows if row is not None]
+        return interleaved[:NUMBER_OF_PROPERTIES_PER_SYNAPSE]
+
     def _property_from_database_row(self, property_data: any) -> RealEstatePrediction:
         """
         Convert API response to a RealEstatePrediction object
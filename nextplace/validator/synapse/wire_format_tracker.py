@@ -0,0 +1,51 @@
+import threading
+import bittensor as bt
+from nextplace.protocol import RealEstateSynapse, COLUMNAR_WIRE_FORMAT_VERSION
+
+"""
+Helper class remembers which miners understand the columnar synapse format
+"""
+
+
+class WireFormatTracker:
+
+    def __init__(self):
+        self.columnar_hotkeys: set[str] = set()
+
+    def split_uids(self, hotkeys: list[str]) -> tuple[list[int], list[int]]:
+        """
+        Split UIDs by the format their miner understands
+        Args:
+            hotkeys: metagraph hotkeys
+
+        Returns:
+            (legacy UIDs, columnar UIDs)
+        """
+        legacy_uids = []
+        columnar_uids = []
+        for uid, hotkey in enumerate(hotkeys):
+            if hotkey in self.columnar_hotkeys:
+                columnar_uids.append(uid)
+            else:
+                legacy_uids.append(uid)
+        return legacy_uids, columnar_uids
+
+    def record(self, hotkey: str, response: RealEstateSynapse) -> None:
+        """
+        Update what we know about a miner from its response. Failed responses tell us nothing
+        Args:
+            hotkey: the miner's hotkey
+            response: the miner's response synapse
+
+        Returns:
+            None
+        """
+        if not response.is_success:
+            return
+        if response.supported_wire_format_version >= COLUMNAR_WIRE_FORMAT_VERSION:
+            if hotkey not in self.columnar_hotkeys:
+                current_thread = threading.current_thread().name
+                bt.logging.debug(f"| {current_thread} | 🗜️ Miner '{hotkey}' supports the columnar synapse format")
+            self.columnar_hotkeys.add(hotkey)
+        else:
+            self.columnar_hotkeys.discard(hotkey)  # Miner was downgraded
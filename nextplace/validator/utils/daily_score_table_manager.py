@@ -1,7 +1,7 @@
 import statistics
 from datetime import datetime, timezone
 from nextplace.validator.database.database_manager import DatabaseManager
-from nextplace.validator.utils.contants import ISO8601
+from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
 
 
 class DailyScoreTableManager:
@@ -69,6 +69,7 @@ class DailyScoreTableManager:
 
         """
         miner_data_map = {}
+        rows_to_score = []
         data = self.database_manager.query("""
                 SELECT 
                     miner_hotkey,
@@ -103,51 +104,27 @@ class DailyScoreTableManager:
             if formatted_score_date >= miner_date:
                 continue
 
+            rows_to_score.append(row)
+
+        if len(rows_to_score) == 0:
+            return miner_data_map
+
+        # Score all rows at once
+        scores, valid = ScoringCalculator.calculate_scores([(x[0], x[2], x[4], x[3], x[5]) for x in rows_to_score])
+        for row, score, is_valid in zip(rows_to_score, scores, valid):
+            if not is_valid:
+                continue
+            miner_hotkey, date = row[0], row[1]
+
             # Build map objects
             if miner_hotkey not in miner_data_map:
                 miner_data_map[miner_hotkey] = {}
             if date not in miner_data_map[miner_hotkey]:
                 miner_data_map[miner_hotkey][date] = []
-            score = self.calculate_score(sale_price, predicted_price, sale_date, predicted_date)
-            miner_data_map[miner_hotkey][date].append(score)
+            miner_data_map[miner_hotkey][date].append(float(score))
 
         return miner_data_map
 
-    def calculate_score(self, actual_price: str, predicted_price: str, actual_date: str, predicted_date: str):
-        """
-        Taken from the scoring module
-        Args:
-            actual_price: actual sale price
-            predicted_price: predicted sale price
-            actual_date: actual sale date
-            predicted_date: predicted sale date
-
-        Returns:
-            The score for this prediction
-        """
-        # Convert date strings to datetime objects
-        actual_date = datetime.strptime(actual_date, ISO8601).date()
-
-        try:
-            predicted_date = datetime.strptime(predicted_date, "%Y-%m-%d").date()
-        except ValueError:
-            return None
-
-        # Calculate the absolute difference in days
-        date_difference = abs((actual_date - predicted_date).days)
-
-        # Score based on date accuracy (14 points max, 1 point deducted per day off)
-        date_score = (max(0, 14 - date_difference) / 14) * 100
-
-        # Calculate price accuracy
-        price_difference = abs(float(actual_price) - float(predicted_price)) / float(actual_price)
-        price_score = max(0, 100 - (price_difference * 100))
-
-        # Combine scores (86% weight to price, 14% weight to date)
-        final_score = (price_score * 0.86) + (date_score * 0.14)
-
-        return final_score
-
     def update_daily_scores(self, miner_data_map) -> None:
         """
         Update the daily_scores table
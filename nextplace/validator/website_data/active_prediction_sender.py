@@ -1,17 +1,23 @@
 import threading
-from nextplace.validator.website_data.website_communicator import WebsiteCommunicator
-import queue
-from time import sleep
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+import bittensor as bt
+from nextplace.validator.website_data.prediction_feed import PredictionFeed
+from nextplace.validator.website_data.website_communicator import SendResult, WebsiteCommunicator
+from nextplace.validator.website_data.website_outbox import WebsiteOutbox
 import asyncio
 
 MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL = 5  # Seconds before a partial batch is sent anyway
+MAX_PENDING_BATCHES = 16  # Batches handed to the event loop but not yet sent. Beyond this, the sender waits
 
 
 class ActivePredictionSender:
 
-    def __init__(self, data_queue: queue.LifoQueue):
-        self.website_communicator = WebsiteCommunicator('Predictions')
-        self.data_queue = data_queue
+    def __init__(self, prediction_feed: PredictionFeed, compress: bool = False, website_outbox: WebsiteOutbox or None = None):
+        self.website_communicator = WebsiteCommunicator('Predictions', compress=compress)
+        self.prediction_feed = prediction_feed
+        self.website_outbox = website_outbox  # Batches that can't be delivered are retried from here
+        self.pending_batches: set[Future] = set()
         self.running = True  # Flag for graceful shutdown
         self.loop = asyncio.new_event_loop()  # Create a new event loop for async tasks
         self.thread = threading.Thread(target=self.start_event_loop, daemon=True, name="🧶 PredictionSenderEventLoop 🧶")
@@ -23,25 +29,57 @@ class ActivePredictionSender:
         self.loop.run_forever()
 
     def run(self):
-        while self.running:  # Infinite loop
-            batch = []  # Current batch
+        """
+        RUN IN THREAD
+        Send predictions to the website in batches, as soon as a batch fills or the flush interval passes
+        Returns:
+            None
+        """
+        while self.running:
+            batch = self.prediction_feed.get_batch(MAX_BATCH_SIZE, FLUSH_INTERVAL)
+            if len(batch) == 0:
+                continue
+            data = [prediction.to_dict() for prediction in batch]
 
-            try:
-                for _ in range(MAX_BATCH_SIZE):  # Iterate
-                    item = self.data_queue.get(timeout=5)  # Timeout prevents indefinite blocking
-                    batch.append(item)  # Put item into the batch
-                    self.data_queue.task_done()  # Mark item as processed
+            # Wait while too many batches are waiting on the website, predictions queue up in the bounded feed meanwhile
+            self.pending_batches = {future for future in self.pending_batches if not future.done()}
+            while len(self.pending_batches) >= MAX_PENDING_BATCHES:
+                _, self.pending_batches = wait(self.pending_batches, return_when=FIRST_COMPLETED)
 
-                # Schedule the async call without blocking
-                asyncio.run_coroutine_threadsafe(self.website_communicator.send_data_async(batch), self.loop)
+            # Schedule the async call without blocking
+            self.pending_batches.add(asyncio.run_coroutine_threadsafe(self._send_batch(data), self.loop))
 
-            except queue.Empty:
-                sleep(5)  # Wait for items to populate the queue
-                continue
+    async def _send_batch(self, data: list[dict]) -> None:
+        """
+        Send a batch to the website. If it can't be delivered, hand it to the outbox to retry.
+        If the website rejects it, retrying won't help, so it is dead-lettered instead
+        Args:
+            data: website payloads
+
+        Returns:
+            None
+        """
+        result = await self.website_communicator.send_data_async(data)
+        if result is SendResult.SENT or self.website_outbox is None:
+            return
+        if result is SendResult.REJECTED:
+            self.website_outbox.dead_letter('Predictions', data)
+        else:
+            self.website_outbox.enqueue('Predictions', data, batchable=True)
+
+    def log_metrics(self) -> None:
+        """
+        Log prediction feed depth and drop metrics
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        bt.logging.info(f"| {current_thread} | 🛰 Prediction feed: {self.prediction_feed.get_metrics()}")
 
     def stop(self):
         """Gracefully stop the sender."""
         self.running = False
         if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.website_communicator.close_async(), self.loop).result(timeout=10)
             self.loop.call_soon_threadsafe(self.loop.stop)
         self.thread.join()
@@ -1,19 +1,20 @@
 from datetime import timezone, datetime, timedelta
-from sqlite3 import OperationalError
 
 import threading
 import bittensor as bt
 
 from nextplace.validator.database.database_manager import DatabaseManager
-from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
-from nextplace.validator.utils.contants import ISO8601, get_miner_hotkeys_from_predictions_tables
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer, AGGREGATES_QUERY
+from nextplace.validator.utils.contants import ISO8601
 from nextplace.validator.website_data.website_communicator import WebsiteCommunicator
+from nextplace.validator.website_data.website_outbox import WebsiteOutbox
 
 
 class MinerScoreSender:
 
-    def __init__(self, database_manager: DatabaseManager):
+    def __init__(self, database_manager: DatabaseManager, website_outbox: WebsiteOutbox or None = None):
         self.database_manager = database_manager
+        self.website_outbox = website_outbox
 
     def _get_empty_score_date_map(self, score_cutoff_date: datetime.date) -> dict:
         end_date = datetime.today().date()
@@ -24,6 +25,72 @@ class MinerScoreSender:
             current_date += timedelta(days=1)
         return date_score_map
 
+    def _read_snapshot(self, score_cutoff_date: datetime.date) -> tuple[list[tuple], list[tuple], list[tuple]]:
+        """
+        Read everything the export needs in one read transaction, so every query sees the same database state
+        Args:
+            score_cutoff_date: start of the score window
+
+        Returns:
+            (miner hotkey, unscored prediction count) rows, (miner hotkey, date, total predictions) rows in the window,
+            and score aggregate rows, see `AGGREGATES_QUERY`
+        """
+        with self.database_manager.read_lock:
+            with self.database_manager.transaction() as cursor:
+                cursor.execute("SELECT miner_hotkey, COUNT(*) FROM predictions GROUP BY miner_hotkey")
+                prediction_counts = cursor.fetchall()
+                cursor.execute("SELECT miner_hotkey, date, total_predictions FROM daily_scores WHERE date >= ?", (score_cutoff_date.strftime("%Y-%m-%d"),))
+                daily_total_rows = cursor.fetchall()
+                cursor.execute(AGGREGATES_QUERY)
+                aggregate_rows = cursor.fetchall()
+        return prediction_counts, daily_total_rows, aggregate_rows
+
+    def build_miner_scores(self) -> list[dict]:
+        """
+        Build the website payload for every miner with unscored predictions
+        Returns:
+            List of miner score objects
+        """
+        now = datetime.now(timezone.utc).strftime(ISO8601)
+        today = datetime.now(timezone.utc).date()
+        time_gated_scorer = TimeGatedScorer(self.database_manager)
+        score_cutoff_date = time_gated_scorer.get_score_cutoff_date()
+        time_gated_scorer.ensure_aggregates(today)
+        prediction_counts, daily_total_rows, aggregate_rows = self._read_snapshot(score_cutoff_date)
+        if not time_gated_scorer.aggregates_are_current(aggregate_rows, today):  # Daily scores changed since the refresh
+            with self.database_manager.lock:  # Holds off writers, so this snapshot is current
+                time_gated_scorer.ensure_aggregates(today)
+                prediction_counts, daily_total_rows, aggregate_rows = self._read_snapshot(score_cutoff_date)
+
+        # Everything below works on the snapshot, without the lock
+        hotkeys = [hotkey for hotkey, _ in prediction_counts]
+        time_gated_scores = time_gated_scorer.score_aggregates(hotkeys, aggregate_rows, today).tolist()
+        daily_totals_by_miner: dict[str, list[tuple[str, int]]] = {}
+        for miner_hotkey, score_date, total_predictions in daily_total_rows:
+            daily_totals_by_miner.setdefault(miner_hotkey, []).append((score_date, total_predictions))
+
+        empty_date_score_map = self._get_empty_score_date_map(score_cutoff_date)
+        data_to_send = []
+        for (hotkey, total_predictions), score in zip(prediction_counts, time_gated_scores):
+            date_score_map = dict(empty_date_score_map)
+            num_predictions = 0
+            for score_date, total_scored in daily_totals_by_miner.get(hotkey, []):
+                date_score_map[score_date] = total_scored
+                num_predictions += total_scored
+            scored_list = [{'date': key, 'totalScored': value} for key, value in date_score_map.items()]
+            scored_list.sort(key=lambda x: x['date'], reverse=True)
+            data = {
+                "minerHotKey": hotkey,
+                "minerColdKey": "N/A",
+                "minerScore": score,
+                "numPredictions": num_predictions,
+                "scoreGenerationDate": now,
+                "totalPredictions": total_predictions,
+                "minerDatedScores": scored_list
+            }
+            data_to_send.append(data)
+        return data_to_send
+
     def send_miner_scores_to_website(self) -> None:
         """
         RUN IN THREAD
@@ -32,44 +99,12 @@ class MinerScoreSender:
             None
         """
         current_thread = threading.current_thread().name
-        data_to_send = []
         bt.logging.info(f"| {current_thread} | 💾 Gathering miner data for web server")
-
-        now = datetime.now(timezone.utc).strftime(ISO8601)
-        time_gated_scorer = TimeGatedScorer(self.database_manager)
-        score_cutoff_date = time_gated_scorer.get_score_cutoff_date()
-        hotkeys = get_miner_hotkeys_from_predictions_tables(self.database_manager)
-        for hotkey in hotkeys:
-            date_score_map = self._get_empty_score_date_map(score_cutoff_date)
-
-            with self.database_manager.lock:
-                score = time_gated_scorer.score(hotkey)
-                query = "SELECT date, total_predictions FROM daily_scores WHERE miner_hotkey= ? AND date >= ?"
-                values = (hotkey, score_cutoff_date)
-                results = self.database_manager.query_with_values(query, values)
-                num_predictions = 0
-                for result in results:
-                    date = result[0]
-                    total_scored = result[1]
-                    date_score_map[date] = total_scored
-                    num_predictions += result[1]
-                try:
-                    total_predictions = self.database_manager.get_size_of_table(f"predictions_{hotkey}")
-                except OperationalError or IndexError:
-                    total_predictions = 0
-                scored_list = [{'date': key, 'totalScored': value} for key, value in date_score_map.items()]
-                scored_list.sort(key=lambda x: x['date'], reverse=True)
-                data = {
-                    "minerHotKey": hotkey,
-                    "minerColdKey": "N/A",
-                    "minerScore": score,
-                    "numPredictions": num_predictions,
-                    "scoreGenerationDate": now,
-                    "totalPredictions": total_predictions,
-                    "minerDatedScores": scored_list
-                }
-                data_to_send.append(data)
+        data_to_send = self.build_miner_scores()
 
         bt.logging.info(f"| {current_thread} | ⛵ Sending {len(data_to_send)} miner scores to website")
+        if self.website_outbox is not None:
+            self.website_outbox.enqueue("/Miner/Scores", data_to_send)
+            return
         website_communicator = WebsiteCommunicator("/Miner/Scores")
         website_communicator.send_data(data=data_to_send)
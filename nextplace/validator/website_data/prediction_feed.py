@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, NamedTuple
+
+"""
+Bounded buffer of predictions waiting to be sent to the website
+"""
+
+DEFAULT_FEED_CAPACITY = 200_000  # Predictions held in memory, a little under one step from every miner
+DROP_OLDEST = 'drop_oldest'  # When full, overwrite the oldest prediction
+DROP_NEWEST = 'drop_newest'  # When full, refuse new predictions
+SPILL = 'spill'  # When full, hand the oldest predictions to a spill handler
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, SPILL)
+SPILL_CHUNK_SIZE = 5000  # Predictions handed to the spill handler at a time
+
+
+class WebsitePrediction(NamedTuple):
+    nextplace_id: str
+    miner_hotkey: str
+    predicted_sale_price: float
+    predicted_sale_date: str  # Website format
+    prediction_date: str  # Website format
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Build the website payload for this prediction
+        Returns:
+            The prediction, as the website expects it
+        """
+        return {
+            "nextplaceId": self.nextplace_id,
+            "minerHotKey": self.miner_hotkey,
+            "minerColdKey": "DummyColdKey",
+            "predictionScore": -1,  # ToDo We should probably set this to `None` to indicate that it has not been scored yet, but need to update web server first
+            "predictionDate": self.prediction_date,
+            "predictedSalePrice": self.predicted_sale_price,
+            "predictedSaleDate": self.predicted_sale_date,
+        }
+
+
+@dataclass
+class PredictionFeedMetrics:
+    enqueued: int = 0
+    dequeued: int = 0
+    dropped: int = 0  # Lost to the overflow policy
+    spilled: int = 0  # Handed to the spill handler
+    max_depth: int = 0
+
+    def snapshot(self, depth: int) -> dict[str, int]:
+        return {
+            'depth': depth,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'dequeued': self.dequeued,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+        }
+
+
+class PredictionFeed:
+
+    def __init__(
+            self,
+            capacity: int = DEFAULT_FEED_CAPACITY,
+            overflow_policy: str = DROP_OLDEST,
+            spill_handler: Callable[[list[WebsitePrediction]], None] or None = None
+    ):
+        if capacity <= 0:
+            raise ValueError(f"Feed capacity must be positive, got {capacity}")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}', expected one of {OVERFLOW_POLICIES}")
+        if overflow_policy == SPILL and spill_handler is None:
+            raise ValueError("The spill policy needs a spill handler")
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.spill_handler = spill_handler
+        self.metrics = PredictionFeedMetrics()
+        self._predictions: deque[WebsitePrediction] = deque()  # Oldest on the left
+        self._not_empty = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._predictions)
+
+    def put_many(self, predictions: Iterable[WebsitePrediction]) -> None:
+        """
+        Add predictions to the feed, applying the overflow policy if it is full
+        Args:
+            predictions: predictions to send to the website
+
+        Returns:
+            None
+        """
+        spilled: list[WebsitePrediction] = []
+        with self._not_empty:
+            for prediction in predictions:
+                if len(self._predictions) >= self.capacity:
+                    if self.overflow_policy == DROP_NEWEST:
+                        self.metrics.dropped += 1
+                        continue
+                    if self.overflow_policy == DROP_OLDEST:
+                        self._predictions.popleft()
+                        self.metrics.dropped += 1
+                    else:  # Free a chunk at once, so the spill handler sees a few large writes
+                        for _ in range(min(SPILL_CHUNK_SIZE, len(self._predictions))):
+                            spilled.append(self._predictions.popleft())
+                self._predictions.append(prediction)
+                self.metrics.enqueued += 1
+            self.metrics.max_depth = max(self.metrics.max_depth, len(self._predictions))
+            self._not_empty.notify()
+        if len(spilled) > 0:  # Outside the lock, the handler may do I/O
+            self.spill_handler(spilled)
+            with self._not_empty:
+                self.metrics.spilled += len(spilled)
+
+    def put(self, prediction: WebsitePrediction) -> None:
+        """
+        Add one prediction to the feed
+        Args:
+            prediction: prediction to send to the website
+
+        Returns:
+            None
+        """
+        self.put_many((prediction,))
+
+    def get_batch(self, max_size: int, max_wait: float) -> list[WebsitePrediction]:
+        """
+        Wait until a full batch is ready or `max_wait` has passed, then take up to `max_size` predictions, newest first
+        Args:
+            max_size: most predictions to take
+            max_wait: seconds to wait for a full batch
+
+        Returns:
+            The batch, which is empty if nothing arrived in time
+        """
+        deadline = time.monotonic() + max_wait
+        with self._not_empty:
+            while len(self._predictions) < max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+            pop = self._predictions.pop
+            batch = [pop() for _ in range(min(max_size, len(self._predictions)))]
+            self.metrics.dequeued += len(batch)
+            return batch
+
+    def get_metrics(self) -> dict[str, int]:
+        """
+        Get feed depth and drop metrics
+        Returns:
+            Map of metric name -> value
+        """
+        with self._not_empty:
+            return self.metrics.snapshot(len(self._predictions))
@@ -1,75 +1,206 @@
+import asyncio
+import enum
+import gzip
+import json
+import random
 import threading
+import time
 from typing import Any
 import aiohttp
 import requests
 import bittensor as bt
+from requests.adapters import HTTPAdapter
+
+API_BASE = "https://dev-nextplace-api.azurewebsites.net"
+MAX_IN_FLIGHT_REQUESTS = 4  # Concurrent async requests per communicator
+MAX_RETRIES = 3  # Retries after the first attempt, for connection errors and retryable statuses
+RETRY_BASE_DELAY = 0.5  # Seconds, doubled every retry
+RETRY_MAX_DELAY = 10  # Seconds
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_CLIENT_STATUSES = {401, 403, 408, 429}  # Client errors about the request, not the data. Other 4xx reject the data
+REQUEST_TIMEOUT = 60  # Seconds
+GZIP_MIN_BYTES = 1024  # Smaller bodies are sent as-is, compressing them saves nothing
+
+_requests_session: requests.Session or None = None
+_requests_session_lock = threading.Lock()
+
+
+def _get_requests_session() -> requests.Session:
+    """
+    Get the process-wide requests session, so synchronous sends reuse pooled keep-alive connections
+    Returns:
+        The shared session
+    """
+    global _requests_session
+    with _requests_session_lock:
+        if _requests_session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_maxsize=MAX_IN_FLIGHT_REQUESTS))
+            session.mount('http://', HTTPAdapter(pool_maxsize=MAX_IN_FLIGHT_REQUESTS))
+            _requests_session = session
+        return _requests_session
+
+
+class SendResult(enum.Enum):
+    SENT = 'sent'
+    FAILED = 'failed'  # Couldn't be delivered right now, worth sending again later
+    REJECTED = 'rejected'  # The website refused the data itself, sending it again won't help
+
+    def __bool__(self) -> bool:
+        return self is SendResult.SENT
+
+
+def _failure_result(status: int) -> SendResult:
+    """
+    Classify an unsuccessful response
+    Args:
+        status: HTTP status code
+
+    Returns:
+        REJECTED for client errors about the data, otherwise FAILED
+    """
+    if 400 <= status < 500 and status not in TRANSIENT_CLIENT_STATUSES:
+        return SendResult.REJECTED
+    return SendResult.FAILED
+
+
+def _retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, so retries from many senders don't arrive together
+    Args:
+        attempt: number of attempts made so far
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
 
 
 class WebsiteCommunicator:
 
-    def __init__(self, endpoint: str, suppress_errors: bool = False):
-        api_base = "https://dev-nextplace-api.azurewebsites.net"
+    def __init__(self, endpoint: str, suppress_errors: bool = False, compress: bool = False, max_in_flight: int = MAX_IN_FLIGHT_REQUESTS, api_base: str = API_BASE):
         self.endpoint = f"{api_base}/{endpoint}"
         self.suppress_errors = suppress_errors
+        self.compress = compress
+        self.max_in_flight = max_in_flight
         self.headers = {'Accept': '*/*', 'Content-Type': 'application/json'}
+        self._async_session: aiohttp.ClientSession or None = None  # Created on the event loop that uses it
+        self._in_flight: asyncio.Semaphore or None = None
 
+    def _build_body(self, data: list[dict[str, Any]] or dict[str, Any]) -> tuple[bytes, dict[str, str]]:
+        """
+        Serialize a request body, gzipping it if compression is on and the body is large enough to benefit
+        Args:
+            data: list of data objects, or one data object
+
+        Returns:
+            The body, and the headers to send with it
+        """
+        body = json.dumps(data).encode()
+        if not self.compress or len(body) < GZIP_MIN_BYTES:
+            return body, self.headers
+        return gzip.compress(body, compresslevel=5), {**self.headers, 'Content-Encoding': 'gzip'}
 
-    def send_data(self, data: list[dict[str, Any]] or dict[str, Any]) -> None:
+    def send_data(self, data: list[dict[str, Any]] or dict[str, Any]) -> SendResult:
         """
         Send data to the nextplace website server
         Args:
             data: list of data objects
 
         Returns:
-            None
+            SENT if the website accepted the data, REJECTED if it refused it, FAILED otherwise. Only SENT is truthy
         """
         current_thread = threading.current_thread().name
+        body, headers = self._build_body(data)
+        session = _get_requests_session()
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = session.post(
+                    self.endpoint,
+                    data=body,
+                    headers=headers,
+                    timeout=REQUEST_TIMEOUT
+                )
+                if response.status_code in RETRYABLE_STATUSES and attempt < MAX_RETRIES:
+                    time.sleep(_retry_delay(attempt))
+                    continue
+                response.raise_for_status()
+                bt.logging.info(f"| {current_thread} | ✅ Data sent to Nextplace web server successfully.")
+                return SendResult.SENT
+
+            except requests.exceptions.HTTPError as e:
+                if not self.suppress_errors:
+                    bt.logging.warning(f"| {current_thread} | ❗ HTTP error occurred: {e}. Data: {data}.")
+                if e.response is not None and not self.suppress_errors:
+                    bt.logging.warning(f"| {current_thread} | ❗ Error sending data to web server. Response content: {e.response.text}")
+                return _failure_result(e.response.status_code) if e.response is not None else SendResult.FAILED
+            except requests.exceptions.RequestException as e:
+                if attempt < MAX_RETRIES:
+                    time.sleep(_retry_delay(attempt))
+                    continue
+                if not self.suppress_errors:
+                    bt.logging.warning(f"| {current_thread} | ❗ Error sending data to web server. An error occurred while sending data: {e}. No data was sent to the Nextplace site.")
+        return SendResult.FAILED
+
+    async def _get_async_session(self) -> aiohttp.ClientSession:
+        """
+        Get this communicator's aiohttp session, creating it on first use.
+        The connector keeps connections alive between batches and caps them at `max_in_flight`
+        Returns:
+            The session
+        """
+        if self._async_session is None or self._async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self._async_session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._async_session
 
-        try:
-            response = requests.post(
-                self.endpoint,
-                json=data,
-                headers=self.headers
-            )
-            response.raise_for_status()
-            bt.logging.info(f"| {current_thread} | ✅ Data sent to Nextplace web server successfully.")
-
-        except requests.exceptions.HTTPError as e:
-            if not self.suppress_errors:
-                bt.logging.warning(f"| {current_thread} | ❗ HTTP error occurred: {e}. Data: {data}.")
-            if e.response is not None and not self.suppress_errors:
-                bt.logging.warning(f"| {current_thread} | ❗ Error sending data to web server. Response content: {e.response.text}")
-        except requests.exceptions.RequestException as e:
-            if not self.suppress_errors:
-                bt.logging.warning(f"| {current_thread} | ❗ Error sending data to web server. An error occurred while sending data: {e}. No data was sent to the Nextplace site.")
-
-
-    async def send_data_async(self, data: list[dict[str, Any]]) -> None:
+    async def send_data_async(self, data: list[dict[str, Any]]) -> SendResult:
         """
         asynchronously sends data to the web server
         Args:
             data:
                 dict or list of dicts representing data points
         Returns:
-            None
+            SENT if the website accepted the data, REJECTED if it refused it, FAILED otherwise. Only SENT is truthy
         """
         current_thread = threading.current_thread().name
+        body, headers = self._build_body(data)
+        session = await self._get_async_session()
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                        self.endpoint,
-                        json=data,
-                        headers=self.headers
-                ) as response:
-                    response_text = await response.text()
-                    if response.status == 200 or response.status == 201:
-                        pass
-                    else:
+        async with self._in_flight:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    async with session.post(
+                            self.endpoint,
+                            data=body,
+                            headers=headers
+                    ) as response:
+                        response_text = await response.text()
+                        if response.status == 200 or response.status == 201:
+                            return SendResult.SENT
+                        if response.status in RETRYABLE_STATUSES and attempt < MAX_RETRIES:
+                            await asyncio.sleep(_retry_delay(attempt))
+                            continue
                         if not self.suppress_errors:
                             bt.logging.warning(
                                 f"| {current_thread} | ❗ Error sending data to web server. Status: {response.status}, Response content: {response_text}")
-            except aiohttp.ClientError as e:
-                if not self.suppress_errors:
-                    bt.logging.warning(
-                        f"| {current_thread} | ❗ Error sending data to web server asynchronously. An error occurred: {e}. No data was sent to the Nextplace site.")
+                        return _failure_result(response.status)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt < MAX_RETRIES:
+                        await asyncio.sleep(_retry_delay(attempt))
+                        continue
+                    if not self.suppress_errors:
+                        bt.logging.warning(
+                            f"| {current_thread} | ❗ Error sending data to web server asynchronously. An error occurred: {e}. No data was sent to the Nextplace site.")
+        return SendResult.FAILED
+
+    async def close_async(self) -> None:
+        """
+        Close the aiohttp session. Call from the event loop that used it
+        Returns:
+            None
+        """
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
@@ -0,0 +1,338 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+import bittensor as bt
+from nextplace.validator.website_data.prediction_feed import WebsitePrediction
+from nextplace.validator.website_data.website_communicator import SendResult, WebsiteCommunicator
+
+"""
+Durable, append-only outbox of website uploads. Senders append to an open segment file on local disk and return
+right away; the drainer thread seals segments and ships them to the website, resuming where it left off after a restart
+"""
+
+OUTBOX_DIRECTORY = 'data/outbox'
+DEFAULT_MAX_OUTBOX_BYTES = 512 * 1024 * 1024  # Oldest segments are evicted beyond this
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024  # Seal the open segment once it reaches this size
+SEGMENT_MAX_AGE = 10  # Seconds before a partly filled segment is sealed anyway
+DRAIN_BATCH_SIZE = 500  # Max items per request, for batchable uploads
+DRAIN_INTERVAL = 5  # Seconds between drain passes while there is nothing to send
+DRAIN_FAILURE_BACKOFF = 60  # Seconds to wait after the website rejects a batch
+OPEN_SEGMENT_SUFFIX = '.open'
+SEALED_SEGMENT_SUFFIX = '.seg'
+PROGRESS_SUFFIX = '.progress'  # Number of records already shipped from a sealed segment
+DEAD_LETTER_FILE = 'rejected.jsonl'  # Uploads the website refused, kept for inspection instead of retried
+DEAD_LETTER_MAX_BYTES = 64 * 1024 * 1024  # The dead letter file is rotated once, to `.1`, beyond this
+
+
+@dataclass
+class WebsiteOutboxMetrics:
+    enqueued: int = 0  # Records appended
+    shipped_requests: int = 0
+    failed_requests: int = 0
+    rejected_requests: int = 0
+    evicted_segments: int = 0
+    evicted_bytes: int = 0
+
+    def snapshot(self, segments: int, outbox_bytes: int) -> dict[str, int]:
+        return {
+            'segments': segments,
+            'bytes': outbox_bytes,
+            'enqueued': self.enqueued,
+            'shipped_requests': self.shipped_requests,
+            'failed_requests': self.failed_requests,
+            'rejected_requests': self.rejected_requests,
+            'evicted_segments': self.evicted_segments,
+            'evicted_bytes': self.evicted_bytes,
+        }
+
+
+class WebsiteOutbox:
+
+    def __init__(self, directory: str = OUTBOX_DIRECTORY, max_bytes: int = DEFAULT_MAX_OUTBOX_BYTES, compress: bool = False, api_base: str or None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.api_base = api_base
+        self.metrics = WebsiteOutboxMetrics()
+        self._lock = threading.Lock()  # Guards the open segment, sealing and eviction
+        self._stopped = threading.Event()
+        self._communicators: dict[str, WebsiteCommunicator] = {}
+        os.makedirs(directory, exist_ok=True)
+
+        # Resume: seal whatever the last run left open, and number new segments after every existing one
+        sequence_numbers = [0]
+        for name in os.listdir(directory):
+            stem, suffix = os.path.splitext(name)
+            if suffix in (OPEN_SEGMENT_SUFFIX, SEALED_SEGMENT_SUFFIX) and stem.isdigit():
+                sequence_numbers.append(int(stem))
+                if suffix == OPEN_SEGMENT_SUFFIX:
+                    os.replace(os.path.join(directory, name), os.path.join(directory, stem + SEALED_SEGMENT_SUFFIX))
+        self._next_sequence_number = max(sequence_numbers) + 1
+        self._open_segment = None
+        self._open_segment_path: str or None = None
+        self._open_segment_bytes = 0
+        self._open_segment_created = 0.0
+
+    def enqueue(self, endpoint: str, data: list[dict[str, Any]] or dict[str, Any], batchable: bool = False) -> None:
+        """
+        Append an upload to the outbox. Only touches local disk, never the network
+        Args:
+            endpoint: website endpoint, as passed to WebsiteCommunicator
+            data: list of data objects, or one data object
+            batchable: the endpoint accepts any split of the list, so the drainer may merge and chunk it
+
+        Returns:
+            None
+        """
+        line = json.dumps({'endpoint': endpoint, 'data': data, 'batchable': batchable}, separators=(',', ':')) + '\n'
+        encoded = line.encode()
+        with self._lock:
+            if self._open_segment is None:
+                self._open_new_segment()
+            self._open_segment.write(encoded)
+            self._open_segment.flush()  # Survives a process crash, not a power loss
+            self._open_segment_bytes += len(encoded)
+            self.metrics.enqueued += 1
+            if self._open_segment_bytes >= SEGMENT_MAX_BYTES:
+                self._seal_open_segment()
+
+    def enqueue_predictions(self, predictions: list[WebsitePrediction]) -> None:
+        """
+        Append predictions for the website's Predictions endpoint. Used as the prediction feed's spill handler
+        Args:
+            predictions: predictions to send to the website
+
+        Returns:
+            None
+        """
+        self.enqueue('Predictions', [prediction.to_dict() for prediction in predictions], batchable=True)
+
+    def dead_letter(self, endpoint: str, data: list[dict[str, Any]] or dict[str, Any]) -> None:
+        """
+        Set aside an upload the website refused, so it stops blocking the uploads behind it
+        Args:
+            endpoint: website endpoint, as passed to WebsiteCommunicator
+            data: the refused data
+
+        Returns:
+            None
+        """
+        line = json.dumps({'endpoint': endpoint, 'data': data, 'rejected_at': time.time()}, separators=(',', ':')) + '\n'
+        path = os.path.join(self.directory, DEAD_LETTER_FILE)
+        with self._lock:
+            self.metrics.rejected_requests += 1
+            if os.path.exists(path) and os.path.getsize(path) >= DEAD_LETTER_MAX_BYTES:
+                os.replace(path, path + '.1')
+            with open(path, 'a') as dead_letters:
+                dead_letters.write(line)
+        current_thread = threading.current_thread().name
+        bt.logging.warning(f"| {current_thread} | 📮 Website rejected an upload to '{endpoint}', moved it to {DEAD_LETTER_FILE}")
+
+    def _open_new_segment(self) -> None:
+        """
+        Start a new open segment. Caller must hold the lock
+        Returns:
+            None
+        """
+        self._open_segment_path = os.path.join(self.directory, f"{self._next_sequence_number:012d}{OPEN_SEGMENT_SUFFIX}")
+        self._next_sequence_number += 1
+        self._open_segment = open(self._open_segment_path, 'ab')
+        self._open_segment_bytes = 0
+        self._open_segment_created = time.monotonic()
+
+    def _seal_open_segment(self) -> None:
+        """
+        Close the open segment and hand it to the drainer, then enforce the size cap. Caller must hold the lock
+        Returns:
+            None
+        """
+        if self._open_segment is None:
+            return
+        self._open_segment.close()
+        os.replace(self._open_segment_path, self._open_segment_path[:-len(OPEN_SEGMENT_SUFFIX)] + SEALED_SEGMENT_SUFFIX)
+        self._open_segment = None
+        self._open_segment_path = None
+        self._evict_oldest_segments()
+
+    def _sealed_segments(self) -> list[str]:
+        """
+        Get sealed segment paths, oldest first
+        Returns:
+            List of paths
+        """
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(SEALED_SEGMENT_SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _evict_oldest_segments(self) -> None:
+        """
+        Delete the oldest sealed segments until the outbox fits in `max_bytes`. Caller must hold the lock
+        Returns:
+            None
+        """
+        segments = [(path, os.path.getsize(path)) for path in self._sealed_segments()]
+        outbox_bytes = sum(size for _, size in segments)
+        for path, size in segments:
+            if outbox_bytes <= self.max_bytes:
+                break
+            self._delete_segment(path)
+            outbox_bytes -= size
+            self.metrics.evicted_segments += 1
+            self.metrics.evicted_bytes += size
+            current_thread = threading.current_thread().name
+            bt.logging.warning(f"| {current_thread} | 🗑️ Website outbox is over {self.max_bytes} bytes, evicted {os.path.basename(path)}")
+
+    def _delete_segment(self, path: str) -> None:
+        """
+        Delete a sealed segment and its progress file
+        Args:
+            path: segment path
+
+        Returns:
+            None
+        """
+        for file_path in (path, path + PROGRESS_SUFFIX):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def run_drainer(self) -> None:
+        """
+        RUN IN THREAD
+        Seal stale segments and ship sealed segments to the website, oldest first
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        bt.logging.info(f"| {current_thread} | 🏁 Beginning website outbox drainer thread")
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            try:
+                with self._lock:
+                    if self._open_segment is not None and time.monotonic() - self._open_segment_created >= SEGMENT_MAX_AGE:
+                        self._seal_open_segment()
+                segments = self._sealed_segments()
+                if len(segments) == 0:
+                    self._stopped.wait(DRAIN_INTERVAL)
+                    continue
+                if not self.drain_segment(segments[0]):
+                    bt.logging.info(f"| {current_thread} | 📮 Website upload failed, retrying {os.path.basename(segments[0])} in {DRAIN_FAILURE_BACKOFF}s")
+                    self._stopped.wait(DRAIN_FAILURE_BACKOFF)
+            except Exception as e:
+                bt.logging.error(f"| {current_thread} | ❗Error draining website outbox: {e}")
+                self._stopped.wait(DRAIN_FAILURE_BACKOFF)
+
+    def stop_drainer(self) -> None:
+        """
+        Stop the drainer thread, and seal the open segment so the next run ships it
+        Returns:
+            None
+        """
+        self._stopped.set()
+        with self._lock:
+            self._seal_open_segment()
+
+    def drain_segment(self, path: str) -> bool:
+        """
+        Ship one sealed segment, skipping records a previous attempt already shipped, then delete it.
+        Payloads the website rejects are dead-lettered and shipping carries on; other failures stop the segment
+        Args:
+            path: segment path
+
+        Returns:
+            True if the whole segment was shipped or dead-lettered, or it was evicted meanwhile
+        """
+        try:
+            with open(path, 'rb') as segment:
+                records = [json.loads(line) for line in segment if line.strip()]
+        except FileNotFoundError:  # Evicted
+            return True
+        except ValueError:  # Torn final write from a crash, ship the complete records
+            with open(path, 'rb') as segment:
+                records = []
+                for line in segment:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+
+        shipped = self._read_progress(path)
+        while shipped < len(records):
+            # Merge consecutive batchable records for the same endpoint into one request
+            endpoint = records[shipped]['endpoint']
+            end = shipped + 1
+            if records[shipped]['batchable']:
+                items = len(records[shipped]['data'])
+                while end < len(records) and records[end]['batchable'] and records[end]['endpoint'] == endpoint and items + len(records[end]['data']) <= DRAIN_BATCH_SIZE:
+                    items += len(records[end]['data'])
+                    end += 1
+                payloads = self._chunk([item for record in records[shipped:end] for item in record['data']])
+            else:
+                payloads = [records[shipped]['data']]
+
+            for payload in payloads:
+                result = self._get_communicator(endpoint).send_data(payload)
+                if result is SendResult.REJECTED:
+                    self.dead_letter(endpoint, payload)
+                    continue
+                if not result:
+                    self.metrics.failed_requests += 1
+                    return False
+                self.metrics.shipped_requests += 1
+            shipped = end
+            self._write_progress(path, shipped)
+
+        with self._lock:
+            self._delete_segment(path)
+        return True
+
+    @staticmethod
+    def _chunk(items: list) -> list[list]:
+        return [items[start:start + DRAIN_BATCH_SIZE] for start in range(0, len(items), DRAIN_BATCH_SIZE)]
+
+    def _get_communicator(self, endpoint: str) -> WebsiteCommunicator:
+        if endpoint not in self._communicators:
+            kwargs = {'api_base': self.api_base} if self.api_base is not None else {}
+            self._communicators[endpoint] = WebsiteCommunicator(endpoint, suppress_errors=True, compress=self.compress, **kwargs)
+        return self._communicators[endpoint]
+
+    def _read_progress(self, path: str) -> int:
+        try:
+            with open(path + PROGRESS_SUFFIX) as progress:
+                return int(progress.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_progress(self, path: str, shipped: int) -> None:
+        with self._lock:
+            if not os.path.exists(path):  # Evicted while shipping
+                return
+            temporary_path = path + PROGRESS_SUFFIX + '.tmp'
+            with open(temporary_path, 'w') as progress:
+                progress.write(str(shipped))
+            os.replace(temporary_path, path + PROGRESS_SUFFIX)
+
+    def get_metrics(self) -> dict[str, int]:
+        """
+        Get outbox size, shipping and eviction metrics
+        Returns:
+            Map of metric name -> value
+        """
+        with self._lock:
+            segments = self._sealed_segments()
+            outbox_bytes = sum(os.path.getsize(path) for path in segments)
+            if self._open_segment is not None:
+                outbox_bytes += self._open_segment_bytes
+            return self.metrics.snapshot(len(segments), outbox_bytes)
+
+    def log_metrics(self) -> None:
+        """
+        Log outbox size, shipping and eviction metrics
+        Returns:
+            None
+        """
+        current_thread = threading.current_thread().name
+        bt.logging.info(f"| {current_thread} | 📮 Website outbox: {self.get_metrics()}")
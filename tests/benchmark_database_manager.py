@@ -0,0 +1,39 @@
+import os
+import tempfile
+import time
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+
+NUMBER_OF_STATEMENTS = 20000
+
+
+def run_statements(database_manager: DatabaseManager) -> float:
+    """
+    Run a mix of reads and single-row writes, like the scoring thread does
+    Returns:
+        Statements per second
+    """
+    insert = "INSERT OR REPLACE INTO daily_scores (miner_hotkey, date, score, total_predictions) VALUES (?, ?, ?, ?)"
+    select = "SELECT score, total_predictions FROM daily_scores WHERE miner_hotkey = ? AND date = ?"
+    start = time.perf_counter()
+    for i in range(NUMBER_OF_STATEMENTS // 2):
+        hotkey = f"hotkey_{i % 256}"
+        database_manager.query_and_commit_with_values(insert, (hotkey, '2024-10-01', 50.0, i))
+        database_manager.query_with_values(select, (hotkey, '2024-10-01'))
+    return NUMBER_OF_STATEMENTS / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # DatabaseManager writes to ./data
+        for label, pool_size in [("unpooled", 0), ("pooled", 16)]:
+            database_manager = DatabaseManager(pool_size=pool_size)
+            TableInitializer(database_manager).create_tables()
+            database_manager.query_and_commit("DELETE FROM daily_scores")
+            statements_per_second = run_statements(database_manager)
+            database_manager.close()
+            print(f"{label:>9}: {statements_per_second:,.0f} statements/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import time
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+from nextplace.validator.website_data.miner_score_sender import MinerScoreSender
+from tests.test_miner_score_sender import build_miner_scores_per_miner, populate
+
+NUMBER_OF_MINERS = 256
+PREDICTIONS_PER_MINER = 4000
+
+
+def main():
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # DatabaseManager writes to ./data
+        database_manager = DatabaseManager()
+        TableInitializer(database_manager).create_tables()
+        populate(database_manager, NUMBER_OF_MINERS, PREDICTIONS_PER_MINER)
+        miner_score_sender = MinerScoreSender(database_manager)
+        print(f"{NUMBER_OF_MINERS} miners, up to {PREDICTIONS_PER_MINER} unscored predictions each")
+
+        for name, build in [
+            ('per miner', lambda: build_miner_scores_per_miner(miner_score_sender)),
+            ('aggregate queries', miner_score_sender.build_miner_scores),
+        ]:
+            start = time.perf_counter()
+            payload = build()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>18}: {elapsed:.3f}s for {len(payload)} miners")
+
+        start = time.perf_counter()
+        miner_score_sender._read_snapshot(TimeGatedScorer(database_manager).get_score_cutoff_date())
+        print(f"Aggregate export holds the lock for {time.perf_counter() - start:.3f}s, in one read transaction")
+
+        database_manager.close()
+        os.chdir(original_dir)
+
+
+if __name__ == '__main__':
+    main()
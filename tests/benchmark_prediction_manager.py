@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from nextplace.protocol import RealEstateSynapse, LEGACY_WIRE_FORMAT_VERSION, COLUMNAR_WIRE_FORMAT_VERSION
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.predictions.prediction_manager import PredictionManager
+from nextplace.validator.website_data.prediction_feed import PredictionFeed
+from nextplace.validator.utils.contants import NUMBER_OF_PROPERTIES_PER_SYNAPSE
+from tests.benchmark_protocol import build_response
+
+NUMBER_OF_MINERS = 256
+
+
+def run(database_manager: DatabaseManager, wire_format_version: int, fast_path: bool) -> dict[str, float]:
+    database_manager.query_and_commit("DELETE FROM predictions")
+    metagraph = SimpleNamespace(hotkeys=[f"hotkey_{uid}" for uid in range(NUMBER_OF_MINERS)])
+    prediction_manager = PredictionManager(database_manager, metagraph, PredictionFeed(capacity=NUMBER_OF_MINERS * NUMBER_OF_PROPERTIES_PER_SYNAPSE))
+    response_body = json.loads(build_response(wire_format_version).model_dump_json())
+    synapse_ids = set(response_body['real_estate_predictions']['predictions'][idx]['nextplace_id'] for idx in range(len(response_body['real_estate_predictions']['predictions'])))
+    synapse_ids |= set(response_body['property_columns']['columns']['nextplace_id'] if response_body['property_columns'] else [])
+
+    start = time.perf_counter()
+    responses = [RealEstateSynapse(**response_body) for _ in range(NUMBER_OF_MINERS)]  # What the dendrite does with each response
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if fast_path:
+        records = [response.get_prediction_records() for response in responses]
+    else:
+        records = [response.deserialize().predictions for response in responses]  # The old `deserialize=True` path
+    extract_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prediction_manager.process_predictions(records, synapse_ids)
+    process_seconds = time.perf_counter() - start
+    assert database_manager.get_size_of_table('predictions') == NUMBER_OF_MINERS * NUMBER_OF_PROPERTIES_PER_SYNAPSE
+    return {'parse': parse_seconds, 'extract': extract_seconds, 'process': process_seconds}
+
+
+def main():
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # DatabaseManager writes to ./data
+        database_manager = DatabaseManager()
+        TableInitializer(database_manager).create_tables()
+        print(f"{NUMBER_OF_PROPERTIES_PER_SYNAPSE} predictions x {NUMBER_OF_MINERS} miners")
+        for name, wire_format_version, fast_path in [
+            ('before, legacy', LEGACY_WIRE_FORMAT_VERSION, False),
+            ('before, columnar', COLUMNAR_WIRE_FORMAT_VERSION, False),
+            ('after, legacy', LEGACY_WIRE_FORMAT_VERSION, True),
+            ('after, columnar', COLUMNAR_WIRE_FORMAT_VERSION, True),
+        ]:
+            seconds = run(database_manager, wire_format_version, fast_path)
+            total = sum(seconds.values())
+            print(f"{name:>16}: parse {seconds['parse']:.2f}s, extract {seconds['extract']:.2f}s, process {seconds['process']:.2f}s, total {total:.2f}s")
+        database_manager.close()
+        os.chdir(original_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import time
+from nextplace.protocol import RealEstateSynapse, RESPONSE_FIELDS, LEGACY_WIRE_FORMAT_VERSION, COLUMNAR_WIRE_FORMAT_VERSION
+from nextplace.validator.utils.contants import NUMBER_OF_PROPERTIES_PER_SYNAPSE
+from tests.test_protocol import build_predictions
+
+NUMBER_OF_MINERS = 256
+
+
+def build_response(wire_format_version: int) -> RealEstateSynapse:
+    synapse = RealEstateSynapse.create(real_estate_predictions=build_predictions(NUMBER_OF_PROPERTIES_PER_SYNAPSE), wire_format_version=wire_format_version)
+    synapse.decode_columns()
+    for prediction in synapse.real_estate_predictions.predictions:
+        prediction.predicted_sale_price = 310000.0
+        prediction.predicted_sale_date = '2024-12-01'
+        prediction.force_update_past_predictions = False
+    synapse.encode_columns(RESPONSE_FIELDS)
+    return synapse
+
+
+def measure(wire_format_version: int) -> dict[str, float]:
+    request = RealEstateSynapse.create(real_estate_predictions=build_predictions(NUMBER_OF_PROPERTIES_PER_SYNAPSE), wire_format_version=wire_format_version)
+    response_body = build_response(wire_format_version).model_dump_json()
+
+    start = time.perf_counter()
+    for _ in range(NUMBER_OF_MINERS):  # The dendrite serializes the synapse once per axon
+        request_body = request.model_dump_json()
+    serialize_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(NUMBER_OF_MINERS):
+        RealEstateSynapse.model_validate_json(response_body).deserialize()
+    deserialize_seconds = time.perf_counter() - start
+
+    return {
+        'request_bytes': len(request_body),
+        'response_bytes': len(response_body),
+        'serialize_seconds': serialize_seconds,
+        'deserialize_seconds': deserialize_seconds,
+    }
+
+
+def main():
+    print(f"{NUMBER_OF_PROPERTIES_PER_SYNAPSE} properties x {NUMBER_OF_MINERS} miners")
+    for name, wire_format_version in [('legacy', LEGACY_WIRE_FORMAT_VERSION), ('columnar', COLUMNAR_WIRE_FORMAT_VERSION)]:
+        metrics = measure(wire_format_version)
+        print(
+            f"{name:>8}: request {metrics['request_bytes'] / 1024:.0f} KiB, response {metrics['response_bytes'] / 1024:.0f} KiB, "
+            f"serialize {metrics['serialize_seconds']:.2f}s, deserialize {metrics['deserialize_seconds']:.2f}s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+from nextplace.validator.scoring.replay import ScoringReplay
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+from tests.test_replay import random_daily_scores, score_rows_as_of
+
+NUMBER_OF_MINERS = 256
+NUMBER_OF_DAYS = 180
+
+
+def replay_with_score_rows(daily_scores: list[tuple], replay: ScoringReplay) -> None:
+    """
+    The same replay through the live scoring path, one day at a time
+    """
+    time_gated_scorer = TimeGatedScorer(None)
+    for day in replay.run().dates:
+        score_rows_as_of(time_gated_scorer, replay.hotkeys, daily_scores, day)
+
+
+def main():
+    daily_scores = random_daily_scores(NUMBER_OF_MINERS, NUMBER_OF_DAYS)
+    print(f"{len(daily_scores)} daily scores, {NUMBER_OF_MINERS} miners over {NUMBER_OF_DAYS} days")
+
+    start = time.perf_counter()
+    replay = ScoringReplay(daily_scores)
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = replay.run()
+    run_time = time.perf_counter() - start
+    print(f"vectorized replay: {load_time * 1000:.1f}ms to load, {run_time * 1000:.1f}ms for {len(result.dates)} days")
+
+    sample = replay.run(end_date=result.dates[0] + timedelta(days=29))
+    start = time.perf_counter()
+    replay_with_score_rows(daily_scores, ScoringReplay([row for row in daily_scores if row[1] <= sample.dates[-1].strftime("%Y-%m-%d")]))
+    elapsed = time.perf_counter() - start
+    print(f"score_rows per day: {elapsed * 1000:.1f}ms for {len(sample.dates)} days, ~{elapsed / len(sample.dates) * len(result.dates):.2f}s projected")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import time
+import numpy as np
+from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
+from tests.test_scoring_calculator import build_synthetic_predictions
+
+NUMBER_OF_PREDICTIONS = 1_000_000
+
+
+def main():
+    predictions = build_synthetic_predictions(NUMBER_OF_PREDICTIONS)
+    scoring_calculator = ScoringCalculator(None, None)
+
+    start = time.perf_counter()
+    scalar_scores = [
+        scoring_calculator.calculate_score(actual_price, predicted_price, actual_date, predicted_date, hotkey)
+        for hotkey, predicted_price, predicted_date, actual_price, actual_date in predictions
+    ]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores, valid = ScoringCalculator.calculate_scores(predictions)
+    vectorized_seconds = time.perf_counter() - start
+
+    assert valid.all() and np.array_equal(scores, np.array(scalar_scores))
+    print(f"    scalar: {scalar_seconds:.2f}s for {NUMBER_OF_PREDICTIONS:,} predictions")
+    print(f"vectorized: {vectorized_seconds:.2f}s for {NUMBER_OF_PREDICTIONS:,} predictions ({scalar_seconds / vectorized_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import random
+import time
+import numpy as np
+from nextplace.validator.setting_weights.tiered_weights import calculate_weight_vector
+from tests.test_tiered_weights import calculate_weights_from_lists
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+REDUCTION_UID = 34
+ITERATIONS = 20
+
+
+def fill_elementwise(weights: list[float]):
+    """
+    The previous tensor fill, one element at a time
+    """
+    tensor = torch.zeros(len(weights), dtype=torch.float32) if torch is not None else np.zeros(len(weights), dtype=np.float32)
+    for uid, weight in enumerate(weights):
+        tensor[uid] = weight
+    return tensor
+
+
+def convert(weights: np.ndarray):
+    return torch.tensor(weights, dtype=torch.float32) if torch is not None else weights.astype(np.float32)
+
+
+def main():
+    rng = random.Random(21)
+    print(f"Filling {'torch tensors' if torch is not None else 'NumPy arrays (torch not installed)'}, best of {ITERATIONS}")
+    for number_of_uids in [256, 1024, 4096]:
+        scores = np.array([rng.uniform(0, 100) for _ in range(number_of_uids)])
+        miner_uids = np.arange(number_of_uids, dtype=np.int64)
+        score_map = {uid: float(scores[uid]) for uid in miner_uids.tolist()}
+
+        for name, calculate in [
+            ('lists', lambda: fill_elementwise(calculate_weights_from_lists(score_map, number_of_uids, REDUCTION_UID))),
+            ('vector', lambda: convert(calculate_weight_vector(scores, miner_uids, REDUCTION_UID))),
+        ]:
+            best = float('inf')
+            for _ in range(ITERATIONS):
+                start = time.perf_counter()
+                calculate()
+                best = min(best, time.perf_counter() - start)
+            print(f"{number_of_uids:>5} UIDs {name:>7}: {best * 1000:.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import random
+import statistics
+import timeit
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+
+SIZE_OF_NON_CONSISTENCY_WINDOW = 16  # A miner with a full 21 day history
+NUMBER_OF_RUNS = 2000
+
+
+def mean_of_copies(scores: list[float], day_weights: list[int]) -> float:
+    all_scores = []
+    for score, day_weight in zip(scores, day_weights):
+        for i in range(day_weight):
+            all_scores.append(score)
+    return statistics.mean(all_scores)
+
+
+def main():
+    rng = random.Random(48)
+    time_gated_scorer = TimeGatedScorer(None)
+    scores = [rng.uniform(0, 100) for _ in range(SIZE_OF_NON_CONSISTENCY_WINDOW)]
+    day_weights = [time_gated_scorer.calculate_day_weight(SIZE_OF_NON_CONSISTENCY_WINDOW, days_back) for days_back in range(1, SIZE_OF_NON_CONSISTENCY_WINDOW + 1)]
+    assert mean_of_copies(scores, day_weights) == TimeGatedScorer.weighted_mean(scores, day_weights)
+
+    copies_seconds = timeit.timeit(lambda: mean_of_copies(scores, day_weights), number=NUMBER_OF_RUNS)
+    weighted_seconds = timeit.timeit(lambda: TimeGatedScorer.weighted_mean(scores, day_weights), number=NUMBER_OF_RUNS)
+    print(f"{sum(day_weights)} copies of {len(scores)} daily scores")
+    print(f"mean of copies: {copies_seconds / NUMBER_OF_RUNS * 1e6:.1f}us per miner")
+    print(f" weighted mean: {weighted_seconds / NUMBER_OF_RUNS * 1e6:.1f}us per miner ({copies_seconds / weighted_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+import aiohttp
+from nextplace.validator.website_data.prediction_feed import WebsitePrediction
+from nextplace.validator.website_data.website_communicator import WebsiteCommunicator
+from tests.test_website_communicator import StubWebsiteServer
+
+NUMBER_OF_BATCHES = 200
+BATCH_SIZE = 500
+SERVER_LATENCY = 0.005  # Seconds
+
+
+def build_batch(batch_idx: int) -> list[dict]:
+    return [
+        WebsitePrediction(f"{batch_idx}_{idx}", f"5F{idx % 256:046d}", 350_000.0 + idx, '2024-11-01T00:00:00.000Z', '2024-10-01T00:00:00.000Z').to_dict()
+        for idx in range(BATCH_SIZE)
+    ]
+
+
+async def send_with_session_per_batch(endpoint: str, batches: list[list[dict]]) -> None:
+    """
+    The previous implementation: a new session, and so a new connection, for every batch
+    """
+    async def send(batch: list[dict]) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(endpoint, json=batch, headers={'Accept': '*/*', 'Content-Type': 'application/json'}) as response:
+                await response.text()
+    await asyncio.gather(*(send(batch) for batch in batches))
+
+
+async def send_with_communicator(communicator: WebsiteCommunicator, batches: list[list[dict]]) -> None:
+    await asyncio.gather(*(communicator.send_data_async(batch) for batch in batches))
+    await communicator.close_async()
+
+
+def main():
+    server = StubWebsiteServer()
+    server.latency = SERVER_LATENCY
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}"
+    batches = [build_batch(batch_idx) for batch_idx in range(NUMBER_OF_BATCHES)]
+    print(f"{NUMBER_OF_BATCHES} batches x {BATCH_SIZE} predictions, {SERVER_LATENCY * 1000:.0f}ms server latency")
+
+    for name, run in [
+        ('session per batch', lambda: send_with_session_per_batch(f"{api_base}/Predictions", batches)),
+        ('shared session', lambda: send_with_communicator(WebsiteCommunicator('Predictions', api_base=api_base), batches)),
+        ('shared session, gzip', lambda: send_with_communicator(WebsiteCommunicator('Predictions', compress=True, api_base=api_base), batches)),
+    ]:
+        server.bodies.clear()
+        server.max_in_flight = 0
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        assert len(server.bodies) == NUMBER_OF_BATCHES
+        print(f"{name:>22}: {elapsed:.2f}s, {NUMBER_OF_BATCHES * BATCH_SIZE / elapsed:,.0f} predictions/s, {server.max_in_flight} max in flight")
+
+    raw_bytes = len(WebsiteCommunicator('Predictions')._build_body(batches[0])[0])
+    gzip_bytes = len(WebsiteCommunicator('Predictions', compress=True)._build_body(batches[0])[0])
+    print(f"Batch body: {raw_bytes / 1024:.0f} KiB raw, {gzip_bytes / 1024:.0f} KiB gzip")
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
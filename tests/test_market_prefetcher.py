@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from nextplace.validator.api.properties_api import PropertiesAPI
+from nextplace.validator.api.token_bucket import TokenBucket
+from nextplace.validator.market.market_prefetcher import MarketPrefetcher
+
+PAGES_PER_MARKET = 3
+
+
+class FakePropertiesAPI:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fetched_markets = []
+
+    def fetch_region_market_pages(self, market: dict[str, str]):
+        with self.lock:
+            self.fetched_markets.append(market['name'])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for page in range(PAGES_PER_MARKET):
+                time.sleep(0.05)  # HTTP latency
+                yield [f"{market['name']}-{page}"]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestMarketPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.properties_api = FakePropertiesAPI()
+        self.markets = [{'name': f"Market {idx}", 'id': f"6_{idx}"} for idx in range(5)]
+
+    def _build_prefetcher(self, max_queued_pages: int) -> MarketPrefetcher:
+        prefetcher = MarketPrefetcher(self.properties_api, self.markets, start_index=3, number_of_workers=3, max_queued_pages=max_queued_pages)
+        prefetcher.start()
+        self.addCleanup(prefetcher.stop)
+        return prefetcher
+
+    def test_no_fetching_without_demand(self):
+        prefetcher = self._build_prefetcher(max_queued_pages=4)
+        time.sleep(0.2)
+        self.assertEqual(self.properties_api.fetched_markets, [])
+        self.assertTrue(prefetcher.pages.empty())
+
+    def test_fetches_markets_concurrently_into_bounded_queue(self):
+        prefetcher = self._build_prefetcher(max_queued_pages=2)
+        prefetcher.demand.set()
+        time.sleep(0.5)  # Workers fill the queue, then block
+
+        self.assertEqual(prefetcher.pages.qsize(), 2)
+        self.assertEqual(self.properties_api.max_in_flight, 3)
+        self.assertEqual(sorted(self.properties_api.fetched_markets), ['Market 0', 'Market 3', 'Market 4'])  # Wraps around
+
+        prefetcher.demand.clear()
+        pages_by_market = {}
+        while True:
+            try:
+                market_name, homes = prefetcher.pages.get(timeout=0.5)
+            except queue.Empty:
+                break
+            if homes is not None:
+                pages_by_market.setdefault(market_name, []).extend(homes)
+
+        # Markets already started finish, no new markets start without demand
+        self.assertEqual(sorted(pages_by_market), ['Market 0', 'Market 3', 'Market 4'])
+        for market_name, homes in pages_by_market.items():
+            self.assertEqual(homes, [f"{market_name}-{page}" for page in range(PAGES_PER_MARKET)])
+
+    def test_workers_share_the_api_rate_limit(self):
+        properties_api = PropertiesAPI(None, self.markets, token_bucket=TokenBucket(rate=20, capacity=1))
+        response = SimpleNamespace(status_code=200, text='{"data": [{"homeData": {}}]}')  # One short page per market
+        with patch('nextplace.validator.api.properties_api.requests.get', return_value=response) as get:
+            prefetcher = MarketPrefetcher(properties_api, self.markets, start_index=0, number_of_workers=3, max_queued_pages=20)
+            start = time.monotonic()
+            prefetcher.start()
+            self.addCleanup(prefetcher.stop)
+            prefetcher.demand.set()
+            finished_markets = 0
+            while finished_markets < len(self.markets):
+                _, homes = prefetcher.pages.get(timeout=2)
+                finished_markets += homes is None
+            prefetcher.demand.clear()
+            elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(get.call_count, len(self.markets))
+        self.assertGreaterEqual(elapsed, (len(self.markets) - 1) / 20)  # First token is free, the rest refill at 20/s
+
+
+if __name__ == '__main__':
+    unittest.main()
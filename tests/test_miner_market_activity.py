@@ -0,0 +1,126 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from nextplace.protocol import PredictionRecord
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.miner_market_activity import record_activity_since
+from nextplace.validator.database.predictions_table_migrator import PredictionsTableMigrator
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.predictions.prediction_manager import PredictionManager
+from nextplace.validator.scoring.scoring import Scorer
+from nextplace.validator.utils.contants import ISO8601
+from nextplace.validator.website_data.prediction_feed import PredictionFeed
+
+MARKETS = ['Kissimmee', 'Conroe', 'Tampa', 'Austin', 'Denver']
+
+
+def count_markets_from_predictions(database_manager: DatabaseManager) -> dict[str, int]:
+    """
+    The previous per-round scan of `predictions`
+    """
+    results = database_manager.query("""
+        SELECT miner_hotkey, COUNT(DISTINCT(market))
+        FROM predictions
+        WHERE prediction_timestamp >= datetime('now', '-5 days')
+        GROUP BY miner_hotkey
+    """)
+    return {hotkey: distinct_markets for hotkey, distinct_markets in results}
+
+
+def count_markets_from_activity(database_manager: DatabaseManager) -> dict[str, int]:
+    results = database_manager.query("""
+        SELECT miner_hotkey, COUNT(*)
+        FROM miner_market_activity
+        WHERE last_prediction_timestamp >= datetime('now', '-5 days')
+        GROUP BY miner_hotkey
+    """)
+    return {hotkey: distinct_markets for hotkey, distinct_markets in results}
+
+
+class TestMinerMarketActivity(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _timestamp(self, days_ago: int) -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime(ISO8601)
+
+    def test_ingestion_matches_predictions_scan(self):
+        rng = random.Random(22)
+        old_rows = []
+        for idx in range(60):
+            old_rows.append((f"home_{idx}", f"hotkey_{idx % 4}", 1.0, '2024-11-01', self._timestamp(rng.choice([1, 3, 9])), rng.choice(MARKETS)))
+        self.database_manager.query_and_commit_many("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", old_rows)
+        self.database_manager.query_and_commit("DROP TABLE miner_market_activity")  # Upgrade from a tree without it
+        TableInitializer(self.database_manager).create_tables()  # Seeds from the last 5 days
+        self.assertEqual(count_markets_from_activity(self.database_manager), count_markets_from_predictions(self.database_manager))
+
+        metagraph = SimpleNamespace(hotkeys=[f"hotkey_{idx}" for idx in range(6)])
+        prediction_manager = PredictionManager(self.database_manager, metagraph, PredictionFeed())
+        valid_ids = {f"home_{idx}" for idx in range(120)}
+        for _ in range(3):
+            responses = [
+                [PredictionRecord(f"home_{rng.randrange(120)}", rng.choice(MARKETS), rng.random() < 0.2, 100.0, '2024-11-01') for _ in range(10)]
+                for _ in metagraph.hotkeys
+            ]
+            prediction_manager.process_predictions(responses, valid_ids)
+            self.assertEqual(count_markets_from_activity(self.database_manager), count_markets_from_predictions(self.database_manager))
+
+    def test_ignored_predictions_are_not_activity(self):
+        self.database_manager.query_and_commit_many("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", [
+            ('home_1', 'hotkey_0', 1.0, '2024-11-01', self._timestamp(9), 'Kissimmee'),
+        ])
+        prediction_manager = PredictionManager(self.database_manager, SimpleNamespace(hotkeys=['hotkey_0']), PredictionFeed())
+        prediction_manager.process_predictions([[PredictionRecord('home_1', 'Conroe', False, 2.0, '2024-11-01')]], {'home_1'})
+        self.assertEqual(count_markets_from_activity(self.database_manager), {})
+
+        prediction_manager.process_predictions([[PredictionRecord('home_1', 'Conroe', True, 2.0, '2024-11-01')]], {'home_1'})
+        self.assertEqual(count_markets_from_activity(self.database_manager), {'hotkey_0': 1})
+
+    def test_scored_predictions_stop_counting(self):
+        rows = [
+            ('home_1', 'hotkey_0', 1.0, '2024-11-01', self._timestamp(1), 'Kissimmee'),
+            ('home_2', 'hotkey_0', 1.0, '2024-11-01', self._timestamp(2), 'Kissimmee'),
+            ('home_3', 'hotkey_0', 1.0, '2024-11-01', self._timestamp(1), 'Conroe'),
+            ('home_4', 'hotkey_1', 1.0, '2024-11-01', self._timestamp(1), 'Conroe'),
+        ]
+        self.database_manager.query_and_commit_many("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", rows)
+        with self.database_manager.transaction() as cursor:
+            record_activity_since(cursor)
+
+        # Scored: the latest Kissimmee prediction and the only Conroe one
+        scored_predictions = [row + (1.0, '2024-11-01') for row in [rows[0], rows[2]]]
+        Scorer(self.database_manager, [], None)._remove_scored_predictions(scored_predictions)
+
+        self.assertEqual(count_markets_from_activity(self.database_manager), count_markets_from_predictions(self.database_manager))
+        self.assertEqual(count_markets_from_activity(self.database_manager), {'hotkey_0': 1, 'hotkey_1': 1})
+        self.assertEqual(
+            self.database_manager.query("SELECT last_prediction_timestamp FROM miner_market_activity WHERE miner_hotkey = 'hotkey_0'"),
+            [(rows[1][4],)]  # Falls back to the older Kissimmee prediction
+        )
+
+    def test_migration_records_activity(self):
+        self.database_manager.query_and_commit("CREATE TABLE predictions_hotkey_a AS SELECT * FROM predictions WHERE 0")
+        self.database_manager.query_and_commit_many("INSERT INTO predictions_hotkey_a VALUES (?, ?, ?, ?, ?, ?)", [
+            ('home_1', 'hotkey_a', 1.0, '2024-11-01', self._timestamp(1), 'Kissimmee'),
+            ('home_2', 'hotkey_a', 1.0, '2024-11-01', self._timestamp(2), 'Conroe'),
+            ('home_3', 'hotkey_a', 1.0, '2024-11-01', self._timestamp(9), 'Tampa'),
+        ])
+        PredictionsTableMigrator(self.database_manager).migrate()
+        self.assertEqual(count_markets_from_activity(self.database_manager), {'hotkey_a': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+from nextplace.validator.website_data.miner_score_sender import MinerScoreSender
+
+
+def build_miner_scores_per_miner(miner_score_sender: MinerScoreSender) -> list[dict]:
+    """
+    The previous export: a score, a daily_scores query and a prediction count for each miner, under the lock
+    """
+    database_manager = miner_score_sender.database_manager
+    time_gated_scorer = TimeGatedScorer(database_manager)
+    score_cutoff_date = time_gated_scorer.get_score_cutoff_date()
+    hotkeys = [row[0] for row in database_manager.query("SELECT DISTINCT miner_hotkey FROM predictions")]
+    data_to_send = []
+    for hotkey in hotkeys:
+        date_score_map = miner_score_sender._get_empty_score_date_map(score_cutoff_date)
+        with database_manager.lock:
+            score = time_gated_scorer.score(hotkey)
+            results = database_manager.query_with_values("SELECT date, total_predictions FROM daily_scores WHERE miner_hotkey= ? AND date >= ?", (hotkey, score_cutoff_date.strftime("%Y-%m-%d")))
+            num_predictions = 0
+            for date, total_scored in results:
+                date_score_map[date] = total_scored
+                num_predictions += total_scored
+            total_predictions = database_manager.query_with_values("SELECT COUNT(*) FROM predictions WHERE miner_hotkey = ?", (hotkey,))[0][0]
+            scored_list = [{'date': key, 'totalScored': value} for key, value in date_score_map.items()]
+            scored_list.sort(key=lambda x: x['date'], reverse=True)
+            data_to_send.append({
+                "minerHotKey": hotkey,
+                "minerColdKey": "N/A",
+                "minerScore": score,
+                "numPredictions": num_predictions,
+                "totalPredictions": total_predictions,
+                "minerDatedScores": scored_list
+            })
+    return data_to_send
+
+
+def populate(database_manager: DatabaseManager, number_of_miners: int, predictions_per_miner: int, seed: int = 20) -> None:
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).date()
+    daily_scores = []
+    predictions = []
+    for idx in range(number_of_miners):
+        hotkey = f"hotkey_{idx}"
+        for days_ago in range(rng.randint(0, 40) + 1):
+            if rng.random() < 0.8:
+                daily_scores.append((hotkey, (today - timedelta(days=days_ago)).strftime("%Y-%m-%d"), rng.uniform(0, 100), rng.randint(1, 30)))
+        for prediction_idx in range(rng.randint(1, predictions_per_miner)):
+            predictions.append((f"home_{prediction_idx}", hotkey, 100.0, '2024-11-01', '2024-10-01T00:00:00Z', 'Kissimmee'))
+    database_manager.query_and_commit_many("INSERT INTO daily_scores VALUES (?, ?, ?, ?)", daily_scores)
+    database_manager.query_and_commit_many("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", predictions)
+
+
+class TestMinerScoreSender(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.miner_score_sender = MinerScoreSender(self.database_manager)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def test_payload_matches_per_miner_export(self):
+        populate(self.database_manager, number_of_miners=30, predictions_per_miner=50)
+        self.database_manager.query_and_commit("INSERT INTO daily_scores VALUES ('no_predictions', '2024-10-01', 50.0, 5)")
+
+        expected = {data['minerHotKey']: data for data in build_miner_scores_per_miner(self.miner_score_sender)}
+        actual = self.miner_score_sender.build_miner_scores()
+
+        self.assertEqual(len(actual), 30)
+        for data in actual:
+            self.assertIn('scoreGenerationDate', data)
+            reference = expected[data['minerHotKey']]
+            self.assertAlmostEqual(data['minerScore'], reference['minerScore'], places=9)
+            for key in ['minerColdKey', 'numPredictions', 'totalPredictions', 'minerDatedScores']:
+                self.assertEqual(data[key], reference[key], key)
+
+    def test_no_miners(self):
+        self.assertEqual(self.miner_score_sender.build_miner_scores(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
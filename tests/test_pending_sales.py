@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.scoring.scoring import Scorer
+
+
+class TestPendingSales(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.scorer = Scorer(self.database_manager, [], None)
+        self.sold_homes_api = self.scorer.sold_homes_api
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _insert_prediction(self, nextplace_id: str, miner_hotkey: str) -> None:
+        query = "INSERT INTO predictions VALUES (?, ?, 100.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee')"
+        self.database_manager.query_and_commit_with_values(query, (nextplace_id, miner_hotkey))
+
+    def _pending_sales(self) -> list[str]:
+        return [row[0] for row in self.database_manager.query("SELECT nextplace_id FROM pending_sales ORDER BY nextplace_id")]
+
+    def _score(self) -> None:
+        with patch.object(Scorer, '_send_data_to_website'):
+            self.scorer.score_all_predictions()
+
+    def test_only_new_sales_are_pending(self):
+        self.sold_homes_api._ingest_valid_homes([('home_1', 'p1', 110.0, '2024-10-02T00:00:00Z')])
+        self.assertEqual(self._pending_sales(), ['home_1'])
+
+        self._score()
+        self.assertEqual(self._pending_sales(), [])
+
+        # Refreshing sales re-fetches the same home, it must not be scored again
+        self.sold_homes_api._ingest_valid_homes([
+            ('home_1', 'p1', 110.0, '2024-10-02T00:00:00Z'),
+            ('home_2', 'p2', 120.0, '2024-10-03T00:00:00Z'),
+        ])
+        self.assertEqual(self._pending_sales(), ['home_2'])
+
+    def test_scoring_consumes_pending_sales(self):
+        self._insert_prediction('home_1', 'hotkey_a')
+        self._insert_prediction('home_1', 'hotkey_b')
+        self._insert_prediction('home_2', 'hotkey_a')
+        self.sold_homes_api._ingest_valid_homes([('home_1', 'p1', 110.0, '2024-10-02T00:00:00Z')])
+
+        self._score()
+
+        self.assertEqual(self._pending_sales(), [])
+        scored = self.database_manager.query("SELECT miner_hotkey FROM scored_predictions ORDER BY miner_hotkey")
+        self.assertEqual(scored, [('hotkey_a',), ('hotkey_b',)])
+        remaining = self.database_manager.query("SELECT nextplace_id FROM predictions")
+        self.assertEqual(remaining, [('home_2',)])
+
+    def test_existing_sales_are_pending_after_upgrade(self):
+        self.database_manager.query_and_commit("DROP TABLE pending_sales")
+        self.database_manager.query_and_commit("INSERT INTO sales VALUES ('home_1', 'p1', 110.0, '2024-10-02T00:00:00Z')")
+        TableInitializer(self.database_manager).create_tables()
+        self.assertEqual(self._pending_sales(), ['home_1'])
+
+    def test_old_sales_are_pruned(self):
+        self.sold_homes_api._ingest_valid_homes([
+            ('home_1', 'p1', 110.0, '2024-01-01T00:00:00Z'),
+            ('home_2', 'p2', 120.0, '9999-01-01T00:00:00Z'),
+        ])
+        self.scorer._clear_out_old_sales()
+        self.assertEqual(self.database_manager.query("SELECT nextplace_id FROM sales"), [('home_2',)])
+        self.assertEqual(self._pending_sales(), ['home_2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from nextplace.validator.website_data.prediction_feed import PredictionFeed, WebsitePrediction, DROP_NEWEST, SPILL
+
+
+def build_predictions(count: int, start: int = 0) -> list[WebsitePrediction]:
+    return [WebsitePrediction(f"home_{idx}", 'hotkey', 100.0, '2024-11-01T00:00:00.000Z', '2024-10-01T00:00:00.000Z') for idx in range(start, start + count)]
+
+
+class TestPredictionFeed(unittest.TestCase):
+
+    def test_drop_oldest_keeps_newest_predictions(self):
+        feed = PredictionFeed(capacity=3)
+        feed.put_many(build_predictions(5))
+
+        batch = feed.get_batch(max_size=10, max_wait=0)
+
+        self.assertEqual([prediction.nextplace_id for prediction in batch], ['home_4', 'home_3', 'home_2'])  # Newest first
+        metrics = feed.get_metrics()
+        self.assertEqual(metrics['dropped'], 2)
+        self.assertEqual(metrics['max_depth'], 3)
+        self.assertEqual(metrics['depth'], 0)
+
+    def test_drop_newest_keeps_oldest_predictions(self):
+        feed = PredictionFeed(capacity=3, overflow_policy=DROP_NEWEST)
+        feed.put_many(build_predictions(5))
+
+        batch = feed.get_batch(max_size=10, max_wait=0)
+
+        self.assertEqual([prediction.nextplace_id for prediction in batch], ['home_2', 'home_1', 'home_0'])
+        self.assertEqual(feed.get_metrics()['dropped'], 2)
+
+    def test_spill_hands_oldest_predictions_to_handler(self):
+        spilled = []
+        feed = PredictionFeed(capacity=3, overflow_policy=SPILL, spill_handler=spilled.extend)
+        feed.put_many(build_predictions(4))
+
+        self.assertEqual([prediction.nextplace_id for prediction in spilled], ['home_0', 'home_1', 'home_2'])
+        self.assertEqual(len(feed), 1)
+        self.assertEqual(feed.get_metrics()['spilled'], 3)
+        self.assertEqual(feed.get_metrics()['dropped'], 0)
+
+    def test_spill_needs_handler(self):
+        with self.assertRaises(ValueError):
+            PredictionFeed(overflow_policy=SPILL)
+
+    def test_partial_batch_is_flushed_after_max_wait(self):
+        feed = PredictionFeed()
+        feed.put_many(build_predictions(3))
+
+        start = time.monotonic()
+        batch = feed.get_batch(max_size=500, max_wait=0.2)
+
+        self.assertEqual(len(batch), 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_full_batch_is_returned_without_waiting(self):
+        feed = PredictionFeed()
+        threading.Timer(0.05, feed.put_many, args=(build_predictions(500),)).start()
+
+        start = time.monotonic()
+        batch = feed.get_batch(max_size=500, max_wait=5)
+
+        self.assertEqual(len(batch), 500)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_website_payload(self):
+        payload = build_predictions(1)[0].to_dict()
+        self.assertEqual(payload['nextplaceId'], 'home_0')
+        self.assertEqual(payload['minerHotKey'], 'hotkey')
+        self.assertEqual(payload['predictionScore'], -1)
+        self.assertEqual(payload['predictedSaleDate'], '2024-11-01T00:00:00.000Z')
+        self.assertEqual(payload['predictionDate'], '2024-10-01T00:00:00.000Z')
+
+
+if __name__ == '__main__':
+    unittest.main()
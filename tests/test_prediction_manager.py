@@ -0,0 +1,134 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+from nextplace.protocol import PredictionRecord
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.predictions.prediction_manager import PredictionManager
+from nextplace.validator.website_data.prediction_feed import PredictionFeed
+
+
+class TestPredictionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        metagraph = SimpleNamespace(hotkeys=['hotkey_0', 'hotkey_1', 'hotkey_2'])
+        self.prediction_feed = PredictionFeed()
+        self.prediction_manager = PredictionManager(self.database_manager, metagraph, self.prediction_feed)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _stored_prices(self) -> dict[tuple[str, str], float]:
+        rows = self.database_manager.query("SELECT miner_hotkey, nextplace_id, predicted_sale_price FROM predictions")
+        return {(miner_hotkey, nextplace_id): price for miner_hotkey, nextplace_id, price in rows}
+
+    def test_stores_every_miner_in_one_transaction(self):
+        self.database_manager.query_and_commit(
+            "INSERT INTO predictions VALUES ('home_1', 'hotkey_0', 1.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee'), "
+            "('home_1', 'hotkey_1', 1.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee')"
+        )
+        responses = [
+            [PredictionRecord('home_1', 'Kissimmee', False, 100.0, '2024-11-01'), PredictionRecord('home_2', 'Kissimmee', False, 200.0, '2024-11-01')],
+            [PredictionRecord('home_1', 'Kissimmee', True, 300.0, '2024-11-01'), PredictionRecord('unknown', 'Kissimmee', False, 1.0, '2024-11-01')],
+            [PredictionRecord('home_2', 'Kissimmee', False, None, '2024-11-01')],
+        ]
+
+        transactions = []
+        original_transaction = self.database_manager.transaction
+
+        @contextmanager
+        def counting_transaction():
+            transactions.append(1)
+            with original_transaction() as cursor:
+                yield cursor
+
+        with patch.object(self.database_manager, 'transaction', counting_transaction):
+            self.prediction_manager.process_predictions(responses, {'home_1', 'home_2'})
+
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(self._stored_prices(), {
+            ('hotkey_0', 'home_1'): 1.0,  # Ignore policy keeps the existing prediction
+            ('hotkey_0', 'home_2'): 200.0,
+            ('hotkey_1', 'home_1'): 300.0,  # Force update replaces it
+        })
+        self.assertEqual(len(self.prediction_feed), 3)
+
+    def test_batch_can_be_stored_as_responses_arrive(self):
+        batch = self.prediction_manager.start_batch()
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_2', [PredictionRecord('home_1', 'Kissimmee', False, 100.0, '2024-11-01')], {'home_1'})
+        self.assertEqual(len(batch), 1)
+        self.assertTrue(self.prediction_manager.ingest_batch(batch))
+        self.assertEqual(len(batch), 0)
+
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_1', 'Kissimmee', False, 200.0, '2024-11-01')], {'home_1'})
+        self.assertTrue(self.prediction_manager.ingest_batch(batch))
+        self.assertFalse(self.prediction_manager.ingest_batch(batch))
+
+        self.assertEqual(self._stored_prices(), {('hotkey_2', 'home_1'): 100.0, ('hotkey_0', 'home_1'): 200.0})
+        timestamps = self.database_manager.query("SELECT DISTINCT prediction_timestamp FROM predictions")
+        self.assertEqual(timestamps, [(batch.timestamp,)])
+
+    def test_invalid_rows_only_drop_their_miner(self):
+        responses = [
+            [PredictionRecord('home_1', 'Kissimmee', False, 100.0, '2024-11-01')],
+            [PredictionRecord('home_1', 'Kissimmee', False, 300.0, '2024-11-01'), PredictionRecord('home_2', 'Kissimmee', False, [1.0], '2024-11-01')],  # Can't be bound
+            [PredictionRecord('home_2', 'Kissimmee', True, 200.0, '2024-11-01')],
+        ]
+
+        self.prediction_manager.process_predictions(responses, {'home_1', 'home_2'})
+
+        self.assertEqual(self._stored_prices(), {('hotkey_0', 'home_1'): 100.0, ('hotkey_2', 'home_2'): 200.0})
+        activity = self.database_manager.query("SELECT DISTINCT miner_hotkey FROM miner_market_activity ORDER BY miner_hotkey")
+        self.assertEqual(activity, [('hotkey_0',), ('hotkey_2',)])
+
+    def test_failed_transaction_keeps_rows_for_next_attempt(self):
+        batch = self.prediction_manager.start_batch()
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_1', 'Kissimmee', False, 100.0, '2024-11-01')], {'home_1'})
+
+        with patch.object(self.database_manager, 'transaction', side_effect=sqlite3.OperationalError('database is locked')):
+            self.assertFalse(self.prediction_manager.ingest_batch(batch))
+        self.assertEqual(len(batch), 1)
+
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_2', 'Kissimmee', False, 200.0, '2024-11-01')], {'home_2'})
+        self.assertTrue(self.prediction_manager.ingest_batch(batch))
+        self.assertEqual(self._stored_prices(), {('hotkey_0', 'home_1'): 100.0, ('hotkey_0', 'home_2'): 200.0})
+
+    def test_taken_rows_are_stored_while_batch_keeps_collecting(self):
+        batch = self.prediction_manager.start_batch()
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_1', 'Kissimmee', False, 100.0, '2024-11-01')], {'home_1'})
+
+        async def stream() -> bool:
+            flush = asyncio.get_running_loop().run_in_executor(None, self.prediction_manager.ingest_batch, batch.take())
+            self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_2', 'Kissimmee', False, 200.0, '2024-11-01')], {'home_2'})
+            return await flush
+
+        self.assertTrue(asyncio.run(stream()))
+        self.assertEqual(self._stored_prices(), {('hotkey_0', 'home_1'): 100.0})
+        self.assertEqual(len(batch), 1)
+
+        failed = batch.take()
+        self.prediction_manager.add_miner_predictions(batch, 'hotkey_0', [PredictionRecord('home_1', 'Kissimmee', True, 300.0, '2024-11-01')], {'home_1'})
+        batch.put_back(failed)
+        self.assertTrue(self.prediction_manager.ingest_batch(batch))
+        self.assertEqual(self._stored_prices(), {('hotkey_0', 'home_1'): 300.0, ('hotkey_0', 'home_2'): 200.0})
+
+    def test_no_transaction_without_predictions(self):
+        with patch.object(self.database_manager, 'transaction') as transaction:
+            self.prediction_manager.process_predictions([[], []], {'home_1'})
+        transaction.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.predictions_table_migrator import PredictionsTableMigrator
+from nextplace.validator.database.table_initializer import TableInitializer
+
+
+class TestPredictionsTableMigrator(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.migrator = PredictionsTableMigrator(self.database_manager)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _create_legacy_table(self, hotkey: str, rows: list[tuple]) -> None:
+        self.database_manager.query_and_commit(f"""
+            CREATE TABLE "predictions_{hotkey}" (
+                nextplace_id TEXT,
+                miner_hotkey TEXT,
+                predicted_sale_price REAL,
+                predicted_sale_date TEXT,
+                prediction_timestamp TEXT,
+                market TEXT,
+                PRIMARY KEY (nextplace_id, miner_hotkey)
+            )
+        """)
+        self.database_manager.query_and_commit_many(f'INSERT INTO "predictions_{hotkey}" VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def test_migrate_moves_rows_and_drops_legacy_tables(self):
+        self._create_legacy_table('hotkey_a', [
+            ('home_1', 'hotkey_a', 100.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee'),
+            ('home_2', 'hotkey_a', 200.0, '2024-10-02', '2024-09-01T00:00:00Z', 'Conroe'),
+        ])
+        self._create_legacy_table('hotkey_b', [
+            ('home_1', 'hotkey_b', 110.0, '2024-10-03', '2024-09-01T00:00:00Z', 'Kissimmee'),
+        ])
+
+        self.migrator.migrate()
+
+        self.assertEqual(self.migrator.get_legacy_tables(), [])
+        rows = self.database_manager.query("SELECT miner_hotkey, nextplace_id FROM predictions ORDER BY miner_hotkey, nextplace_id")
+        self.assertEqual(rows, [('hotkey_a', 'home_1'), ('hotkey_a', 'home_2'), ('hotkey_b', 'home_1')])
+
+    def test_migrate_keeps_newer_predictions(self):
+        self.database_manager.query_and_commit("""
+            INSERT INTO predictions VALUES ('home_1', 'hotkey_a', 150.0, '2024-11-01', '2024-10-01T00:00:00Z', 'Kissimmee')
+        """)
+        self._create_legacy_table('hotkey_a', [
+            ('home_1', 'hotkey_a', 100.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee'),
+        ])
+
+        self.migrator.migrate()
+
+        rows = self.database_manager.query("SELECT predicted_sale_price FROM predictions")
+        self.assertEqual(rows, [(150.0,)])
+
+    def test_migrate_marks_consumed_sales_pending(self):
+        self.database_manager.query_and_commit_many("INSERT INTO sales VALUES (?, ?, ?, ?)", [
+            ('home_1', 'property_1', 100.0, '2024-10-01'),
+            ('home_3', 'property_3', 300.0, '2024-10-01'),
+        ])
+        self.database_manager.query_and_commit("DELETE FROM pending_sales")  # Already consumed by the batch scorer
+        self._create_legacy_table('hotkey_a', [
+            ('home_1', 'hotkey_a', 100.0, '2024-10-01', '2024-09-01T00:00:00Z', 'Kissimmee'),
+            ('home_2', 'hotkey_a', 200.0, '2024-10-02', '2024-09-01T00:00:00Z', 'Conroe'),
+        ])
+
+        self.migrator.migrate()
+
+        self.assertEqual(self.database_manager.query("SELECT nextplace_id FROM pending_sales"), [('home_1',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from nextplace.protocol import (
+    RealEstatePrediction, RealEstatePredictions, RealEstateSynapse, PredictionRecord, RESPONSE_FIELDS,
+    COLUMNAR_WIRE_FORMAT_VERSION, encode_property_columns, decode_property_columns
+)
+
+
+def build_predictions(count: int) -> RealEstatePredictions:
+    return RealEstatePredictions(predictions=[
+        RealEstatePrediction(
+            nextplace_id=f"home_{idx}", property_id=str(idx), address=f"{idx} Main St", city='Kissimmee', state='FL',
+            zip_code='34741', price=300000.0 + idx, beds=3, baths=2.5, sqft=1500, latitude=28.3, longitude=-81.4,
+            property_type='House', query_date='2024-10-01T00:00:00Z', market='Kissimmee'
+        )
+        for idx in range(count)
+    ])
+
+
+class TestProtocol(unittest.TestCase):
+
+    def test_columnar_round_trip(self):
+        predictions = build_predictions(10)
+        synapse = RealEstateSynapse.create(real_estate_predictions=predictions, wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+
+        self.assertEqual(synapse.real_estate_predictions.predictions, [])
+        self.assertNotIn('predicted_sale_price', synapse.property_columns['columns'])  # All-None columns are dropped
+        self.assertEqual(synapse.deserialize(), predictions)
+
+        received = RealEstateSynapse.model_validate_json(synapse.model_dump_json())
+        self.assertEqual(received.get_predictions(), predictions)
+
+    def test_legacy_synapse_is_unchanged(self):
+        predictions = build_predictions(3)
+        synapse = RealEstateSynapse.create(real_estate_predictions=predictions)
+        self.assertIsNone(synapse.property_columns)
+        self.assertIs(synapse.deserialize(), predictions)
+
+    def test_miner_response_keeps_response_fields(self):
+        synapse = RealEstateSynapse.create(real_estate_predictions=build_predictions(5), wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+
+        # What the miner does
+        synapse.decode_columns()
+        for prediction in synapse.real_estate_predictions.predictions:
+            prediction.predicted_sale_price = 310000.0
+            prediction.predicted_sale_date = '2024-12-01'
+        synapse.encode_columns(RESPONSE_FIELDS)
+
+        self.assertEqual(set(synapse.property_columns['columns']), {'nextplace_id', 'market', 'predicted_sale_price', 'predicted_sale_date'})
+        response = synapse.deserialize().predictions
+        self.assertEqual([prediction.nextplace_id for prediction in response], [f"home_{idx}" for idx in range(5)])
+        self.assertTrue(all(prediction.predicted_sale_price == 310000.0 for prediction in response))
+
+    def test_decode_rejects_ragged_columns(self):
+        payload = encode_property_columns(build_predictions(3).predictions)
+        payload['columns']['price'].pop()
+        with self.assertRaises(ValueError):
+            decode_property_columns(payload)
+
+    def test_prediction_records_match_across_formats(self):
+        predictions = build_predictions(4)
+        for idx, prediction in enumerate(predictions.predictions):
+            prediction.predicted_sale_price = 300000.0 + idx
+            prediction.predicted_sale_date = '2024-12-01'
+            prediction.force_update_past_predictions = idx % 2 == 0
+
+        legacy = RealEstateSynapse.create(real_estate_predictions=predictions.model_copy(deep=True))
+        columnar = RealEstateSynapse.create(real_estate_predictions=predictions.model_copy(deep=True), wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+        received = RealEstateSynapse.model_validate_json(columnar.model_dump_json())
+
+        self.assertEqual(legacy.get_prediction_records(), received.get_prediction_records())
+        self.assertEqual(received.get_prediction_records()[1], PredictionRecord('home_1', 'Kissimmee', False, 300001.0, '2024-12-01'))
+
+    def test_prediction_records_drop_values_of_the_wrong_type(self):
+        synapse = RealEstateSynapse.create(real_estate_predictions=RealEstatePredictions(predictions=[]), wire_format_version=COLUMNAR_WIRE_FORMAT_VERSION)
+        synapse.property_columns = {'count': 2, 'columns': {
+            'nextplace_id': ['home_0', 7],
+            'predicted_sale_price': ['lots', 250000],
+            'predicted_sale_date': ['2024-12-01', None],
+        }}
+        self.assertEqual(synapse.get_prediction_records(), [
+            PredictionRecord('home_0', None, False, None, '2024-12-01'),
+            PredictionRecord(None, None, False, 250000.0, None),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+import numpy as np
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.scoring import replay
+from nextplace.validator.scoring.replay import ReplayParameters, ScoringReplay, daily_scores_from_scored_predictions
+from nextplace.validator.scoring.time_gated_scorer import TimeGatedScorer
+from nextplace.validator.setting_weights.tiered_weights import calculate_weight_vector
+
+START_DATE = date(2024, 6, 1)
+
+
+def random_daily_scores(number_of_miners: int, number_of_days: int, seed: int = 25) -> list[tuple]:
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(number_of_miners):
+        first_day = rng.randint(0, number_of_days - 1)
+        last_day = rng.randint(first_day, number_of_days - 1)
+        for day in range(first_day, last_day + 1):
+            if rng.random() < 0.8:
+                rows.append((f"hotkey_{idx}", (START_DATE + timedelta(days=day)).strftime("%Y-%m-%d"), rng.uniform(0, 100), rng.randint(1, 30)))
+    rng.shuffle(rows)
+    return rows
+
+
+def score_rows_as_of(time_gated_scorer: TimeGatedScorer, hotkeys: list[str], daily_scores: list[tuple], today: date):
+    """
+    What DAILY_SCORES_WINDOW_QUERY and `score_rows` give on `today`, when only the daily scores up to then exist
+    """
+    today_str = today.strftime("%Y-%m-%d")
+    cutoff = (today - timedelta(days=time_gated_scorer.score_date_cutoff)).strftime("%Y-%m-%d")
+    recorded = [row for row in daily_scores if row[1] <= today_str]
+    oldest = {}
+    for hotkey, row_date, _, _ in recorded:
+        oldest[hotkey] = min(oldest.get(hotkey, row_date), row_date)
+    rows = sorted((hotkey, row_date, score, total, oldest[hotkey]) for hotkey, row_date, score, total in recorded if row_date >= cutoff)
+    return time_gated_scorer.score_rows(hotkeys, rows, today), sorted({row[0] for row in rows})
+
+
+class TestScoringReplay(unittest.TestCase):
+
+    def test_matches_live_scoring_and_weights(self):
+        daily_scores = random_daily_scores(number_of_miners=40, number_of_days=60)
+        parameters = ReplayParameters(consistency_window_duration=7, min_consistency_window_percent=40.0, score_date_cutoff=28, tier_shares=(0.6, 0.15, 0.05))
+        result = ScoringReplay(daily_scores).run(parameters)
+
+        time_gated_scorer = TimeGatedScorer(None)
+        time_gated_scorer.consistency_window_duration = 7
+        time_gated_scorer.min_consistency_window_percent = 40.0
+        time_gated_scorer.score_date_cutoff = 28
+        for day_idx in [0, 5, 27, 28, 45, len(result.dates) - 1]:
+            today = result.dates[day_idx]
+            expected_scores, active_hotkeys = score_rows_as_of(time_gated_scorer, result.hotkeys, daily_scores, today)
+            self.assertEqual(result.scores[day_idx].tolist(), expected_scores.tolist(), today)  # Bit for bit
+            self.assertEqual([result.hotkeys[idx] for idx in result.active[day_idx].nonzero()[0]], active_hotkeys)
+
+            miner_uids = [result.hotkeys.index(hotkey) for hotkey in active_hotkeys]
+            expected_weights = calculate_weight_vector(np.append(expected_scores, 0.0), miner_uids, len(result.hotkeys), tier_shares=(0.6, 0.15, 0.05))
+            self.assertEqual(result.weights[day_idx].tolist() + [result.reduction_weights[day_idx]], expected_weights.tolist())
+
+    def test_date_range(self):
+        daily_scores = random_daily_scores(number_of_miners=5, number_of_days=10)
+        result = ScoringReplay(daily_scores).run(start_date=START_DATE - timedelta(days=2), end_date=START_DATE + timedelta(days=30))
+        self.assertEqual(len(result.dates), 33)
+        self.assertEqual(result.weights[0].tolist(), [0.0] * len(result.hotkeys))
+        self.assertEqual(result.reduction_weights[0], 1.0)
+        self.assertFalse(result.active[-1].any())  # Every daily score has left the window
+
+        self.assertEqual(ScoringReplay([]).run().dates, [])
+
+    def test_daily_scores_from_scored_predictions(self):
+        scored_predictions = [
+            ('home_1', 'Kissimmee', 'hotkey_a', 500000.0, '2024-10-20', '2024-10-01T00:00:00Z', 500000.0, '2024-10-20T00:00:00Z', '2024-10-21T01:00:00Z'),
+            ('home_2', 'Kissimmee', 'hotkey_a', 400000.0, '2024-10-20', '2024-10-01T00:00:00Z', 500000.0, '2024-10-20T00:00:00Z', '2024-10-21T02:00:00Z'),
+            ('home_3', 'Kissimmee', 'hotkey_a', 500000.0, 'bad date', '2024-10-01T00:00:00Z', 500000.0, '2024-10-20T00:00:00Z', '2024-10-21T02:00:00Z'),
+            ('home_1', 'Kissimmee', 'hotkey_b', 500000.0, '2024-10-20', '2024-10-01T00:00:00Z', 500000.0, '2024-10-20T00:00:00Z', '2024-10-22T00:00:00Z'),
+        ]
+        self.assertEqual(daily_scores_from_scored_predictions(scored_predictions), [
+            ('hotkey_a', '2024-10-21', (100.0 + (80.0 * 0.86 + 14.0)) / 2, 2),
+            ('hotkey_b', '2024-10-22', 100.0, 1),
+        ])
+
+    def test_cli_reads_database_and_writes_trajectories(self):
+        original_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)  # DatabaseManager writes to ./data
+            try:
+                database_manager = DatabaseManager()
+                TableInitializer(database_manager).create_tables()
+                daily_scores = random_daily_scores(number_of_miners=8, number_of_days=20)
+                database_manager.query_and_commit_many("INSERT INTO daily_scores VALUES (?, ?, ?, ?)", daily_scores)
+                database_manager.close()
+
+                result = replay.main(['--database', database_manager.db_path, '--output', 'weights.csv', '--top-tier-fraction', '0.25'])
+
+                self.assertEqual(result.scores.tolist(), ScoringReplay(daily_scores).run(ReplayParameters(top_tier_fraction=0.25)).scores.tolist())
+                with open('weights.csv') as csv_file:
+                    rows = list(csv.DictReader(csv_file))
+                self.assertEqual(len(rows), int(result.active.sum()) + len(result.dates))
+                last_day = [row for row in rows if row['date'] == result.dates[-1].strftime("%Y-%m-%d")]
+                self.assertAlmostEqual(sum(float(row['weight']) for row in last_day), 1.0)
+            finally:
+                os.chdir(original_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
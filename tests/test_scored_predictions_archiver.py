@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.scored_predictions_archiver import ScoredPredictionsArchiver, read_archive
+from nextplace.validator.database.table_initializer import TableInitializer
+
+
+class TestScoredPredictionsArchiver(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.archive_directory = os.path.join(self.tmp_dir.name, 'archive')
+        self.archiver = ScoredPredictionsArchiver(self.database_manager, directory=self.archive_directory, chunk_size=7)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _insert(self, rows: list[tuple]) -> None:
+        self.database_manager.query_and_commit_many("INSERT INTO scored_predictions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _row(self, idx: int, prediction_timestamp: str or None) -> tuple:
+        return (f"home_{idx}", 'Kissimmee', f"hotkey_{idx % 3}", 100.0 + idx, '2024-11-01', prediction_timestamp, None if idx % 5 == 0 else 90.0, '2024-11-02', '2024-11-03T00:00:00Z')
+
+    def _remaining_ids(self) -> set[str]:
+        return {row[0] for row in self.database_manager.query("SELECT nextplace_id FROM scored_predictions")}
+
+    def test_archives_expired_rows_by_date(self):
+        now = datetime.now(timezone.utc)
+        old = now - timedelta(days=30)
+        recent = now - timedelta(days=2)
+        expired = [self._row(idx, old.strftime('%Y-%m-%dT%H:%M:%SZ')) for idx in range(10)]
+        expired += [self._row(idx, (old - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S.%f')) for idx in range(10, 15)]  # Other format, same age
+        expired += [self._row(15, 'not a timestamp'), self._row(16, None)]
+        kept = [self._row(idx, recent.strftime('%Y-%m-%dT%H:%M:%SZ')) for idx in range(17, 20)]
+        self._insert(expired + kept)
+
+        self.assertEqual(self.archiver.archive_expired(), len(expired))
+
+        self.assertEqual(self._remaining_ids(), {row[0] for row in kept})
+        self.assertEqual(sorted(read_archive(self.archive_directory), key=lambda row: row[0]), sorted(expired, key=lambda row: row[0]))
+        self.assertEqual(sorted(os.listdir(self.archive_directory)), [(old - timedelta(days=1)).strftime('%Y-%m-%d'), old.strftime('%Y-%m-%d'), 'unknown'])
+        self.assertEqual(list(read_archive(self.archive_directory, start_date=old.strftime('%Y-%m-%d'), end_date=old.strftime('%Y-%m-%d'))), expired[:10])
+        self.assertEqual(self.archiver.archive_expired(), 0)
+
+    def test_failed_delete_does_not_duplicate_archive(self):
+        old = (datetime.now(timezone.utc) - timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        rows = [self._row(idx, old) for idx in range(5)]
+        self._insert(rows)
+
+        with patch.object(self.database_manager, 'transaction', side_effect=sqlite3.OperationalError('database is locked')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.archiver.archive_expired()
+        self.assertEqual(len(self._remaining_ids()), 5)
+
+        self.assertEqual(self.archiver.archive_expired(), 5)
+        self.assertEqual(list(read_archive(self.archive_directory)), rows)
+
+    def test_returns_freed_pages(self):
+        old = (datetime.now(timezone.utc) - timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._insert([self._row(idx, old)[:2] + ('x' * 2000,) + self._row(idx, old)[3:] for idx in range(500)])
+        size_before = os.path.getsize(self.database_manager.db_path)
+
+        self.archiver.chunk_size = 100
+        self.assertEqual(self.archiver.archive_expired(), 500)
+
+        self.assertLess(os.path.getsize(self.database_manager.db_path), size_before / 2)
+
+    def test_convert_to_incremental_vacuum(self):
+        with self.database_manager.connection_pool.connection() as db_connection:
+            db_connection.execute("PRAGMA auto_vacuum=NONE")
+            db_connection.execute("VACUUM")
+            self.assertEqual(db_connection.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+        self.database_manager.convert_to_incremental_vacuum()
+
+        with self.database_manager.connection_pool.connection() as db_connection:
+            self.assertEqual(db_connection.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
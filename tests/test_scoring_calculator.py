@@ -0,0 +1,88 @@
+import random
+import struct
+import unittest
+from datetime import date, timedelta
+from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
+
+
+def build_synthetic_predictions(count: int, seed: int = 48) -> list[tuple]:
+    """
+    Build (miner_hotkey, predicted_price, predicted_date, actual_price, actual_date) tuples
+    """
+    rng = random.Random(seed)
+    base_date = date(2024, 10, 1)
+    predictions = []
+    for _ in range(count):
+        actual_date = base_date + timedelta(days=rng.randint(0, 60))
+        predicted_date = actual_date + timedelta(days=rng.randint(-30, 30))
+        actual_price = rng.randint(50_000, 3_000_000)
+        predicted_price = actual_price * rng.uniform(0.5, 2.5)
+        predictions.append((
+            'hotkey',
+            predicted_price,
+            predicted_date.strftime('%Y-%m-%d'),
+            float(actual_price),
+            f"{actual_date.strftime('%Y-%m-%d')}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}Z",
+        ))
+    return predictions
+
+
+class TestScoringCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.scoring_calculator = ScoringCalculator(None, None)
+
+    def _scalar_scores(self, predictions: list[tuple]) -> list:
+        return [
+            self.scoring_calculator.calculate_score(actual_price, predicted_price, actual_date, predicted_date, hotkey)
+            for hotkey, predicted_price, predicted_date, actual_price, actual_date in predictions
+        ]
+
+    def _assert_bitwise_equal(self, predictions: list[tuple]) -> None:
+        scores, valid = ScoringCalculator.calculate_scores(predictions)
+        for idx, expected in enumerate(self._scalar_scores(predictions)):
+            if expected is None:
+                self.assertFalse(valid[idx], predictions[idx])
+                continue
+            self.assertTrue(valid[idx], predictions[idx])
+            self.assertEqual(struct.pack('<d', expected), struct.pack('<d', float(scores[idx])), predictions[idx])
+
+    def test_vectorized_scores_match_scalar_scores(self):
+        self._assert_bitwise_equal(build_synthetic_predictions(20000))
+
+    def test_date_formats_match_strptime(self):
+        sale_date = '2024-03-01T12:00:00Z'
+        predicted_dates = [
+            '2024-02-29',  # Leap day
+            '2023-02-29',  # Not a leap year
+            '2024-3-1',  # strptime accepts unpadded values
+            '2024-13-01',
+            '2024-00-10',
+            '0000-01-01',
+            '2024-03-01T00:00:00Z',
+            '2024/03/01',
+            '',
+        ]
+        predictions = [('hotkey', 100.0, predicted_date, 110.0, sale_date) for predicted_date in predicted_dates]
+        self._assert_bitwise_equal(predictions)
+
+    def test_price_edge_cases(self):
+        predictions = [
+            ('hotkey', 0.0, '2024-03-01', 100.0, '2024-03-01T00:00:00Z'),  # Price score floors at 0
+            ('hotkey', 100.0, '2024-03-01', 100.0, '2024-03-01T00:00:00Z'),  # Perfect prediction
+            ('hotkey', 1e12, '2024-01-01', 100.0, '2024-03-01T00:00:00Z'),
+        ]
+        self._assert_bitwise_equal(predictions)
+
+    def test_calculate_new_scores_matches_sequential_sum(self):
+        predictions = build_synthetic_predictions(1000)
+        expected_total = 0
+        for score in self._scalar_scores(predictions):
+            expected_total += score
+        new_scores = self.scoring_calculator._calculate_new_scores(predictions)
+        self.assertEqual(new_scores['new_predictions'], len(predictions))
+        self.assertEqual(new_scores['total_score'], expected_total)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from nextplace.validator.api.sold_homes_api import SoldHomesAPI
+from nextplace.validator.api.token_bucket import TokenBucket
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+
+PAGE_SIZE = 2
+HOMES_PER_MARKET = 5
+
+
+def build_home(region_id: str, idx: int) -> dict:
+    return {
+        'homeData': {
+            'propertyId': f"{region_id}-{idx}",
+            'timezone': 'US/Eastern',
+            'priceInfo': {'amount': 100_000 + idx},
+            'lastSaleData': {'lastSoldDate': '2024-10-01T12:00:00Z'},
+            'addressInfo': {'formattedStreetLine': f"{idx} Main St", 'zip': region_id},
+        }
+    }
+
+
+class StubSoldHomesServer(ThreadingHTTPServer):
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubSoldHomesHandler)
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.rate_limit_next = 0  # Respond 429 to this many requests
+
+
+class StubSoldHomesHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            rate_limited = server.rate_limit_next > 0
+            server.rate_limit_next -= 1 if rate_limited else 0
+        try:
+            time.sleep(0.02)
+            if rate_limited:
+                self.send_response(429)
+                self.end_headers()
+                return
+            params = parse_qs(urlparse(self.path).query)
+            region_id = params['regionId'][0]
+            page = int(params['page'][0])
+            limit = int(params['limit'][0])
+            indices = range((page - 1) * limit, min(page * limit, HOMES_PER_MARKET))
+            body = json.dumps({'data': [build_home(region_id, idx) for idx in indices]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.stats_lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSoldHomesAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.server = StubSoldHomesServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/properties/search-sold"
+        self.markets = [{'name': f"Market {idx}", 'id': f"6_{idx}"} for idx in range(6)]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _build_api(self, max_concurrency: int, requests_per_second: float = 1000.0) -> SoldHomesAPI:
+        api = SoldHomesAPI(self.database_manager, self.markets, max_concurrency=max_concurrency, requests_per_second=requests_per_second, us_url=self.url, canada_url=self.url)
+        api.max_results_per_page = PAGE_SIZE
+        return api
+
+    def test_fetches_every_page_of_every_market(self):
+        self._build_api(max_concurrency=3).get_sold_properties()
+
+        self.assertEqual(self.database_manager.get_size_of_table('sales'), len(self.markets) * HOMES_PER_MARKET)
+        self.assertEqual(self.database_manager.get_size_of_table('pending_sales'), len(self.markets) * HOMES_PER_MARKET)
+        pages_per_market = -(-HOMES_PER_MARKET // PAGE_SIZE)
+        self.assertEqual(self.server.requests, len(self.markets) * pages_per_market)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_retries_rate_limited_requests(self):
+        self.server.rate_limit_next = 1
+        self.markets = self.markets[:1]
+        self._build_api(max_concurrency=1).get_sold_properties()
+        self.assertEqual(self.database_manager.get_size_of_table('sales'), HOMES_PER_MARKET)
+
+    def test_token_bucket_limits_rate(self):
+        async def acquire_all(count: int) -> float:
+            token_bucket = TokenBucket(rate=50, capacity=1)
+            start = time.monotonic()
+            await asyncio.gather(*(token_bucket.acquire() for _ in range(count)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(acquire_all(11))
+        self.assertGreaterEqual(elapsed, 0.19)  # First token is free, the other 10 refill at 50/s
+
+    def test_token_bucket_is_shared_across_threads_and_event_loops(self):
+        token_bucket = TokenBucket(rate=50, capacity=1)
+
+        def acquire_in_thread() -> None:
+            for _ in range(5):
+                token_bucket.acquire_blocking()
+
+        async def acquire_in_event_loop() -> None:
+            for _ in range(5):
+                await token_bucket.acquire()
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=acquire_in_thread) for _ in range(2)]
+        threads.append(threading.Thread(target=lambda: asyncio.run(acquire_in_event_loop())))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.27)  # First token is free, the other 14 refill at 50/s
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.synapse.synapse_manager import SynapseManager
+from nextplace.validator.utils.contants import NUMBER_OF_PROPERTIES_PER_SYNAPSE
+
+
+class TestSynapseManager(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.synapse_manager = SynapseManager(self.database_manager, buffer_size=2)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _insert_properties(self, count: int, market: str = 'Kissimmee') -> None:
+        rows = [
+            (f"{market}_{idx}", f"p{idx}", f"l{idx}", f"{idx} Main St", market, 'FL', '34741', 300000, 3, 2.0,
+             1500, 5000, 1999, 10, 28.3, -81.4, 'House', None, None, f"2024-10-01T00:{idx // 60 % 60:02d}:{idx % 60:02d}Z", market)
+            for idx in range(count)
+        ]
+        self.database_manager.query_and_commit_many(f"INSERT INTO properties VALUES ({', '.join('?' * 21)})", rows)
+
+    def test_build_synapse_takes_properties_out_of_table(self):
+        self._insert_properties(NUMBER_OF_PROPERTIES_PER_SYNAPSE + 5)
+
+        synapse = self.synapse_manager.build_synapse()
+
+        self.assertEqual(len(synapse.real_estate_predictions.predictions), NUMBER_OF_PROPERTIES_PER_SYNAPSE)
+        self.assertEqual(self.database_manager.get_size_of_table('properties'), 5)
+        self.assertEqual(self.synapse_manager.get_metrics()['builds'], 1)
+
+    def test_properties_are_kept_until_synapse_is_sent(self):
+        self._insert_properties(NUMBER_OF_PROPERTIES_PER_SYNAPSE * 2)
+        sent = self.synapse_manager.build_synapse()
+        unsent = self.synapse_manager.build_synapse()
+        self.assertEqual(self.database_manager.get_size_of_table('properties'), 0)
+        self.assertEqual(self.database_manager.get_size_of_table('prebuilt_properties'), NUMBER_OF_PROPERTIES_PER_SYNAPSE * 2)
+
+        self.synapse_manager.mark_sent(sent)
+        TableInitializer(self.database_manager).create_tables()  # Restart before the second synapse went out
+
+        self.assertEqual(self.database_manager.get_size_of_table('prebuilt_properties'), 0)
+        remaining = self.database_manager.query("SELECT nextplace_id FROM properties ORDER BY query_date")
+        self.assertEqual([row[0] for row in remaining], [prediction.nextplace_id for prediction in sorted(unsent.real_estate_predictions.predictions, key=lambda prediction: prediction.query_date)])
+
+    def test_stopped_builder_returns_held_synapse(self):
+        self._insert_properties(NUMBER_OF_PROPERTIES_PER_SYNAPSE * 4)
+        builder = threading.Thread(target=self.synapse_manager.run_synapse_builder, daemon=True)
+        builder.start()
+        deadline = time.monotonic() + 10
+        while self.database_manager.get_size_of_table('prebuilt_properties') < NUMBER_OF_PROPERTIES_PER_SYNAPSE * 3 and time.monotonic() < deadline:
+            time.sleep(0.01)  # Two buffered, one waiting for room
+
+        self.synapse_manager.stop_synapse_builder()
+        builder.join(5)
+
+        self.assertEqual(self.database_manager.get_size_of_table('prebuilt_properties'), NUMBER_OF_PROPERTIES_PER_SYNAPSE * 2)
+        self.assertEqual(self.database_manager.get_size_of_table('properties'), NUMBER_OF_PROPERTIES_PER_SYNAPSE * 2)
+
+    def test_builder_keeps_buffer_full(self):
+        self._insert_properties(NUMBER_OF_PROPERTIES_PER_SYNAPSE * 4)
+        builder = threading.Thread(target=self.synapse_manager.run_synapse_builder, daemon=True)
+        builder.start()
+
+        deadline = time.monotonic() + 10
+        while self.synapse_manager.get_metrics()['queue_depth'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.synapse_manager.stop_synapse_builder()
+        builder.join(5)
+        self.assertEqual(self.synapse_manager.get_metrics()['queue_depth'], 2)
+
+        synapse = self.synapse_manager.get_synapse()
+        self.assertEqual(len(synapse.real_estate_predictions.predictions), NUMBER_OF_PROPERTIES_PER_SYNAPSE)
+        self.assertEqual(self.synapse_manager.get_metrics()['misses'], 0)
+
+    def test_get_synapse_builds_inline_when_buffer_empty(self):
+        self._insert_properties(3)
+        synapse = self.synapse_manager.get_synapse()
+        self.assertEqual(len(synapse.real_estate_predictions.predictions), 3)
+        self.assertEqual(self.synapse_manager.get_metrics()['misses'], 1)
+        self.assertIsNone(self.synapse_manager.get_synapse())
+
+    def test_synapse_is_balanced_across_markets(self):
+        self._insert_properties(2000, 'Kissimmee')
+        self._insert_properties(300, 'Conroe')
+        self._insert_properties(50, 'Miami Beach')
+
+        synapse = self.synapse_manager.build_synapse()
+
+        predictions = synapse.real_estate_predictions.predictions
+        markets = [prediction.market for prediction in predictions]
+        self.assertEqual(len(predictions), NUMBER_OF_PROPERTIES_PER_SYNAPSE)
+        self.assertEqual(markets.count('Miami Beach'), 50)
+        self.assertEqual(markets.count('Conroe'), 300)
+        self.assertEqual(markets.count('Kissimmee'), NUMBER_OF_PROPERTIES_PER_SYNAPSE - 350)
+        self.assertEqual(markets[:3], ['Conroe', 'Kissimmee', 'Miami Beach'])  # Interleaved
+
+        # Oldest properties go first within each market
+        kissimmee_ids = [prediction.nextplace_id for prediction in predictions if prediction.market == 'Kissimmee']
+        self.assertEqual(kissimmee_ids, [f"Kissimmee_{idx}" for idx in range(len(kissimmee_ids))])
+
+    def test_properties_without_market_get_their_own_share(self):
+        self._insert_properties(2000, 'Kissimmee')
+        self._insert_properties(30, 'Conroe')
+        self.database_manager.query_and_commit("UPDATE properties SET market = NULL WHERE nextplace_id LIKE 'Conroe_%'")
+
+        synapse = self.synapse_manager.build_synapse()
+
+        markets = [prediction.market for prediction in synapse.real_estate_predictions.predictions]
+        self.assertEqual(markets.count(None), 30)
+        self.assertEqual(markets.count('Kissimmee'), NUMBER_OF_PROPERTIES_PER_SYNAPSE - 30)
+        self.assertEqual(markets[:2], ['Kissimmee', None])  # Named markets first
+        self.assertEqual(self.database_manager.query("SELECT COUNT(*) FROM properties WHERE market IS NULL"), [(0,)])
+
+    def test_market_selection_uses_index(self):
+        plan = self.database_manager.query("EXPLAIN QUERY PLAN SELECT * FROM properties WHERE market IS 'Conroe' ORDER BY query_date LIMIT 10")
+        self.assertIn('idx_properties_market_query_date', ' '.join(str(row) for row in plan))
+        self.assertNotIn('TEMP B-TREE', ' '.join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
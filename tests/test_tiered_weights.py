@@ -0,0 +1,76 @@
+import random
+import unittest
+import numpy as np
+from nextplace.validator.setting_weights.tiered_weights import calculate_weight_vector
+
+REDUCTION_UID = 34
+
+
+def calculate_weights_from_lists(scores: dict[int, float], number_of_uids: int, reduction_uid: int) -> list[float]:
+    """
+    The previous list-based calculation from WeightSetter, with the tensor filled one element at a time
+    """
+    sorted_scores = list(sorted(scores.items(), key=lambda item: item[1], reverse=True))
+    n_miners = len(sorted_scores)
+    top_10_pct = max(1, int(0.1 * n_miners))
+    next_40_pct = max(1, int(0.4 * n_miners))
+    tiers = [sorted_scores[:top_10_pct], sorted_scores[top_10_pct:top_10_pct + next_40_pct], sorted_scores[top_10_pct + next_40_pct:]]
+
+    miner_weights = []
+    for tier, total_weight in zip(tiers, [0.7, 0.08, 0.02]):
+        tier = [(miner[0], miner[1] ** 2) for miner in tier]
+        sum_scores = sum(x[1] for x in tier)
+        if sum_scores > 0:
+            miner_weights.extend((miner[0], (miner[1] / sum_scores) * total_weight) for miner in tier)
+        else:
+            miner_weights.extend((miner[0], (miner[1] / total_weight) * len(tier)) for miner in tier)
+
+    sum_of_incentives = 0
+    for miner in miner_weights:
+        sum_of_incentives += miner[1]
+    weights = [0.0 for _ in range(number_of_uids)]
+    for uid, weight in miner_weights:
+        weights[uid] = weight
+    weights[reduction_uid] = 1 - sum_of_incentives
+    return weights
+
+
+class TestTieredWeights(unittest.TestCase):
+
+    def _assert_matches_lists(self, scores: np.ndarray, miner_uids: list[int]) -> None:
+        expected = calculate_weights_from_lists({uid: float(scores[uid]) for uid in miner_uids}, len(scores), REDUCTION_UID)
+        actual = calculate_weight_vector(scores, np.array(miner_uids, dtype=np.int64), REDUCTION_UID)
+        # Python's `** 2` goes through libm pow(), which can round a square 1 ulp away from NumPy's x * x
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-15)
+
+    def test_matches_list_calculation(self):
+        rng = random.Random(21)
+        for number_of_uids in [40, 256, 1024]:
+            scores = np.array([rng.choice([0.0, rng.uniform(0, 100), rng.uniform(0, 1)]) for _ in range(number_of_uids)])
+            miner_uids = sorted(rng.sample(range(number_of_uids), k=int(number_of_uids * 0.8)))
+            self._assert_matches_lists(scores, miner_uids)
+
+    def test_ties_keep_uid_order(self):
+        scores = np.zeros(50)
+        scores[[3, 7, 10, 12, 40]] = 5.0
+        self._assert_matches_lists(scores, list(range(50)))
+
+    def test_small_and_empty_metagraphs(self):
+        scores = np.linspace(0, 1, 40)
+        for miner_uids in [[], [5], [5, 6], [1, 2, 3]]:
+            self._assert_matches_lists(scores, miner_uids)
+        weights = calculate_weight_vector(scores, np.array([], dtype=np.int64), REDUCTION_UID)
+        self.assertEqual(weights[REDUCTION_UID], 1.0)
+        self.assertEqual(weights.sum(), 1.0)
+
+    def test_tier_shares(self):
+        scores = np.append(np.arange(100, 0, -1, dtype=np.float64), 0.0)  # UID 100 takes the reduction
+        weights = calculate_weight_vector(scores, np.arange(100), reduction_uid=100)
+        self.assertAlmostEqual(weights[:10].sum(), 0.7)
+        self.assertAlmostEqual(weights[10:50].sum(), 0.08)
+        self.assertAlmostEqual(weights[50:100].sum(), 0.02)
+        self.assertAlmostEqual(weights[100], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import random
+import statistics
+import struct
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from nextplace.validator.database.database_manager import DatabaseManager
+from nextplace.validator.database.table_initializer import TableInitializer
+from nextplace.validator.scoring.scoring_calculator import ScoringCalculator
+from nextplace.validator.scoring.time_gated_scorer import DAILY_SCORES_WINDOW_QUERY, TimeGatedScorer
+
+
+class TestTimeGatedScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)  # DatabaseManager writes to ./data
+        self.database_manager = DatabaseManager()
+        TableInitializer(self.database_manager).create_tables()
+        self.time_gated_scorer = TimeGatedScorer(self.database_manager)
+
+    def tearDown(self):
+        self.database_manager.close()
+        os.chdir(self.original_dir)
+        self.tmp_dir.cleanup()
+
+    def _insert_daily_scores(self, rows: list[tuple]) -> None:
+        self.database_manager.query_and_commit_many("INSERT INTO daily_scores VALUES (?, ?, ?, ?)", rows)
+
+    def test_score_all_matches_score(self):
+        rng = random.Random(48)
+        today = datetime.now(timezone.utc).date()
+        rows = []
+        hotkeys = [f"hotkey_{idx}" for idx in range(40)]
+        for hotkey in hotkeys[:-5]:  # Leave a few miners without any daily scores
+            registered_days_ago = rng.randint(0, 40)
+            for days_ago in range(registered_days_ago + 1):
+                if rng.random() < 0.2:  # Skip some days
+                    continue
+                date = (today - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+                rows.append((hotkey, date, rng.uniform(0, 100), rng.randint(1, 30)))
+        self._insert_daily_scores(rows)
+
+        scores = self.time_gated_scorer.score_all(hotkeys)
+
+        self.assertEqual(len(scores), len(hotkeys))
+        for hotkey, score in zip(hotkeys, scores):
+            self.assertEqual(struct.pack('<d', self.time_gated_scorer.score(hotkey)), struct.pack('<d', score), hotkey)  # Bit for bit
+
+    def test_score_all_without_recent_scores(self):
+        old_date = (datetime.now(timezone.utc).date() - timedelta(days=30)).strftime("%Y-%m-%d")
+        self._insert_daily_scores([('hotkey_a', old_date, 90.0, 10)])
+        scores = self.time_gated_scorer.score_all(['hotkey_a', 'hotkey_b'])
+        self.assertEqual(scores.tolist(), [0.0, 0.0])
+
+    def _insert_random_daily_scores(self, hotkeys: list[str], seed: int) -> None:
+        rng = random.Random(seed)
+        today = datetime.now(timezone.utc).date()
+        rows = []
+        for hotkey in hotkeys:
+            for days_ago in range(rng.randint(0, 40) + 1):
+                if rng.random() < 0.8:
+                    rows.append((hotkey, (today - timedelta(days=days_ago)).strftime("%Y-%m-%d"), rng.uniform(0, 100), rng.randint(1, 30)))
+        self._insert_daily_scores(rows)
+
+    def _score_from_daily_scores(self, hotkeys: list[str], today) -> list[float]:
+        cutoff = (today - timedelta(days=self.time_gated_scorer.score_date_cutoff)).strftime("%Y-%m-%d")
+        rows = self.database_manager.query_with_values(DAILY_SCORES_WINDOW_QUERY, (cutoff,))
+        return self.time_gated_scorer.score_rows(hotkeys, rows, today).tolist()
+
+    def test_aggregates_match_daily_scores_scan(self):
+        hotkeys = [f"hotkey_{idx}" for idx in range(30)]
+        self._insert_random_daily_scores(hotkeys[:25], seed=23)
+        today = datetime.now(timezone.utc).date()
+        self.assertEqual(self.time_gated_scorer.score_all(hotkeys).tolist(), self._score_from_daily_scores(hotkeys, today))  # Bit for bit
+
+        # Direct writes mark their miners stale, the next read refreshes only those
+        self.database_manager.query_and_commit("DELETE FROM daily_scores WHERE miner_hotkey = 'hotkey_3'")
+        self.database_manager.query_and_commit("UPDATE daily_scores SET score = score / 2 WHERE miner_hotkey = 'hotkey_4'")
+        self.assertEqual(self.time_gated_scorer.score_all(hotkeys).tolist(), self._score_from_daily_scores(hotkeys, today))
+        self.assertEqual(self.database_manager.query("SELECT COUNT(*) FROM miner_score_aggregates WHERE miner_hotkey = 'hotkey_3'"), [(0,)])
+
+        # Day weights shift when the date rolls over
+        tomorrow = today + timedelta(days=1)
+        self.assertEqual(self.time_gated_scorer.score_all(hotkeys, tomorrow).tolist(), self._score_from_daily_scores(hotkeys, tomorrow))
+
+    def test_scoring_refreshes_aggregates_in_its_transaction(self):
+        hotkeys = ['hotkey_a', 'hotkey_b', 'hotkey_c']
+        self._insert_random_daily_scores(hotkeys[:2], seed=24)
+        self.time_gated_scorer.score_all(hotkeys)
+
+        scoring_calculator = ScoringCalculator(self.database_manager, None)
+        scorable_predictions = [
+            (hotkey, 500000, '2024-10-20', 510000, '2024-10-25T00:00:00Z')
+            for hotkey in ['hotkey_b', 'hotkey_c', 'hotkey_c']
+        ]
+        with self.database_manager.transaction() as cursor:
+            scoring_calculator.process_scorable_predictions_for_all_miners(cursor, scorable_predictions)
+        scoring_calculator.process_scorable_predictions(scorable_predictions[:1], 'hotkey_a')
+
+        today = datetime.now(timezone.utc).date()
+        rows = self.database_manager.query("SELECT miner_hotkey, as_of_date, oldest_date, consistency_score_sum, consistency_predictions, past_score, past_total_weight FROM miner_score_aggregates")
+        self.assertTrue(TimeGatedScorer.aggregates_are_current(rows, today))
+        self.assertEqual(self.time_gated_scorer.score_aggregates(hotkeys, rows, today).tolist(), self._score_from_daily_scores(hotkeys, today))
+
+    def test_weighted_mean_matches_mean_of_copies(self):
+        rng = random.Random(48)
+        for size_of_window in range(1, 17):
+            scores = [rng.uniform(0, 100) for _ in range(size_of_window)]
+            day_weights = [self.time_gated_scorer.calculate_day_weight(size_of_window, days_back) for days_back in range(1, size_of_window + 1)]
+            copies = [score for score, day_weight in zip(scores, day_weights) for _ in range(day_weight)]
+            expected = statistics.mean(copies)
+            actual = TimeGatedScorer.weighted_mean(scores, day_weights)
+            self.assertEqual(struct.pack('<d', expected), struct.pack('<d', actual), size_of_window)
+
+    def test_weighted_mean_mixed_magnitudes(self):
+        scores = [0.0, 1e-300, 1e300, 100.0, 1 / 3]
+        day_weights = [100, 5, 1, 50, 7]
+        copies = [score for score, day_weight in zip(scores, day_weights) for _ in range(day_weight)]
+        self.assertEqual(statistics.mean(copies), TimeGatedScorer.weighted_mean(scores, day_weights))
+
+    def test_weighted_mean_without_weight(self):
+        self.assertEqual(TimeGatedScorer.weighted_mean([50.0], [0]), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
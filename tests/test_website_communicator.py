@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from nextplace.validator.website_data import website_communicator as website_communicator_module
+from nextplace.validator.website_data.website_communicator import SendResult, WebsiteCommunicator
+
+
+class StubWebsiteServer(ThreadingHTTPServer):
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubWebsiteHandler)
+        self.stats_lock = threading.Lock()
+        self.bodies = []
+        self.encodings = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_next = 0  # Respond 503 to this many requests
+        self.reject_containing: str or None = None  # Respond 400 to bodies containing this
+        self.latency = 0.0
+
+
+class StubWebsiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.stats_lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failed = server.fail_next > 0
+            server.fail_next -= 1 if failed else 0
+        try:
+            time.sleep(server.latency)
+            encoding = self.headers.get('Content-Encoding')
+            body = gzip.decompress(body) if encoding == 'gzip' else body
+            rejected = server.reject_containing is not None and server.reject_containing.encode() in body
+            if not failed and not rejected:
+                with server.stats_lock:
+                    server.encodings.append(encoding)
+                    server.bodies.append(json.loads(body))
+            self.send_response(503 if failed else 400 if rejected else 200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        finally:
+            with server.stats_lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestWebsiteCommunicator(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubWebsiteServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        patcher = patch.object(website_communicator_module, 'RETRY_BASE_DELAY', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _send_async(self, communicator: WebsiteCommunicator, batches: list) -> None:
+        async def send_all():
+            await asyncio.gather(*(communicator.send_data_async(batch) for batch in batches))
+            await communicator.close_async()
+        asyncio.run(send_all())
+
+    def test_gzips_large_bodies(self):
+        communicator = WebsiteCommunicator('Predictions', compress=True, api_base=self.api_base)
+        batch = [{'nextplaceId': f"home_{idx}"} for idx in range(100)]
+
+        self._send_async(communicator, [batch, [{'nextplaceId': 'small'}]])
+
+        self.assertCountEqual(self.server.bodies, [batch, [{'nextplaceId': 'small'}]])
+        self.assertCountEqual(self.server.encodings, ['gzip', None])  # Small bodies aren't worth compressing
+
+    def test_retries_unavailable_server(self):
+        self.server.fail_next = 2
+        communicator = WebsiteCommunicator('Predictions', api_base=self.api_base)
+
+        self._send_async(communicator, [[{'nextplaceId': 'home_1'}]])
+        communicator.send_data({'version': '1.0'})
+
+        self.assertEqual(self.server.bodies, [[{'nextplaceId': 'home_1'}], {'version': '1.0'}])
+
+    def test_tells_rejections_from_failures(self):
+        self.server.reject_containing = 'bad'
+        communicator = WebsiteCommunicator('Predictions', suppress_errors=True, api_base=self.api_base)
+
+        async def send_async(data: list) -> SendResult:
+            result = await communicator.send_data_async(data)
+            await communicator.close_async()
+            return result
+
+        self.assertIs(communicator.send_data([{'nextplaceId': 'bad'}]), SendResult.REJECTED)
+        self.assertIs(asyncio.run(send_async([{'nextplaceId': 'bad'}])), SendResult.REJECTED)
+        self.server.fail_next = 100
+        self.assertIs(communicator.send_data([{'nextplaceId': 'home_1'}]), SendResult.FAILED)
+        self.assertIs(asyncio.run(send_async([{'nextplaceId': 'home_1'}])), SendResult.FAILED)
+        self.server.fail_next = 0
+        self.assertIs(communicator.send_data([{'nextplaceId': 'home_1'}]), SendResult.SENT)
+        self.assertFalse(SendResult.REJECTED)
+        self.assertTrue(SendResult.SENT)
+
+    def test_bounds_in_flight_requests(self):
+        self.server.latency = 0.05
+        communicator = WebsiteCommunicator('Predictions', max_in_flight=2, api_base=self.api_base)
+
+        self._send_async(communicator, [[{'nextplaceId': f"home_{idx}"}] for idx in range(8)])
+
+        self.assertEqual(len(self.server.bodies), 8)
+        self.assertEqual(self.server.max_in_flight, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from nextplace.validator.website_data import website_communicator as website_communicator_module
+from nextplace.validator.website_data import website_outbox as website_outbox_module
+from nextplace.validator.website_data.website_outbox import WebsiteOutbox
+from tests.test_website_communicator import StubWebsiteServer
+
+
+class TestWebsiteOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, 'outbox')
+        self.server = StubWebsiteServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        patcher = patch.object(website_communicator_module, 'RETRY_BASE_DELAY', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def _build_outbox(self, **kwargs) -> WebsiteOutbox:
+        return WebsiteOutbox(directory=self.directory, api_base=self.api_base, **kwargs)
+
+    def _drain(self, outbox: WebsiteOutbox) -> None:
+        outbox.stop_drainer()  # Seals the open segment
+        for segment in outbox._sealed_segments():
+            self.assertTrue(outbox.drain_segment(segment))
+
+    def test_merges_batchable_records_and_keeps_others_whole(self):
+        outbox = self._build_outbox()
+        outbox.enqueue('Predictions', [{'nextplaceId': f"a_{idx}"} for idx in range(200)], batchable=True)
+        outbox.enqueue('Predictions', [{'nextplaceId': f"b_{idx}"} for idx in range(700)], batchable=True)
+        outbox.enqueue('Miner/Scores', [{'minerHotKey': f"hotkey_{idx}"} for idx in range(600)])
+
+        self._drain(outbox)
+
+        self.assertEqual([len(body) for body in self.server.bodies], [200, 500, 200, 600])
+        self.assertEqual(self.server.bodies[1][0], {'nextplaceId': 'b_0'})
+        self.assertEqual(outbox._sealed_segments(), [])
+        self.assertEqual(outbox.get_metrics()['shipped_requests'], 4)
+
+    def test_resumes_after_restart(self):
+        outbox = self._build_outbox()
+        for idx in range(3):
+            outbox.enqueue('Miner/Scores', {'record': idx})
+        # Process dies with the segment still open, after the first record was shipped
+        segment = outbox._open_segment_path
+        outbox._open_segment.close()
+        with open(segment[:-len('.open')] + '.seg.progress', 'w') as progress:
+            progress.write('1')
+
+        restarted = self._build_outbox()
+        restarted.enqueue('Miner/Scores', {'record': 3})
+        self._drain(restarted)
+
+        self.assertEqual(self.server.bodies, [{'record': 1}, {'record': 2}, {'record': 3}])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_failed_upload_keeps_segment(self):
+        self.server.fail_next = 100
+        outbox = self._build_outbox()
+        outbox.enqueue('Miner/Scores', {'record': 0})
+        outbox.stop_drainer()
+
+        segments = outbox._sealed_segments()
+        self.assertFalse(outbox.drain_segment(segments[0]))
+        self.assertEqual(outbox._sealed_segments(), segments)
+        self.assertEqual(outbox.get_metrics()['failed_requests'], 1)
+
+        self.server.fail_next = 0
+        self.assertTrue(outbox.drain_segment(segments[0]))
+        self.assertEqual(self.server.bodies, [{'record': 0}])
+
+    def test_rejected_upload_does_not_block_later_segments(self):
+        self.server.reject_containing = 'bad'
+        with patch.object(website_outbox_module, 'SEGMENT_MAX_BYTES', 1):  # One record per segment
+            outbox = self._build_outbox()
+            outbox.enqueue('Miner/Scores', {'record': 'bad'})
+            outbox.enqueue('Miner/Scores', {'record': 1})
+
+        self._drain(outbox)
+
+        self.assertEqual(self.server.bodies, [{'record': 1}])
+        self.assertEqual(outbox._sealed_segments(), [])
+        with open(os.path.join(self.directory, website_outbox_module.DEAD_LETTER_FILE)) as dead_letters:
+            self.assertEqual([json.loads(line)['data'] for line in dead_letters], [{'record': 'bad'}])
+        self.assertEqual(outbox.get_metrics()['rejected_requests'], 1)
+
+    def test_evicts_oldest_segments_over_cap(self):
+        with patch.object(website_outbox_module, 'SEGMENT_MAX_BYTES', 1):  # One record per segment
+            outbox = self._build_outbox(max_bytes=250)
+            for idx in range(10):
+                outbox.enqueue('Miner/Scores', {'record': idx, 'padding': 'x' * 50})
+
+        metrics = outbox.get_metrics()
+        self.assertLessEqual(metrics['bytes'], 250)
+        self.assertEqual(metrics['evicted_segments'], 10 - metrics['segments'])
+        self._drain(outbox)
+        self.assertEqual([body['record'] for body in self.server.bodies], list(range(10 - metrics['segments'], 10)))  # Newest survive
+
+
+if __name__ == '__main__':
+    unittest.main()